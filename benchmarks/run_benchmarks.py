@@ -0,0 +1,284 @@
+"""
+Payroll Benchmark Suite
+Times each pipeline stage on synthetic data of increasing size and records
+peak memory, offline, writing machine-readable results for comparing runs
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / 'src'))
+
+import pandas as pd
+
+from payroll_report import PayrollReportGenerator
+from synthetic_data import generate_dataset
+
+logger = logging.getLogger('benchmarks')
+
+# Preset sizes: (transactions, employees)
+SIZES = {
+    'tiny': (1_000, 5),
+    'small': (100_000, 50),
+    'medium': (1_000_000, 500),
+    'large': (10_000_000, 5_000)
+}
+
+STAGES = ['timecard', 'transactions', 'discounts', 'providers', 'calculator_v1', 'calculator_v2', 'save_report']
+
+
+def measure(func: Callable, trace_memory: bool = True) -> Tuple[object, Dict[str, float]]:
+    """
+    Run a function and measure wall time, CPU time and peak Python heap
+
+    Args:
+        func: Function to run (no arguments)
+        trace_memory: Track peak allocations with tracemalloc (slower, but per stage)
+
+    Returns:
+        Tuple of (function result, measurements)
+    """
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = func()
+    measurements = {
+        'wall_s': round(time.perf_counter() - wall_start, 4),
+        'cpu_s': round(time.process_time() - cpu_start, 4)
+    }
+
+    if trace_memory:
+        measurements['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    return result, measurements
+
+
+def benchmark_size(
+    size_name: str,
+    n_transactions: int,
+    n_employees: int,
+    data_root: Path,
+    stages: List[str],
+    trace_memory: bool = True
+) -> List[Dict]:
+    """
+    Run the selected stages on one dataset size
+
+    Args:
+        size_name: Label for the size (e.g. 'small')
+        n_transactions: Number of transactions to generate
+        n_employees: Number of employees to generate
+        data_root: Directory where datasets are generated and reused
+        stages: Stages to run (see STAGES)
+        trace_memory: Track peak memory per stage
+
+    Returns:
+        List of result records, one per stage
+    """
+    logger.info(f"=== {size_name}: {n_transactions:,} transactions, {n_employees:,} employees ===")
+
+    generate_start = time.perf_counter()
+    paths = generate_dataset(
+        str(data_root / f"{n_transactions}_{n_employees}"), n_transactions, n_employees
+    )
+    logger.info(f"Dataset ready in {time.perf_counter() - generate_start:.1f}s")
+
+    generator = PayrollReportGenerator(paths['config'], offline_dir=paths['data_dir'])
+    connector = generator.data_connector
+    tables = generator.config['azure_tables']
+    records = []
+
+    def record(stage: str, func: Callable, rows: Callable[[object], int]):
+        result, measurements = measure(func, trace_memory)
+        records.append({
+            'size': size_name,
+            'transactions': n_transactions,
+            'employees': n_employees,
+            'stage': stage,
+            'rows': rows(result),
+            **measurements
+        })
+        logger.info(f"  {stage:15s} {measurements['wall_s']:9.3f}s wall  {measurements['cpu_s']:9.3f}s cpu  "
+                   f"{measurements.get('peak_mb', float('nan')):9.1f} MB peak")
+        return result
+
+    # Inputs are always loaded; only selected stages are recorded
+    def run(stage: str, func: Callable, rows: Callable[[object], int] = len):
+        if stage in stages:
+            return record(stage, func, rows)
+        return func()
+
+    timecard_df, start_date, end_date = run(
+        'timecard',
+        lambda: generator.timecard_processor.load_timecard(paths['timecard']),
+        lambda result: len(result[0])
+    )
+    hours_by_employee = generator.timecard_processor.calculate_total_hours_by_employee(timecard_df)
+
+    transactions_df = run(
+        'transactions',
+        lambda: connector.get_transactions_for_period(start_date, end_date, tables['transactions'])
+    )
+    discounts_df = run(
+        'discounts',
+        lambda: connector.get_discount_details(start_date, end_date, tables['discounts'])
+    )
+    service_providers_df = run(
+        'providers',
+        lambda: connector.get_service_provider_details(tables['service_providers'])
+    )
+
+    report_df = None
+    for version in ('v1', 'v2'):
+        stage = f"calculator_{version}"
+        if stage not in stages:
+            continue
+        generator.calculator_version = version
+        payroll_results = record(
+            stage,
+            lambda: generator._calculate_payroll(
+                hours_by_employee, transactions_df, discounts_df, service_providers_df
+            ),
+            len
+        )
+        report_df = generator._build_report_frame(payroll_results, start_date, end_date)
+
+    if 'save_report' in stages:
+        if report_df is None:
+            report_df = generator._build_report_frame(
+                generator._calculate_payroll(hours_by_employee, transactions_df, discounts_df, service_providers_df),
+                start_date,
+                end_date
+            )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'payroll_report.xlsx')
+            record(
+                'save_report',
+                lambda: generator._save_report(report_df, output_path, start_date, end_date),
+                lambda _: len(report_df)
+            )
+
+    return records
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BENCHMARK_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(current: Dict, baseline_path: str) -> pd.DataFrame:
+    """
+    Compare a run against an earlier results file
+
+    Args:
+        current: Results of this run
+        baseline_path: Path to an earlier results JSON file
+
+    Returns:
+        DataFrame with baseline and current wall time and peak memory per size and stage
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    keys = ['size', 'stage']
+    merged = pd.DataFrame(baseline['results']).merge(
+        pd.DataFrame(current['results']), on=keys, suffixes=('_base', '_new')
+    )
+    merged['wall_ratio'] = (merged['wall_s_new'] / merged['wall_s_base']).round(2)
+    columns = keys + ['wall_s_base', 'wall_s_new', 'wall_ratio']
+    if 'peak_mb_base' in merged.columns and 'peak_mb_new' in merged.columns:
+        columns += ['peak_mb_base', 'peak_mb_new']
+    return merged[columns]
+
+
+def main():
+    """Main entry point for command-line usage"""
+    parser = argparse.ArgumentParser(description='Benchmark the payroll pipeline on synthetic data')
+    parser.add_argument('--sizes', default='tiny,small',
+                        help=f"Comma-separated presets ({', '.join(SIZES)}) or TRANSACTIONSxEMPLOYEES, e.g. 200000x100")
+    parser.add_argument('--stages', default=','.join(STAGES), help='Comma-separated stages to record')
+    parser.add_argument('--data-dir', default=str(BENCHMARK_DIR / 'data'),
+                        help='Where synthetic datasets are generated and reused')
+    parser.add_argument('--output', default=str(BENCHMARK_DIR / 'results'), help='Directory for results JSON')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc (faster on large sizes)')
+    parser.add_argument('--verbose', action='store_true', help='Show pipeline logs')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.setLevel(logging.INFO)
+    logging.getLogger('synthetic_data').setLevel(logging.INFO)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    sizes = []
+    for size in args.sizes.split(','):
+        size = size.strip()
+        if size in SIZES:
+            sizes.append((size, *SIZES[size]))
+        elif 'x' in size:
+            n_transactions, n_employees = size.split('x', 1)
+            sizes.append((size, int(n_transactions), int(n_employees)))
+        else:
+            parser.error(f"Unknown size: {size}")
+
+    results = []
+    for size_name, n_transactions, n_employees in sizes:
+        results.extend(benchmark_size(
+            size_name, n_transactions, n_employees, Path(args.data_dir), stages,
+            trace_memory=not args.no_memory
+        ))
+
+    run = {
+        'run': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'trace_memory': not args.no_memory
+        },
+        'results': results
+    }
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output_path, 'w') as f:
+        json.dump(run, f, indent=2)
+
+    print("\n" + pd.DataFrame(results).to_string(index=False))
+    if args.compare:
+        print("\n" + compare_results(run, args.compare).to_string(index=False))
+    print(f"\nResults saved to: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Synthetic Data Generator
+Realistic fake salon data (transactions, providers, discounts, timecard, config)
+for benchmarking the payroll pipeline offline
+"""
+
+import argparse
+import itertools
+import json
+import numpy as np
+import openpyxl
+import pandas as pd
+import yaml
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column set of the Vagaro "Transaction details" export; the last three are
+# not read by the calculators and exercise column projection
+TRANSACTION_COLUMNS = [
+    'TransactionID', 'TransactionDate', 'ServiceProviderID', 'ServiceProviderFirstName',
+    'ServiceProviderLastName', 'ServiceTitle', 'CCAmount', 'CashAmount', 'CheckAmount',
+    'ACHAmount', 'VagaroPayLaterAmount', 'OtherAmount', 'Tip', 'Discount', 'Amount',
+    'CustomerName', 'Notes'
+]
+
+# Service catalog with typical prices; the last two are addings
+SERVICES = [
+    ('Classic Full Set', 150.0), ('Volume Full Set', 200.0), ('Hybrid Full Set', 180.0),
+    ('Classic Refill', 65.0), ('Volume Refill', 85.0), ('Lash Lift', 90.0),
+    ('Brow Tint', 25.0), ('Lash Bath', 10.0), ('Bottom Lashes', 20.0)
+]
+ADDINGS = {'Lash Bath': 5.0, 'Bottom Lashes': 10.0}
+
+# Share of employees paid commission vs. hourly, and of hourly staff at the front desk
+SENIOR_SHARE = 0.3
+FRONT_DESK_SHARE = 0.2
+
+CHUNK_ROWS = 500_000
+DAYS_PER_PERIOD = 14
+
+
+def _first_names(count: int, rng: np.random.Generator) -> List[str]:
+    """Distinct first names of equal length, so no name contains another"""
+    consonants = 'bcdfghjklmnprstvz'
+    vowels = 'aeiou'
+    syllables = [c + v for c in consonants for v in vowels]
+    length = 2
+    while len(syllables) ** length < count:
+        length += 1
+
+    names = [''.join(parts).capitalize() for parts in itertools.product(syllables, repeat=length)]
+    picks = rng.choice(len(names), size=count, replace=False)
+    return [names[i] for i in picks]
+
+
+def _build_employees(n_employees: int, rng: np.random.Generator) -> List[Dict]:
+    """Employees with timecard name, config name, provider record and pay type"""
+    first_names = _first_names(n_employees, rng)
+    n_senior = max(1, int(n_employees * SENIOR_SHARE))
+    n_front_desk = int((n_employees - n_senior) * FRONT_DESK_SHARE)
+
+    employees = []
+    for i, first in enumerate(first_names):
+        last = chr(ord('A') + i % 26) + ''.join(rng.choice(list('aeilnorst'), size=5))
+        if i < n_senior:
+            group, timecard_name = 'senior_stylists', f"{first} {last[0]}. Senior Stylist"
+        elif i < n_senior + n_front_desk:
+            group, timecard_name = 'front_desk', f"{first} {last[0]}."
+        else:
+            group, timecard_name = 'stylists', f"{first} {last[0]}"
+
+        employees.append({
+            'provider_id': f"SP{i + 1:05d}",
+            'first_name': first,
+            'last_name': last,
+            'group': group,
+            'timecard_name': timecard_name,
+            'config_name': f"{first} {last[0]}."
+        })
+    return employees
+
+
+def _write_transactions(
+    path: Path,
+    n_transactions: int,
+    employees: List[Dict],
+    first_day: date,
+    n_days: int,
+    rng: np.random.Generator
+):
+    """Write the transaction CSV in chunks so 10M rows never sit in memory at once"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Front desk staff do not sell services
+    sellers = [emp for emp in employees if emp['group'] != 'front_desk'] or employees
+    provider_ids = np.array([emp['provider_id'] for emp in sellers])
+    first_names = np.array([emp['first_name'] for emp in sellers])
+    last_names = np.array([emp['last_name'] for emp in sellers])
+    service_titles = np.array([name for name, _ in SERVICES])
+    service_prices = np.array([price for _, price in SERVICES])
+    start = np.datetime64(first_day.isoformat(), 's')
+
+    written = 0
+    while written < n_transactions:
+        rows = min(CHUNK_ROWS, n_transactions - written)
+        seller = rng.integers(0, len(sellers), size=rows)
+        service = rng.integers(0, len(SERVICES), size=rows)
+
+        # Opening hours 9:00-19:00
+        seconds = rng.integers(0, n_days, size=rows) * 86400 + rng.integers(9 * 3600, 19 * 3600, size=rows)
+        amount = np.round(service_prices[service] * rng.uniform(0.9, 1.1, size=rows), 2)
+        discount = np.where(rng.random(rows) < 0.1, np.round(amount * 0.1, 2), 0.0)
+        paid = amount - discount
+        by_card = rng.random(rows) < 0.8
+
+        chunk = pd.DataFrame({
+            'TransactionID': np.arange(written, written + rows) + 1,
+            'TransactionDate': start + seconds.astype('timedelta64[s]'),
+            'ServiceProviderID': provider_ids[seller],
+            'ServiceProviderFirstName': first_names[seller],
+            'ServiceProviderLastName': last_names[seller],
+            'ServiceTitle': service_titles[service],
+            'CCAmount': np.where(by_card, paid, np.nan),
+            'CashAmount': np.where(by_card, np.nan, paid),
+            'CheckAmount': np.nan,
+            'ACHAmount': np.nan,
+            'VagaroPayLaterAmount': np.nan,
+            'OtherAmount': np.nan,
+            'Tip': np.round(amount * rng.choice([0.0, 0.15, 0.2, 0.25], size=rows), 2),
+            'Discount': discount,
+            'Amount': paid,
+            'CustomerName': 'Customer ' + (rng.integers(1, 50_000, size=rows)).astype(str),
+            'Notes': ''
+        }, columns=TRANSACTION_COLUMNS)
+
+        chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += rows
+
+    logger.info(f"Wrote {n_transactions} transactions to {path}")
+
+
+def _write_providers(path: Path, employees: List[Dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        'ServiceProviderID': [emp['provider_id'] for emp in employees],
+        'ServiceProviderFirstName': [emp['first_name'] for emp in employees],
+        'ServiceProviderLastName': [emp['last_name'] for emp in employees],
+        'ServiceProviderStatus': 'Active',
+        'Email': [f"{emp['first_name'].lower()}@example.com" for emp in employees]
+    }).to_csv(path, index=False)
+
+
+def _write_discounts(path: Path, employees: List[Dict], first_day: date, n_days: int, rng: np.random.Generator):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = max(10, len(employees) * 5)
+    pick = rng.integers(0, len(employees), size=rows)
+    pd.DataFrame({
+        'Date': pd.Timestamp(first_day) + pd.to_timedelta(rng.integers(0, n_days, size=rows), unit='D'),
+        'ServiceProviderID': [employees[i]['provider_id'] for i in pick],
+        'ServiceProviderFirstName': [employees[i]['first_name'] for i in pick],
+        'DiscountAmount': np.round(rng.uniform(1, 30, size=rows), 2)
+    }).to_csv(path, index=False)
+
+
+def _write_timecard(path: Path, employees: List[Dict], period_start: date, rng: np.random.Generator):
+    """Write a TimeCard workbook in the layout exported by the timekeeping system"""
+    period_end = period_start + timedelta(days=DAYS_PER_PERIOD - 1)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('TimeCard')
+    sheet.append(['Time Card Report'])
+    sheet.append([f"{period_start:%b} {period_start.day}, {period_start.year} to "
+                  f"{period_end:%b} {period_end.day}, {period_end.year}"])
+    sheet.append([])
+    sheet.append(['Entry Date', 'Employee', 'Role', 'Clock-In Time', 'Clock-Out Time',
+                  'Total Hours', 'Comments', 'Edited By'])
+
+    for emp in employees:
+        role = 'Comission v hrly' if emp['group'] == 'senior_stylists' else 'Hourly Pay Rate'
+        for day in range(DAYS_PER_PERIOD):
+            if rng.random() < 0.3:
+                continue
+            minutes = int(rng.integers(3 * 60, 10 * 60))
+            sheet.append([
+                (period_start + timedelta(days=day)).strftime('%b %d, %Y'),
+                emp['timecard_name'],
+                role,
+                '9:00 AM',
+                '6:00 PM',
+                f"{minutes // 60}h {minutes % 60}m" if minutes % 60 else f"{minutes // 60}h",
+                None,
+                None
+            ])
+
+    sheet.append(['Total', None, None, None, None, None])
+    workbook.save(path)
+
+
+def _write_config(path: Path, employees: List[Dict]):
+    """Payroll config listing every synthetic employee (read offline, no Azure credentials)"""
+    groups = {'senior_stylists': [], 'stylists': [], 'front_desk': []}
+    for emp in employees:
+        entry = {
+            'name': emp['config_name'],
+            'employee_id': emp['provider_id'].lower(),
+            'hourly_rate': 14.00
+        }
+        if emp['group'] == 'senior_stylists':
+            entry.update({'pay_type': 'commission_vs_hourly', 'commission_rate': 0.40, 'addings': ADDINGS})
+        else:
+            entry['pay_type'] = 'hourly'
+        groups[emp['group']].append(entry)
+
+    config = {
+        'payroll': {
+            'pay_frequency': 'biweekly',
+            'pay_delay_days': 7,
+            'hourly_rate': 14.00,
+            'senior_stylist_commission_rate': 0.40,
+            'discount_split_ratio': 0.50,
+            'calculator': 'v1'
+        },
+        'employees': groups,
+        'azure_tables': {
+            'transactions': 'Transaction details/Transaction details.csv',
+            'service_providers': 'Service provider details/Service provider details.csv',
+            'discounts': 'Discount details/Discount details.csv'
+        }
+    }
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def generate_dataset(
+    output_dir: str,
+    n_transactions: int,
+    n_employees: int,
+    seed: int = 42,
+    period_start: date = date(2025, 10, 5),
+    n_periods: int = 3
+) -> Dict[str, str]:
+    """
+    Generate a synthetic dataset, or reuse one already generated with the same parameters
+
+    Transactions cover ``n_periods`` pay periods ending with the timecard's
+    period, so period filtering discards a realistic share of rows.
+
+    Args:
+        output_dir: Directory for the dataset
+        n_transactions: Number of transaction rows
+        n_employees: Number of employees (timecard, providers and config)
+        seed: Random seed; the same parameters always give the same data
+        period_start: First day of the timecard's pay period
+        n_periods: Number of pay periods of transaction history
+
+    Returns:
+        Dictionary with 'data_dir' (offline table directory), 'timecard' and 'config' paths
+    """
+    output_dir = Path(output_dir)
+    params = {
+        'n_transactions': n_transactions,
+        'n_employees': n_employees,
+        'seed': seed,
+        'period_start': period_start.isoformat(),
+        'n_periods': n_periods
+    }
+    paths = {
+        'data_dir': str(output_dir / 'data'),
+        'timecard': str(output_dir / 'TimeCard.xlsx'),
+        'config': str(output_dir / 'config.yaml')
+    }
+
+    manifest_path = output_dir / 'manifest.json'
+    if manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            if json.load(f).get('params') == params:
+                logger.info(f"Reusing synthetic dataset: {output_dir}")
+                return paths
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    employees = _build_employees(n_employees, rng)
+
+    n_days = DAYS_PER_PERIOD * n_periods
+    first_day = period_start - timedelta(days=DAYS_PER_PERIOD * (n_periods - 1))
+    data_dir = Path(paths['data_dir'])
+
+    _write_transactions(
+        data_dir / 'Transaction details' / 'Transaction details.csv',
+        n_transactions, employees, first_day, n_days, rng
+    )
+    _write_providers(data_dir / 'Service provider details' / 'Service provider details.csv', employees)
+    _write_discounts(data_dir / 'Discount details' / 'Discount details.csv', employees, first_day, n_days, rng)
+    _write_timecard(Path(paths['timecard']), employees, period_start, rng)
+    _write_config(Path(paths['config']), employees)
+
+    with open(manifest_path, 'w') as f:
+        json.dump({'params': params, 'created': datetime.now().isoformat(), 'paths': paths}, f, indent=2)
+
+    logger.info(f"Generated synthetic dataset: {output_dir}")
+    return paths
+
+
+def main():
+    """Main entry point for command-line usage"""
+    parser = argparse.ArgumentParser(description='Generate synthetic payroll data')
+    parser.add_argument('--output', required=True, help='Directory for the dataset')
+    parser.add_argument('--transactions', type=int, default=100_000, help='Number of transactions')
+    parser.add_argument('--employees', type=int, default=50, help='Number of employees')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    paths = generate_dataset(args.output, args.transactions, args.employees, seed=args.seed)
+    print(json.dumps(paths, indent=2))
+
+
+if __name__ == '__main__':
+    main()
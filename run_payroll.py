@@ -9,8 +9,8 @@ import os
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-# Now import and run
-from payroll_report import main
+# The CLI module parses arguments before loading pandas, openpyxl or Azure
+from cli import main
 
 if __name__ == '__main__':
     main()
@@ -6,15 +6,31 @@ Automated payroll calculation system for Lumin salon
 __version__ = '1.0.0'
 __author__ = 'Lumin Development Team'
 
-from .azure_connector import AzureDataConnector
-from .payroll_calculator import PayrollCalculator
-from .timecard_processor import TimecardProcessor
-from .payroll_report import PayrollReportGenerator
-
-__all__ = [
-    'AzureDataConnector',
-    'PayrollCalculator',
-    'TimecardProcessor',
-    'PayrollReportGenerator'
-]
+import importlib
 
+# Public classes and the modules that define them. Modules are imported on
+# first attribute access, so importing the package does not load pandas,
+# openpyxl or the Azure SDK.
+_EXPORTS = {
+    'DataSource': 'data_source',
+    'AzureDataConnector': 'azure_connector',
+    'LocalDataConnector': 'local_connector',
+    'PayrollCalculator': 'payroll_calculator',
+    'TimecardProcessor': 'timecard_processor',
+    'PayrollReportGenerator': 'payroll_report'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
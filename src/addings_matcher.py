@@ -0,0 +1,97 @@
+"""
+Addings Matcher
+Classifies service titles against the whole addings catalog in one pass
+"""
+
+import pandas as pd
+import re
+from typing import Dict, List, Tuple
+import logging
+
+from money import cents_to_dollars, dollars_to_cents
+
+logger = logging.getLogger(__name__)
+
+
+class AddingsMatcher:
+    """Compiled matcher for an addings configuration (service name -> fixed amount)"""
+
+    def __init__(self, addings_config: Dict[str, float]):
+        """
+        Compile the addings catalog
+
+        Service names are case-insensitive regular expressions, as with
+        `Series.str.contains(service_name, case=False)`.
+
+        Args:
+            addings_config: Dictionary mapping service/product names to fixed amounts
+        """
+        self.entries = list(addings_config.items())
+        self.patterns = [re.compile(name, re.IGNORECASE) for name, _ in self.entries]
+
+        # One alternation rejects titles that match no entry without testing each pattern
+        try:
+            self.combined = re.compile(
+                '|'.join(f"(?:{name})" for name, _ in self.entries),
+                re.IGNORECASE
+            )
+        except re.error:
+            # Patterns with numbered backreferences cannot be combined
+            self.combined = None
+
+    def count_matches(self, service_titles: pd.Series) -> List[int]:
+        """
+        Count transactions matching each addings entry
+
+        Each distinct title is classified once and weighted by how often it
+        occurs, so the cost scales with distinct titles rather than rows times
+        entries. A title matching several entries counts for each of them.
+
+        Args:
+            service_titles: Service/product name column of the employee's transactions
+
+        Returns:
+            Match counts, in the order of the addings configuration
+        """
+        counts = [0] * len(self.entries)
+        title_counts = service_titles.value_counts(dropna=True)
+
+        for title, occurrences in title_counts.items():
+            if occurrences == 0 or not isinstance(title, str):
+                continue
+            if self.combined is not None and not self.combined.search(title):
+                continue
+
+            for i, pattern in enumerate(self.patterns):
+                if pattern.search(title):
+                    counts[i] += int(occurrences)
+
+        return counts
+
+    def calculate(self, service_titles: pd.Series) -> Tuple[float, List[Dict]]:
+        """
+        Calculate addings for a set of transactions
+
+        Addings are fixed amounts, so they are added up exactly in cents.
+
+        Args:
+            service_titles: Service/product name column of the employee's transactions
+
+        Returns:
+            Tuple of (total_addings, list of adding details)
+        """
+        total_cents = 0
+        adding_details = []
+
+        for (service_name, adding_amount), count in zip(self.entries, self.count_matches(service_titles)):
+            if count > 0:
+                subtotal_cents = count * dollars_to_cents(adding_amount)
+                total_cents += subtotal_cents
+                adding_details.append({
+                    'service': service_name,
+                    'count': count,
+                    'amount_per': adding_amount,
+                    'subtotal': cents_to_dollars(subtotal_cents)
+                })
+
+        return cents_to_dollars(total_cents), adding_details
@@ -0,0 +1,294 @@
+"""
+Async Azure Data Lake Connector
+asyncio variant of AzureDataConnector, for fetching several locations' tables concurrently
+"""
+
+import asyncio
+import pandas as pd
+import posixpath
+from datetime import datetime
+from azure.storage.filedatalake.aio import DataLakeServiceClient
+from typing import Optional, List, Dict
+import logging
+
+from azure_connector import _BufferWriter
+from table_io import concat_partitions, parse_table, partition_reads, partitions_from_paths, period_rows
+from table_mirror import TableMirror, source_namespace
+from table_schemas import TableSchema, get_schema
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAzureDataConnector:
+    """Async connector for Azure Data Lake Storage Gen2"""
+
+    def __init__(
+        self,
+        account_url: str,
+        container_name: str,
+        sas_token: str,
+        mirror_dir: Optional[str] = None,
+        download_chunk_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 8,
+        download_slots: Optional[asyncio.Semaphore] = None,
+        service_client: Optional[DataLakeServiceClient] = None
+    ):
+        """
+        Initialize async Azure Data Lake Storage connector
+
+        Args:
+            account_url: Azure storage account URL
+            container_name: Container name
+            sas_token: SAS token for authentication
+            mirror_dir: Local directory for the Parquet table mirror (disabled if None)
+            download_chunk_size: Size of each ranged request for large files (bytes)
+            max_concurrency: Number of ranged requests in flight per file
+            download_slots: Semaphore bounding in-flight download requests; share one
+                across connectors to bound downloads for all of them together
+            service_client: Service client shared with other connectors on the same
+                account (the caller closes it); a private one is created if None
+        """
+        self.account_url = account_url
+        self.container_name = container_name
+        self.mirror = None
+        if mirror_dir:
+            self.mirror = TableMirror(mirror_dir, source_namespace(account_url, container_name))
+        self.download_chunk_size = download_chunk_size
+        self.max_concurrency = max_concurrency
+        self.download_slots = download_slots or asyncio.Semaphore(max_concurrency)
+
+        self._owns_service_client = service_client is None
+        self.service_client = service_client or DataLakeServiceClient(
+            account_url=account_url,
+            credential=sas_token
+        )
+        self.file_system_client = self.service_client.get_file_system_client(
+            file_system=container_name
+        )
+
+        logger.info(f"Connected to Azure Storage (async): {account_url}/{container_name}")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Close the container client, and the service client if this connector created it"""
+        await self.file_system_client.close()
+        if self._owns_service_client:
+            await self.service_client.close()
+
+    async def get_file_version(self, file_path: str) -> Dict[str, Optional[str]]:
+        """
+        Get the ETag and last-modified timestamp of a file without downloading it
+
+        Args:
+            file_path: Path to file in container
+
+        Returns:
+            Dictionary with 'etag', 'last_modified' and 'size'
+        """
+        file_client = self.file_system_client.get_file_client(file_path)
+        properties = await file_client.get_file_properties()
+        last_modified = properties.last_modified
+        return {
+            'etag': properties.etag,
+            'last_modified': last_modified.isoformat() if last_modified is not None else None,
+            'size': properties.size
+        }
+
+    async def get_file_content(self, file_path: str, size: Optional[int] = None) -> bytearray:
+        """
+        Download file content from Azure Blob Storage
+
+        Large files are fetched as concurrent ranged requests into one
+        preallocated buffer. Every request waits for a download slot.
+
+        Args:
+            file_path: Path to file in container
+            size: File size in bytes (looked up if None)
+
+        Returns:
+            File content as a bytes-like buffer
+        """
+        try:
+            file_client = self.file_system_client.get_file_client(file_path)
+            if size is None:
+                size = (await file_client.get_file_properties()).size
+
+            if size <= self.download_chunk_size or self.max_concurrency <= 1:
+                async with self.download_slots:
+                    download = await file_client.download_file()
+                    content = await download.readall()
+            else:
+                content = bytearray(size)
+                view = memoryview(content)
+
+                async def download_range(offset: int, length: int):
+                    async with self.download_slots:
+                        download = await file_client.download_file(offset=offset, length=length)
+                        written = await download.readinto(_BufferWriter(view[offset:offset + length]))
+                    if written != length:
+                        raise IOError(f"Short read at offset {offset}: {written} of {length} bytes")
+
+                ranges = [
+                    (offset, min(self.download_chunk_size, size - offset))
+                    for offset in range(0, size, self.download_chunk_size)
+                ]
+                await asyncio.gather(*(download_range(offset, length) for offset, length in ranges))
+
+                logger.info(f"Downloaded {len(ranges)} ranges of {file_path} in parallel")
+
+            logger.info(f"Downloaded file: {file_path} ({len(content)} bytes)")
+            return content
+        except Exception as e:
+            logger.error(f"Error downloading {file_path}: {str(e)}")
+            raise
+
+    async def read_table_to_dataframe(
+        self,
+        file_path: str,
+        version: Optional[Dict[str, Optional[str]]] = None,
+        schema: Optional[TableSchema] = None
+    ) -> pd.DataFrame:
+        """
+        Read a CSV or Parquet table into pandas DataFrame
+
+        Same mirror and schema handling as the synchronous connector. Parsing
+        and mirror I/O run in worker threads so other downloads keep flowing
+        meanwhile.
+
+        Args:
+            file_path: Path to table file in container
+            version: Known ETag/last-modified of the file (looked up if None)
+            schema: Table schema for column projection and typing (all columns if None)
+
+        Returns:
+            pandas DataFrame
+        """
+        try:
+            if version is None:
+                version = await self.get_file_version(file_path)
+
+            schema_key = schema.signature if schema is not None else None
+            # Mirror reads and writes are blocking Parquet I/O; keep them off the event loop
+            if self.mirror is not None:
+                df = await asyncio.to_thread(
+                    self.mirror.load, file_path, version['etag'], version['last_modified'], schema_key
+                )
+                if df is not None:
+                    return df
+
+            content = await self.get_file_content(file_path, size=version.get('size'))
+            df = await asyncio.to_thread(parse_table, file_path, content, schema)
+
+            if self.mirror is not None:
+                await asyncio.to_thread(
+                    self.mirror.store, file_path, df, version['etag'], version['last_modified'], schema_key
+                )
+            return df
+        except Exception as e:
+            logger.error(f"Error reading table {file_path}: {str(e)}")
+            raise
+
+    async def list_partitions(self, table_path: str) -> List[Dict]:
+        """
+        List date-partitioned shards stored alongside a table
+
+        See ``AzureDataConnector.list_partitions`` for the shard naming.
+
+        Args:
+            table_path: Path to the single-file table
+
+        Returns:
+            List of shard dictionaries, sorted by date
+        """
+        table_dir = posixpath.dirname(table_path)
+        if not table_dir:
+            return []
+
+        try:
+            paths = [path async for path in self.file_system_client.get_paths(path=table_dir, recursive=True)]
+        except Exception as e:
+            logger.warning(f"Could not list partitions under {table_dir}: {str(e)}")
+            return []
+
+        return partitions_from_paths(paths)
+
+    async def get_transactions_for_period(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        table_path: str = "Transaction details/Transaction details.csv"
+    ) -> pd.DataFrame:
+        """
+        Get transaction data for a specific pay period
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            table_path: Path to transaction table
+
+        Returns:
+            Filtered DataFrame with transactions in date range
+        """
+        logger.info(f"Fetching transactions from {start_date.date()} to {end_date.date()}")
+
+        schema = get_schema('transactions')
+
+        # Same shard selection and period filter as DataSource, with concurrent shard reads
+        partitions = await self.list_partitions(table_path)
+        if partitions:
+            frames = await asyncio.gather(*(
+                self.read_table_to_dataframe(path, version=version, schema=schema)
+                for path, version in partition_reads(partitions, start_date, end_date)
+            ))
+            df = concat_partitions(list(frames), schema)
+        else:
+            df = await self.read_table_to_dataframe(table_path, schema=schema)
+
+        return period_rows(df, 'transactions', start_date, end_date)
+
+    async def get_service_provider_details(
+        self,
+        table_path: str = "Service provider details/Service provider details.csv"
+    ) -> pd.DataFrame:
+        """
+        Get service provider details
+
+        Args:
+            table_path: Path to service provider table
+
+        Returns:
+            DataFrame with service provider information
+        """
+        logger.info("Fetching service provider details")
+        return await self.read_table_to_dataframe(table_path, schema=get_schema('service_providers'))
+
+    async def get_discount_details(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        table_path: str = "Discount details/Discount details.csv"
+    ) -> pd.DataFrame:
+        """
+        Get discount details for a specific pay period
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            table_path: Path to discount table
+
+        Returns:
+            Filtered DataFrame with discounts in date range (empty if unavailable)
+        """
+        logger.info(f"Fetching discounts from {start_date.date()} to {end_date.date()}")
+
+        try:
+            df = await self.read_table_to_dataframe(table_path, schema=get_schema('discounts'))
+            return period_rows(df, 'discounts', start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Could not load discount details: {str(e)}")
+            return pd.DataFrame()
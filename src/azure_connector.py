@@ -4,20 +4,156 @@ Handles connection and data extraction from Azure Data Lake Storage Gen2
 """
 
 import pandas as pd
-import io
-from datetime import datetime, timedelta
+import atexit
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from azure.storage.filedatalake import DataLakeServiceClient
 from typing import Optional, List, Dict
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from data_source import DataSource
+from table_io import parse_table, partitions_from_paths
+from table_mirror import TableMirror, source_namespace
+from table_schemas import TableSchema, get_schema
+
 logger = logging.getLogger(__name__)
 
 
-class AzureDataConnector:
+class _BufferWriter:
+    """Minimal writable stream that fills a preallocated memoryview in order"""
+    
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.position = 0
+    
+    def write(self, data) -> int:
+        length = len(data)
+        self.view[self.position:self.position + length] = data
+        self.position += length
+        return length
+
+
+# Clients shared by every connector in the process. File system clients are
+# created from the pooled service client and reuse its HTTP pipeline, so
+# generators, threads and locations on one account share connections. Each
+# connector counts as a user of its container's client until it is closed;
+# a client is closed when its last user releases it, or at process exit.
+_service_clients = {}
+_file_system_clients = {}
+_client_users = {}
+_client_pool_lock = threading.Lock()
+
+
+def get_service_client(account_url: str, credential: str) -> DataLakeServiceClient:
+    """
+    Get the pooled service client for an account, creating it on first use
+    
+    Args:
+        account_url: Azure storage account URL
+        credential: SAS token for authentication
+        
+    Returns:
+        DataLakeServiceClient
+    """
+    key = (account_url, credential)
+    with _client_pool_lock:
+        client = _service_clients.get(key)
+        if client is None:
+            client = DataLakeServiceClient(account_url=account_url, credential=credential)
+            _service_clients[key] = client
+            logger.info(f"Connected to Azure Storage: {account_url}")
+        return client
+
+
+def acquire_file_system_client(account_url: str, container_name: str, credential: str):
+    """
+    Get the pooled file system client for a container and count the caller as a user
+    
+    Every call must be paired with release_file_system_client.
+    
+    Args:
+        account_url: Azure storage account URL
+        container_name: Container name
+        credential: SAS token for authentication
+        
+    Returns:
+        FileSystemClient
+    """
+    service_client = get_service_client(account_url, credential)
+    key = (account_url, container_name, credential)
+    with _client_pool_lock:
+        client = _file_system_clients.get(key)
+        if client is None:
+            client = service_client.get_file_system_client(file_system=container_name)
+            _file_system_clients[key] = client
+            logger.info(f"Opened container: {account_url}/{container_name}")
+        _client_users[key] = _client_users.get(key, 0) + 1
+        return client
+
+
+def release_file_system_client(account_url: str, container_name: str, credential: str):
+    """
+    Release a client taken with acquire_file_system_client
+    
+    The container's client is closed once it has no users, and the account's
+    service client once none of its containers has a client left.
+    
+    Args:
+        account_url: Azure storage account URL
+        container_name: Container name
+        credential: SAS token for authentication
+    """
+    key = (account_url, container_name, credential)
+    clients = []
+    with _client_pool_lock:
+        users = _client_users.get(key, 0) - 1
+        if users > 0:
+            _client_users[key] = users
+            return
+        _client_users.pop(key, None)
+        if key in _file_system_clients:
+            clients.append(_file_system_clients.pop(key))
+        if not any(other[0] == account_url and other[2] == credential for other in _file_system_clients):
+            service_client = _service_clients.pop((account_url, credential), None)
+            if service_client is not None:
+                clients.append(service_client)
+    _close_clients(clients)
+
+
+def close_client_pool():
+    """Close and forget every pooled client, whoever uses it (registered to run at process exit)"""
+    with _client_pool_lock:
+        clients = list(_file_system_clients.values()) + list(_service_clients.values())
+        _file_system_clients.clear()
+        _service_clients.clear()
+        _client_users.clear()
+    _close_clients(clients)
+
+
+def _close_clients(clients: List):
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Azure client: {str(e)}")
+
+
+atexit.register(close_client_pool)
+
+
+class AzureDataConnector(DataSource):
     """Connector for Azure Data Lake Storage Gen2"""
     
-    def __init__(self, account_url: str, container_name: str, sas_token: str):
+    def __init__(
+        self,
+        account_url: str,
+        container_name: str,
+        sas_token: str,
+        mirror_dir: Optional[str] = None,
+        download_chunk_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 8
+    ):
         """
         Initialize Azure Data Lake Storage connector
         
@@ -25,170 +161,224 @@ class AzureDataConnector:
             account_url: Azure storage account URL
             container_name: Container name
             sas_token: SAS token for authentication
+            mirror_dir: Local directory for the Parquet table mirror (disabled if None)
+            download_chunk_size: Size of each ranged request for large files (bytes)
+            max_concurrency: Number of ranged requests in flight per file
         """
+        super().__init__()
         self.account_url = account_url
         self.container_name = container_name
         self.sas_token = sas_token
+        self.mirror = None
+        if mirror_dir:
+            self.mirror = TableMirror(mirror_dir, source_namespace(account_url, container_name))
+        self.download_chunk_size = download_chunk_size
+        self.max_concurrency = max_concurrency
+        self._file_system_client = None
+        self._client_lock = threading.Lock()
+    
+    # Clients come from the process-wide pool on first use, so constructing a
+    # connector is free and runs served from local data never create one
+    
+    @property
+    def service_client(self) -> DataLakeServiceClient:
+        """Pooled service client for this account"""
+        return get_service_client(self.account_url, self.sas_token)
+    
+    @property
+    def file_system_client(self):
+        """Pooled file system client for this container, held until close()"""
+        with self._client_lock:
+            if self._file_system_client is None:
+                self._file_system_client = acquire_file_system_client(
+                    self.account_url, self.container_name, self.sas_token
+                )
+            return self._file_system_client
+    
+    def close(self):
+        """
+        Release this connector's pooled client; later reads take it again
         
-        # Create service client
-        self.service_client = DataLakeServiceClient(
-            account_url=account_url,
-            credential=sas_token
-        )
-        self.file_system_client = self.service_client.get_file_system_client(
-            file_system=container_name
-        )
-        
-        logger.info(f"Connected to Azure Storage: {account_url}/{container_name}")
+        The client is closed only if no other connector in the process uses it.
+        """
+        with self._client_lock:
+            client, self._file_system_client = self._file_system_client, None
+        if client is not None:
+            release_file_system_client(self.account_url, self.container_name, self.sas_token)
     
-    def get_file_content(self, file_path: str) -> bytes:
+    def get_file_content(self, file_path: str, size: Optional[int] = None) -> bytearray:
         """
         Download file content from Azure Blob Storage
         
+        Files larger than one chunk are fetched as concurrent ranged requests,
+        each written straight into its slice of a single preallocated buffer.
+        
         Args:
             file_path: Path to file in container
+            size: File size in bytes (looked up if None)
             
         Returns:
-            File content as bytes
+            File content as a bytes-like buffer
         """
         try:
             file_client = self.file_system_client.get_file_client(file_path)
-            download = file_client.download_file()
-            content = download.readall()
+            if size is None:
+                size = file_client.get_file_properties().size
+            
+            if size <= self.download_chunk_size or self.max_concurrency <= 1:
+                content = file_client.download_file().readall()
+            else:
+                content = bytearray(size)
+                view = memoryview(content)
+                ranges = [
+                    (offset, min(self.download_chunk_size, size - offset))
+                    for offset in range(0, size, self.download_chunk_size)
+                ]
+                
+                def download_range(byte_range):
+                    offset, length = byte_range
+                    download = file_client.download_file(offset=offset, length=length)
+                    written = download.readinto(_BufferWriter(view[offset:offset + length]))
+                    if written != length:
+                        raise IOError(f"Short read at offset {offset}: {written} of {length} bytes")
+                
+                with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(ranges))) as executor:
+                    list(executor.map(download_range, ranges))
+                
+                logger.info(f"Downloaded {len(ranges)} ranges of {file_path} in parallel")
+            
             logger.info(f"Downloaded file: {file_path} ({len(content)} bytes)")
+            self._count_bytes(len(content))
             return content
         except Exception as e:
             logger.error(f"Error downloading {file_path}: {str(e)}")
             raise
     
-    def read_csv_to_dataframe(self, file_path: str) -> pd.DataFrame:
+    def get_file_version(self, file_path: str) -> Dict[str, Optional[str]]:
         """
-        Read CSV file from Azure Blob Storage into pandas DataFrame
+        Get the ETag and last-modified timestamp of a file without downloading it
         
         Args:
-            file_path: Path to CSV file in container
+            file_path: Path to file in container
             
         Returns:
-            pandas DataFrame
+            Dictionary with 'etag', 'last_modified' and 'size'
         """
-        try:
-            content = self.get_file_content(file_path)
-            csv_content = content.decode('utf-8')
-            df = pd.read_csv(io.StringIO(csv_content))
-            logger.info(f"Loaded CSV: {file_path} ({len(df)} rows, {len(df.columns)} columns)")
-            return df
-        except Exception as e:
-            logger.error(f"Error reading CSV {file_path}: {str(e)}")
-            raise
+        file_client = self.file_system_client.get_file_client(file_path)
+        properties = file_client.get_file_properties()
+        last_modified = properties.last_modified
+        return {
+            'etag': properties.etag,
+            'last_modified': last_modified.isoformat() if last_modified is not None else None,
+            'size': properties.size
+        }
     
-    def get_transactions_for_period(
+    def read_table_to_dataframe(
         self,
-        start_date: datetime,
-        end_date: datetime,
-        table_path: str = "Transaction details/Transaction details.csv"
+        file_path: str,
+        version: Optional[Dict[str, Optional[str]]] = None,
+        schema: Optional[TableSchema] = None
     ) -> pd.DataFrame:
         """
-        Get transaction data for a specific pay period
+        Read a CSV, Parquet or Arrow table from Azure Blob Storage into pandas DataFrame
+        
+        When a table mirror is configured, the blob's ETag is checked first and
+        an unchanged table is loaded from the local Parquet copy instead. With a
+        schema, only the schema's columns are parsed and they get explicit dtypes.
         
         Args:
-            start_date: Start date of pay period
-            end_date: End date of pay period
-            table_path: Path to transaction table
+            file_path: Path to table file in container
+            version: Known ETag/last-modified of the file (looked up if None)
+            schema: Table schema for column projection and typing (all columns if None)
             
         Returns:
-            Filtered DataFrame with transactions in date range
+            pandas DataFrame
         """
-        logger.info(f"Fetching transactions from {start_date.date()} to {end_date.date()}")
-        
-        # Read transaction data
-        df = self.read_csv_to_dataframe(table_path)
-        
-        # Convert date column to datetime (adjust column name as needed)
-        # Common date column names: 'Date', 'TransactionDate', 'CreatedDate'
-        date_columns = ['Date', 'TransactionDate', 'CreatedDate', 'InvoiceDate']
-        date_col = None
-        
-        for col in date_columns:
-            if col in df.columns:
-                date_col = col
-                break
-        
-        if date_col is None:
-            logger.warning(f"No date column found in transaction data. Available columns: {df.columns.tolist()}")
+        try:
+            if version is None:
+                version = self.get_file_version(file_path)
+            
+            schema_key = schema.signature if schema is not None else None
+            if self.mirror is not None:
+                df = self.mirror.load(file_path, version['etag'], version['last_modified'], schema_key)
+                if df is not None:
+                    return df
+            
+            content = self.get_file_content(file_path, size=version.get('size'))
+            df = parse_table(file_path, content, schema)
+            
+            if self.mirror is not None:
+                self.mirror.store(file_path, df, version['etag'], version['last_modified'], schema_key)
             return df
-        
-        # Convert to datetime
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-        
-        # Filter by date range
-        mask = (df[date_col] >= start_date) & (df[date_col] <= end_date)
-        filtered_df = df[mask].copy()
-        
-        logger.info(f"Found {len(filtered_df)} transactions in period")
-        return filtered_df
+        except Exception as e:
+            logger.error(f"Error reading table {file_path}: {str(e)}")
+            raise
     
-    def get_service_provider_details(
-        self,
-        table_path: str = "Service provider details/Service provider details.csv"
-    ) -> pd.DataFrame:
+    def measure_schema_savings(self, table_name: str, file_path: str) -> Dict[str, float]:
         """
-        Get service provider details
+        Compare the in-memory size of a table read untyped versus with its schema
+        
+        Downloads and parses the table twice, bypassing the mirror; intended for
+        diagnostics rather than regular runs.
         
         Args:
-            table_path: Path to service provider table
+            table_name: Schema name (e.g. 'transactions')
+            file_path: Path to table file in container
             
         Returns:
-            DataFrame with service provider information
+            Dictionary with 'full_bytes', 'projected_bytes', 'saved_bytes' and 'saved_pct'
         """
-        logger.info("Fetching service provider details")
-        df = self.read_csv_to_dataframe(table_path)
-        return df
+        schema = get_schema(table_name)
+        mirror, self.mirror = self.mirror, None
+        try:
+            full_df = self.read_table_to_dataframe(file_path)
+            projected_df = self.read_table_to_dataframe(file_path, schema=schema)
+        finally:
+            self.mirror = mirror
+        
+        full_bytes = int(full_df.memory_usage(deep=True).sum())
+        projected_bytes = int(projected_df.memory_usage(deep=True).sum())
+        saved_bytes = full_bytes - projected_bytes
+        saved_pct = (saved_bytes / full_bytes * 100) if full_bytes else 0.0
+        
+        logger.info(f"{table_name}: {len(full_df.columns)} -> {len(projected_df.columns)} columns, "
+                   f"{full_bytes / (1024 * 1024):.1f} MB -> {projected_bytes / (1024 * 1024):.1f} MB "
+                   f"({saved_pct:.0f}% saved)")
+        
+        return {
+            'full_bytes': full_bytes,
+            'projected_bytes': projected_bytes,
+            'saved_bytes': saved_bytes,
+            'saved_pct': saved_pct
+        }
     
-    def get_discount_details(
-        self,
-        start_date: datetime,
-        end_date: datetime,
-        table_path: str = "Discount details/Discount details.csv"
-    ) -> pd.DataFrame:
+    def list_partitions(self, table_path: str) -> List[Dict]:
         """
-        Get discount details for a specific pay period
+        List date-partitioned shards stored alongside a table
+        
+        Shards are CSV, Parquet or Arrow files anywhere under the table's directory whose
+        file name is exactly a month (``2025-10.parquet``) or a day
+        (``2025-10-05.csv``). Dated cumulative snapshots such as
+        ``Transaction details-2025-10-15.csv`` do not match and are ignored.
         
         Args:
-            start_date: Start date of pay period
-            end_date: End date of pay period
-            table_path: Path to discount table
+            table_path: Path to the single-file table (e.g. "Transaction details/Transaction details.csv")
             
         Returns:
-            Filtered DataFrame with discounts in date range
+            List of shard dictionaries with 'path', 'first_date', 'last_date', 'size',
+            'etag' and 'last_modified', sorted by date
         """
-        logger.info(f"Fetching discounts from {start_date.date()} to {end_date.date()}")
+        table_dir = posixpath.dirname(table_path)
+        if not table_dir:
+            return []
         
         try:
-            df = self.read_csv_to_dataframe(table_path)
-            
-            # Find date column
-            date_columns = ['Date', 'DiscountDate', 'CreatedDate']
-            date_col = None
-            
-            for col in date_columns:
-                if col in df.columns:
-                    date_col = col
-                    break
-            
-            if date_col is None:
-                logger.warning(f"No date column found in discount data. Available columns: {df.columns.tolist()}")
-                return df
-            
-            # Convert to datetime and filter
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            mask = (df[date_col] >= start_date) & (df[date_col] <= end_date)
-            filtered_df = df[mask].copy()
-            
-            logger.info(f"Found {len(filtered_df)} discounts in period")
-            return filtered_df
+            paths = list(self.file_system_client.get_paths(path=table_dir, recursive=True))
         except Exception as e:
-            logger.warning(f"Could not load discount details: {str(e)}")
-            return pd.DataFrame()
+            logger.warning(f"Could not list partitions under {table_dir}: {str(e)}")
+            return []
+        
+        return partitions_from_paths(paths)
     
     def list_available_tables(self) -> List[str]:
         """
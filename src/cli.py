@@ -0,0 +1,72 @@
+"""
+Command-Line Interface
+Parses arguments before pandas, openpyxl or the Azure SDK are imported
+"""
+
+import argparse
+from typing import List, Optional
+import logging
+
+from startup import IMPORT_TIMINGS, configure_logging, resolve_timecard_paths, timed_import
+
+logger = logging.getLogger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser for the payroll report command"""
+    parser = argparse.ArgumentParser(description='Lumin Payroll Calculator')
+    parser.add_argument('--config', required=True, help='Path to config YAML file')
+    timecard_group = parser.add_mutually_exclusive_group(required=True)
+    timecard_group.add_argument('--timecard', help='Path to timecard Excel file')
+    timecard_group.add_argument('--timecards', help='Directory or glob of timecard Excel files (batch mode)')
+    parser.add_argument('--output', help='Path to output Excel file (output directory in batch mode)')
+    parser.add_argument('--workers', type=int, help='Worker processes in batch mode (default: CPU count)')
+    parser.add_argument('--offline', metavar='DIR',
+                        help='Read tables from a local copy of the container instead of Azure')
+    parser.add_argument('--export', metavar='PATH', action='append',
+                        help='Also write the payroll table as .csv, .parquet or .ndjson (repeatable)')
+    parser.add_argument('--metrics-json', metavar='PATH', help='Write per-stage run metrics as JSON')
+    parser.add_argument('--metrics-prom', metavar='PATH',
+                        help='Write per-stage run metrics as a Prometheus textfile')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for command-line usage"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    timecard_paths = None
+    if args.timecards:
+        timecard_paths = resolve_timecard_paths(args.timecards)
+        if not timecard_paths:
+            parser.error(f"No timecard files found for: {args.timecards}")
+
+    configure_logging()
+
+    # Heavy dependencies (pandas, openpyxl, PyYAML) load only once arguments are valid
+    payroll_report = timed_import('payroll_report')
+    logger.info(f"Loaded payroll modules in {IMPORT_TIMINGS['payroll_report']:.2f}s")
+
+    generator = payroll_report.PayrollReportGenerator(args.config, offline_dir=args.offline)
+
+    if timecard_paths:
+        # Batch mode: many pay periods from one transaction load
+        generator.generate_batch_reports(
+            timecard_paths=timecard_paths,
+            output_dir=args.output,
+            max_workers=args.workers
+        )
+        print(f"\nBatch payroll reports generated successfully for {len(timecard_paths)} timecards!")
+    else:
+        generator.generate_payroll_report(
+            timecard_path=args.timecard,
+            output_path=args.output,
+            metrics_json_path=args.metrics_json,
+            metrics_prometheus_path=args.metrics_prom,
+            export_paths=args.export
+        )
+        print("\nPayroll report generated successfully!")
+
+    timings = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in IMPORT_TIMINGS.items())
+    logger.info(f"Import time: {timings}")
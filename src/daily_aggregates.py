@@ -0,0 +1,494 @@
+"""
+Daily Aggregates
+Materialized per-provider, per-day transaction totals with cumulative sums,
+so the totals of any date range are answered without rescanning transactions
+"""
+
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+import logging
+
+from money import column_cents, dollar_columns, mark_cents
+from table_schemas import resolve_column, resolve_columns
+from timecard_processor import DAYS_PER_WEEK, pay_weeks
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout changes so an old store is rebuilt
+STORE_FORMAT_VERSION = 2
+
+KEY_COLUMNS = ['provider_id', 'day', 'after_midnight']
+
+# Amounts are kept as integer cents so cumulative sums stay exact over years of days
+AMOUNT_COLUMNS = ['sales_cents', 'tips_cents', 'discounts_cents', 'transaction_count']
+
+# Range queries return the same columns as PayrollCalculatorV2.aggregate_by_provider
+TOTAL_COLUMNS = ['total_sales', 'tips', 'total_discounts', 'transaction_count']
+
+EARLIEST_DATE = datetime(1900, 1, 1)
+
+# Each day is stored as two slots: rows stamped exactly at midnight (all rows
+# of date-only data) and the rest of the day. Slots are packed into the low
+# 32 bits of the (provider, slot) search key.
+_DAY_OFFSET = 1 << 30
+_SLOTS_PER_DAY = 2
+
+
+def _slots(days, after_midnight) -> np.ndarray:
+    """Slot numbers of days (midnight timestamps) and whether each row is later that day"""
+    day_numbers = pd.DatetimeIndex(days).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return (day_numbers + _DAY_OFFSET) * _SLOTS_PER_DAY + np.asarray(after_midnight, dtype=np.int64)
+
+
+def period_days(start_date: datetime, end_date: datetime) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Days a pay period touches, first and last inclusive
+
+    A timecard end date is midnight, so the last day is the end day: the raw
+    filter keeps its rows stamped at midnight (every row of date-only data).
+    The store must have been synced through the last day to answer the period.
+
+    Args:
+        start_date: Start of pay period
+        end_date: End of pay period
+
+    Returns:
+        Tuple of (first_day, last_day)
+    """
+    return pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+
+
+def period_slots(start_date: datetime, end_date: datetime) -> Tuple[int, int]:
+    """
+    Slots of a pay period, matching the timestamp filter of ``filter_by_period``
+
+    The raw filter keeps rows with ``start_date <= timestamp <= end_date``. A
+    midnight start includes its whole day; a midnight end includes only the
+    end day's midnight rows. An end later in the day includes the whole day,
+    which is exact for the day's last instant. A start later in the day also
+    includes its whole day (the store does not keep times of day).
+
+    Args:
+        start_date: Start of pay period
+        end_date: End of pay period
+
+    Returns:
+        Tuple of (first_slot, last_slot), inclusive
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    first_slot = _slots([start.normalize()], [False])[0]
+    last_slot = _slots([end.normalize()], [end != end.normalize()])[0]
+    return int(first_slot), int(last_slot)
+
+
+def aggregate_transactions_by_day(transactions_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sum a transactions frame per ServiceProviderID and day
+
+    Sales are the sum of the payment columns, as in PayrollCalculatorV2.
+
+    Args:
+        transactions_df: Transactions read with the transactions schema
+
+    Returns:
+        DataFrame with 'provider_id', 'day', 'after_midnight' (rows later than
+        the day's midnight) and the AMOUNT_COLUMNS
+
+    Raises:
+        ValueError: If the frame has no date or ServiceProviderID column
+    """
+    columns = transactions_df.columns
+    date_col = resolve_column(columns, 'transactions', 'date')
+    provider_col = resolve_column(columns, 'transactions', 'provider_id')
+    if date_col is None or provider_col is None:
+        raise ValueError(f"Transactions need a date and a ServiceProviderID column. Available columns: {list(columns)}")
+
+    def cents(column: Optional[str]) -> np.ndarray:
+        if column is None:
+            return np.zeros(len(transactions_df), dtype=np.int64)
+        return column_cents(transactions_df[column])
+
+    sales = np.zeros(len(transactions_df), dtype=np.int64)
+    for column in resolve_columns(columns, 'transactions', 'payments'):
+        sales += cents(column)
+
+    times = pd.to_datetime(transactions_df[date_col], errors='coerce')
+    days = times.dt.normalize()
+    providers = transactions_df[provider_col]
+    frame = pd.DataFrame({
+        'provider_id': providers.astype(object).where(providers.notna(), None),
+        'day': days.to_numpy(),
+        'after_midnight': (times != days).to_numpy(),
+        'sales_cents': sales,
+        'tips_cents': cents(resolve_column(columns, 'transactions', 'tip')),
+        'discounts_cents': cents(resolve_column(columns, 'transactions', 'discount')),
+        'transaction_count': np.ones(len(transactions_df), dtype=np.int64)
+    })
+    frame = frame[frame['provider_id'].notna() & frame['day'].notna()]
+    frame['provider_id'] = frame['provider_id'].astype(str)
+
+    return frame.groupby(['provider_id', 'day', 'after_midnight'], sort=False, as_index=False)[AMOUNT_COLUMNS].sum()
+
+
+class DailyAggregateStore:
+    """Per-provider daily totals on disk, with cumulative sums for O(1) range totals"""
+
+    def __init__(self, store_dir: str):
+        """
+        Initialize daily aggregate store (loads the stored days, if any)
+
+        Args:
+            store_dir: Directory that holds the aggregates Parquet file and its metadata
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.store_dir / 'daily_aggregates.parquet'
+        self.meta_path = self.store_dir / 'daily_aggregates.json'
+
+        # Last day the transactions table was read through
+        self.synced_through = None
+        self.daily = pd.DataFrame(columns=KEY_COLUMNS + AMOUNT_COLUMNS)
+        self._load()
+
+        logger.info(f"Daily aggregates: {len(self.daily)} provider-days in {self.store_dir}")
+
+    def _load(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta.get('version') != STORE_FORMAT_VERSION:
+                logger.info("Daily aggregate store format changed; rebuilding")
+                self._build_index()
+                return
+            self.daily = pd.read_parquet(self.data_path, columns=KEY_COLUMNS + AMOUNT_COLUMNS)
+            if meta.get('synced_through'):
+                self.synced_through = pd.Timestamp(meta['synced_through'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable daily aggregate store {self.store_dir}: {str(e)}")
+        self._build_index()
+
+    def _save(self):
+        stored = self.daily.copy()
+        for column, cumulative in zip(AMOUNT_COLUMNS, self._cumulative.T[:, 1:]):
+            stored[f"cum_{column}"] = cumulative
+        tmp_path = self.data_path.with_name(self.data_path.name + '.tmp')
+        stored.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.data_path)
+
+        meta = {
+            'version': STORE_FORMAT_VERSION,
+            'synced_through': self.synced_through.isoformat() if self.synced_through is not None else None,
+            'updated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        tmp_path = self.meta_path.with_name(self.meta_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def _build_index(self):
+        """Sort by (provider, day, slot), pack search keys and take the running totals"""
+        self.daily = self.daily.sort_values(KEY_COLUMNS, ignore_index=True)
+        self.daily['day'] = pd.to_datetime(self.daily['day'])
+        self.daily['after_midnight'] = self.daily['after_midnight'].astype(bool)
+        for column in AMOUNT_COLUMNS:
+            self.daily[column] = self.daily[column].astype(np.int64)
+
+        self._providers = np.asarray(pd.unique(self.daily['provider_id']), dtype=object)
+        codes = np.searchsorted(self._providers, self.daily['provider_id'].to_numpy(dtype=object))
+        self._keys = self._pack(codes, _slots(self.daily['day'], self.daily['after_midnight']))
+
+        # Row 0 is zero so a range total is cumulative[hi] - cumulative[lo]
+        self._cumulative = np.zeros((len(self.daily) + 1, len(AMOUNT_COLUMNS)), dtype=np.int64)
+        if len(self.daily) > 0:
+            np.cumsum(self.daily[AMOUNT_COLUMNS].to_numpy(dtype=np.int64), axis=0, out=self._cumulative[1:])
+
+    @staticmethod
+    def _pack(codes: np.ndarray, slots) -> np.ndarray:
+        return (np.asarray(codes, dtype=np.int64) << 32) + np.asarray(slots, dtype=np.int64)
+
+    @property
+    def last_day(self) -> Optional[pd.Timestamp]:
+        """Latest day with any transaction in the store"""
+        return self.daily['day'].max() if len(self.daily) > 0 else None
+
+    def covers(self, last_day: datetime) -> bool:
+        """Whether the transactions table has been read through this day"""
+        return self.synced_through is not None and pd.Timestamp(last_day) <= self.synced_through
+
+    def update(self, transactions_df: pd.DataFrame, first_day: datetime, last_day: datetime):
+        """
+        Replace the stored days in [first_day, last_day] with totals from a transactions frame
+
+        Every day in the range is replaced, so a day whose transactions were
+        edited or removed at the source is corrected too.
+
+        Args:
+            transactions_df: All transactions of the days in the range
+            first_day: First day to replace
+            last_day: Last day to replace (inclusive)
+        """
+        first_day = pd.Timestamp(first_day).normalize()
+        last_day = pd.Timestamp(last_day).normalize()
+
+        fresh = aggregate_transactions_by_day(transactions_df) if len(transactions_df) > 0 else None
+        kept = self.daily[(self.daily['day'] < first_day) | (self.daily['day'] > last_day)]
+        if fresh is not None:
+            fresh = fresh[(fresh['day'] >= first_day) & (fresh['day'] <= last_day)]
+            kept = pd.concat([kept, fresh], ignore_index=True) if len(kept) > 0 else fresh
+
+        self.daily = kept
+        self._build_index()
+        self._save()
+
+        logger.info(f"Daily aggregates updated for {first_day.date()} to {last_day.date()}: "
+                   f"{len(fresh) if fresh is not None else 0} provider-days")
+
+    def sync(
+        self,
+        data_source,
+        through: datetime,
+        table_path: str = "Transaction details/Transaction details.csv",
+        lookback_days: int = 14
+    ) -> pd.DataFrame:
+        """
+        Bring the store up to date through a day, reading only the days it lacks
+
+        Days newer than ``synced_through`` are added, and the last
+        ``lookback_days`` before it are re-read so late transactions are
+        picked up. Older days are treated as settled and never re-read.
+
+        Args:
+            data_source: DataSource the transactions table is read from
+            through: Last day to cover
+            table_path: Path to transaction table
+            lookback_days: Already synced days to re-read for late transactions
+
+        Returns:
+            Transactions that were read (empty if the store already covered the range)
+        """
+        through = pd.Timestamp(through).normalize()
+        first_day = EARLIEST_DATE
+        if self.synced_through is not None:
+            first_day = self.synced_through - pd.Timedelta(days=lookback_days)
+            if first_day > through:
+                logger.info(f"Daily aggregates already settled through {through.date()}")
+                return pd.DataFrame()
+
+        transactions_df = data_source.get_transactions_for_period(
+            first_day, through + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1), table_path
+        )
+        self.synced_through = max(through, self.synced_through) if self.synced_through is not None else through
+        self.update(transactions_df, first_day, through)
+        return transactions_df
+
+    def range_totals(
+        self,
+        first_day: datetime,
+        last_day: datetime,
+        provider_ids: Optional[Iterable] = None
+    ) -> pd.DataFrame:
+        """
+        Totals per provider over a range of days, from two cumulative-sum lookups
+
+        Args:
+            first_day: First day of the range
+            last_day: Last day of the range (inclusive)
+            provider_ids: Providers to report (every provider with transactions in the range if None)
+
+        Returns:
+            DataFrame indexed by ServiceProviderID with 'total_sales', 'tips',
+            'total_discounts' (int64 cents, marked as cents) and 'transaction_count'
+        """
+        first_slot = _slots([pd.Timestamp(first_day).normalize()], [False])[0]
+        last_slot = _slots([pd.Timestamp(last_day).normalize()], [True])[0]
+        return self._slot_range_totals(first_slot, last_slot, provider_ids)
+
+    def _slot_range_totals(
+        self,
+        first_slot: int,
+        last_slot: int,
+        provider_ids: Optional[Iterable] = None
+    ) -> pd.DataFrame:
+        """Totals per provider over an inclusive range of slots (see range_totals)"""
+        providers = self._provider_array(provider_ids)
+        sums = self._range_sums(providers, np.full(len(providers), first_slot), np.full(len(providers), last_slot))
+
+        totals = self._totals_frame(sums, pd.Index(providers, name='ServiceProviderID'))
+        if provider_ids is None:
+            totals = totals[totals['transaction_count'] > 0]
+        return totals
+
+    def weekly_totals(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        provider_ids: Optional[Iterable] = None
+    ) -> pd.DataFrame:
+        """
+        Totals per provider and week of a pay period, from one batch of cumulative-sum lookups
+
+        Weeks are counted from the start date as in
+        ``PayrollCalculatorV2.aggregate_by_provider_week``; the days of each
+        week are limited to the period's slots (see ``period_slots``).
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            provider_ids: Providers to report (all if None)
+
+        Returns:
+            DataFrame as returned by ``range_totals``, indexed by
+            (ServiceProviderID, week) with week 0 for the first week
+        """
+        providers = self._provider_array(provider_ids)
+        first_slot, last_slot = period_slots(start_date, end_date)
+        weeks = pay_weeks(start_date, end_date)
+        week_starts = pd.Timestamp(start_date).normalize() + pd.to_timedelta(
+            np.arange(weeks + 1) * DAYS_PER_WEEK, unit='D'
+        )
+        boundaries = _slots(week_starts, np.zeros(weeks + 1, dtype=bool))
+        week_firsts = np.maximum(boundaries[:-1], first_slot)
+        week_lasts = np.minimum(boundaries[1:] - 1, last_slot)
+
+        sums = self._range_sums(
+            np.repeat(providers, weeks), np.tile(week_firsts, len(providers)), np.tile(week_lasts, len(providers))
+        )
+
+        index = pd.MultiIndex.from_arrays(
+            [np.repeat(providers, weeks), np.tile(np.arange(weeks), len(providers))],
+            names=['ServiceProviderID', 'week']
+        )
+        totals = self._totals_frame(sums, index)
+        if provider_ids is None:
+            totals = totals[totals['transaction_count'] > 0]
+        return totals
+
+    def _provider_array(self, provider_ids: Optional[Iterable]) -> np.ndarray:
+        if provider_ids is None:
+            return self._providers
+        return np.asarray([str(p) for p in provider_ids], dtype=object)
+
+    def _range_sums(self, providers: np.ndarray, first_slots, last_slots) -> np.ndarray:
+        """Summed AMOUNT_COLUMNS for each (provider, first slot, last slot), zero for empty ranges"""
+        codes = np.searchsorted(self._providers, providers)
+        known = codes < len(self._providers)
+        known[known] = self._providers[codes[known]] == providers[known]
+
+        lo = np.searchsorted(self._keys, self._pack(codes, first_slots), side='left')
+        hi = np.searchsorted(self._keys, self._pack(codes, last_slots), side='right')
+        sums = self._cumulative[np.maximum(hi, lo)] - self._cumulative[lo]
+        sums[~known] = 0
+        return sums
+
+    @staticmethod
+    def _totals_frame(sums: np.ndarray, index: pd.Index) -> pd.DataFrame:
+        totals = pd.DataFrame({
+            'total_sales': sums[:, 0],
+            'tips': sums[:, 1],
+            'total_discounts': sums[:, 2],
+            'transaction_count': sums[:, 3]
+        }, index=index)[TOTAL_COLUMNS]
+        return mark_cents(totals, ['total_sales', 'tips', 'total_discounts'])
+
+    def period_totals(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        provider_ids: Optional[Iterable] = None
+    ) -> pd.DataFrame:
+        """
+        Totals per provider for a pay period, matching ``filter_by_period`` (see ``period_slots``)
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            provider_ids: Providers to report (all if None)
+
+        Returns:
+            DataFrame as returned by ``range_totals``
+        """
+        return self._slot_range_totals(*period_slots(start_date, end_date), provider_ids)
+
+    def ytd_totals(self, as_of: datetime, provider_ids: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+        Year-to-date totals per provider
+
+        Args:
+            as_of: Last day to include; the year starts on January 1 of its year
+            provider_ids: Providers to report (all if None)
+
+        Returns:
+            DataFrame as returned by ``range_totals``
+        """
+        as_of = pd.Timestamp(as_of)
+        return self.range_totals(pd.Timestamp(year=as_of.year, month=1, day=1), as_of, provider_ids)
+
+
+def main():
+    """Main entry point for command-line usage"""
+    parser = argparse.ArgumentParser(description='Daily aggregate store: update and query provider totals')
+    parser.add_argument('--config', required=True, help='Path to config YAML file (cache.aggregates_dir)')
+    parser.add_argument('--offline', metavar='DIR', help='Read tables from a local copy of the container')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help='Read new days from the transactions table')
+    update_parser.add_argument('--through', help='Last day to cover (default: today)')
+
+    range_parser = subparsers.add_parser('range', help='Totals per provider for a date range')
+    range_parser.add_argument('--start', required=True, help='First day (YYYY-MM-DD)')
+    range_parser.add_argument('--end', required=True, help='Last day, inclusive (YYYY-MM-DD)')
+
+    ytd_parser = subparsers.add_parser('ytd', help='Year-to-date totals per provider')
+    ytd_parser.add_argument('--as-of', help='Last day to include (default: today)')
+
+    for query_parser in (range_parser, ytd_parser):
+        query_parser.add_argument('--employee', action='append',
+                                  help='Limit to an employee by name (repeatable; linked as in calculator v2)')
+
+    args = parser.parse_args()
+
+    from startup import configure_logging
+    configure_logging()
+
+    from payroll_report import PayrollReportGenerator
+    generator = PayrollReportGenerator(args.config, offline_dir=args.offline)
+    store = generator.aggregate_store
+    if store is None:
+        parser.error("Set cache.aggregates_dir in the config to use the daily aggregate store")
+
+    if args.command == 'update':
+        through = pd.Timestamp(args.through) if args.through else pd.Timestamp(datetime.now().date())
+        generator.sync_daily_aggregates(through)
+        print(f"Daily aggregates synced through {store.synced_through.date()}")
+        return
+
+    names = {}
+    if args.employee:
+        names = generator.link_service_providers(args.employee)
+        for name in args.employee:
+            if name not in names:
+                logger.warning(f"No service provider linked for {name}")
+
+    provider_ids = list(names.values()) if args.employee else None
+    if args.command == 'range':
+        totals = store.range_totals(pd.Timestamp(args.start), pd.Timestamp(args.end), provider_ids)
+    else:
+        as_of = pd.Timestamp(args.as_of) if args.as_of else pd.Timestamp(datetime.now().date())
+        totals = store.ytd_totals(as_of, provider_ids)
+
+    if names:
+        ids_to_names = {str(sp_id): name for name, sp_id in names.items()}
+        totals.insert(0, 'employee_name', [ids_to_names.get(sp_id, '') for sp_id in totals.index])
+    print(dollar_columns(totals).to_string())
+
+
+if __name__ == '__main__':
+    main()
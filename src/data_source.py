@@ -0,0 +1,235 @@
+"""
+Data Source
+Common interface for the backends the payroll tables are read from
+"""
+
+import pandas as pd
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+import logging
+
+from table_io import concat_partitions, partition_reads, period_rows
+from table_schemas import TableSchema, get_schema
+
+logger = logging.getLogger(__name__)
+
+
+class DataSource(ABC):
+    """
+    Base class for table backends (Azure, local directory)
+
+    Subclasses implement the I/O primitives ``read_table_to_dataframe``,
+    ``get_file_version``, ``list_partitions`` and ``list_available_tables``. Pay period filtering,
+    schemas and partition pruning are shared here.
+    """
+
+    def __init__(self):
+        self.bytes_downloaded = 0
+        self._bytes_lock = threading.Lock()
+        self._thread_bytes = threading.local()
+
+    def _count_bytes(self, num_bytes: int):
+        """Record bytes read from the backend, in total and for the calling thread"""
+        with self._bytes_lock:
+            self.bytes_downloaded += num_bytes
+        self._thread_bytes.count = getattr(self._thread_bytes, 'count', 0) + num_bytes
+
+    def bytes_downloaded_in_thread(self) -> int:
+        """
+        Bytes read from the backend by the calling thread so far
+
+        Tables are fetched concurrently, so per-table byte counts are taken
+        as the difference of this counter around each fetch.
+
+        Returns:
+            Byte count
+        """
+        return getattr(self._thread_bytes, 'count', 0)
+
+    def close(self):
+        """Release network clients and connections held by the backend (none by default)"""
+
+    @abstractmethod
+    def read_table_to_dataframe(
+        self,
+        file_path: str,
+        version: Optional[Dict[str, Optional[str]]] = None,
+        schema: Optional[TableSchema] = None
+    ) -> pd.DataFrame:
+        """
+        Read one table file into pandas DataFrame
+
+        Args:
+            file_path: Path to table file within the source
+            version: Known ETag/last-modified/size of the file, if the backend uses it
+            schema: Table schema for column projection and typing (all columns if None)
+
+        Returns:
+            pandas DataFrame
+        """
+
+    @abstractmethod
+    def get_file_version(self, file_path: str) -> Dict[str, Optional[str]]:
+        """
+        Get the version of a file without reading it
+
+        Args:
+            file_path: Path to file within the source
+
+        Returns:
+            Dictionary with 'etag' (None where the backend has none),
+            'last_modified' and 'size'
+        """
+
+    def table_version(self, table_path: str) -> List[Tuple]:
+        """
+        Version of a table: its shards' versions if partitioned, else the file's
+
+        Compares equal between two calls exactly when no file of the table
+        was added, removed or changed in between.
+
+        Args:
+            table_path: Path to the single-file table
+
+        Returns:
+            List of (path, etag, last_modified, size) tuples
+        """
+        partitions = self.list_partitions(table_path)
+        if partitions:
+            return [
+                (p['path'], p['etag'], str(p['last_modified']), p['size'])
+                for p in partitions
+            ]
+        version = self.get_file_version(table_path)
+        return [(table_path, version['etag'], str(version['last_modified']), version['size'])]
+
+    @abstractmethod
+    def list_partitions(self, table_path: str) -> List[Dict]:
+        """
+        List date-partitioned shards stored alongside a table
+
+        Shards are files anywhere under the table's directory whose file name
+        is exactly a month (``2025-10.parquet``) or a day (``2025-10-05.csv``).
+
+        Args:
+            table_path: Path to the single-file table
+
+        Returns:
+            List of shard dictionaries with 'path', 'first_date', 'last_date', 'size',
+            'etag' and 'last_modified', sorted by date
+        """
+
+    @abstractmethod
+    def list_available_tables(self) -> List[str]:
+        """
+        List all available tables (directories) in the source
+
+        Returns:
+            List of table names
+        """
+
+    def read_csv_to_dataframe(self, file_path: str, schema: Optional[TableSchema] = None) -> pd.DataFrame:
+        """
+        Read CSV file into pandas DataFrame
+
+        Args:
+            file_path: Path to CSV file within the source
+            schema: Table schema for column projection and typing (all columns if None)
+
+        Returns:
+            pandas DataFrame
+        """
+        return self.read_table_to_dataframe(file_path, schema=schema)
+
+    def _read_partitions_for_period(
+        self,
+        partitions: List[Dict],
+        start_date: datetime,
+        end_date: datetime,
+        schema: Optional[TableSchema] = None
+    ) -> pd.DataFrame:
+        """Read and concatenate only the shards that overlap the period"""
+        frames = [
+            self.read_table_to_dataframe(path, version=version, schema=schema)
+            for path, version in partition_reads(partitions, start_date, end_date)
+        ]
+        return concat_partitions(frames, schema)
+
+    def get_transactions_for_period(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        table_path: str = "Transaction details/Transaction details.csv"
+    ) -> pd.DataFrame:
+        """
+        Get transaction data for a specific pay period
+
+        If the table's directory contains date-partitioned shards (see
+        ``list_partitions``), only the shards overlapping the period are
+        read. Otherwise the single cumulative file is read.
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            table_path: Path to transaction table
+
+        Returns:
+            Filtered DataFrame with transactions in date range
+        """
+        logger.info(f"Fetching transactions from {start_date.date()} to {end_date.date()}")
+
+        schema = get_schema('transactions')
+
+        # Read transaction data, preferring partitioned shards when present
+        partitions = self.list_partitions(table_path)
+        if partitions:
+            df = self._read_partitions_for_period(partitions, start_date, end_date, schema)
+        else:
+            df = self.read_csv_to_dataframe(table_path, schema=schema)
+
+        return period_rows(df, 'transactions', start_date, end_date)
+
+    def get_service_provider_details(
+        self,
+        table_path: str = "Service provider details/Service provider details.csv"
+    ) -> pd.DataFrame:
+        """
+        Get service provider details
+
+        Args:
+            table_path: Path to service provider table
+
+        Returns:
+            DataFrame with service provider information
+        """
+        logger.info("Fetching service provider details")
+        df = self.read_csv_to_dataframe(table_path, schema=get_schema('service_providers'))
+        return df
+
+    def get_discount_details(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        table_path: str = "Discount details/Discount details.csv"
+    ) -> pd.DataFrame:
+        """
+        Get discount details for a specific pay period
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            table_path: Path to discount table
+
+        Returns:
+            Filtered DataFrame with discounts in date range (empty if unavailable)
+        """
+        logger.info(f"Fetching discounts from {start_date.date()} to {end_date.date()}")
+
+        try:
+            df = self.read_csv_to_dataframe(table_path, schema=get_schema('discounts'))
+            return period_rows(df, 'discounts', start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Could not load discount details: {str(e)}")
+            return pd.DataFrame()
@@ -0,0 +1,132 @@
+"""
+Incremental Payroll
+Per-period store of employee results keyed by a fingerprint of each employee's inputs
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when a calculator changes how results are derived from the same inputs,
+# so results stored by the old code are recomputed
+FINGERPRINT_VERSION = 3
+
+
+def row_hashes(df: Optional[pd.DataFrame]) -> np.ndarray:
+    """
+    Hash every row of a frame once, so employees can fingerprint their rows by position
+
+    Args:
+        df: Transaction or discount data (may be None or empty)
+
+    Returns:
+        Array of uint64 row hashes, in row order
+    """
+    if df is None or len(df) == 0:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def employee_fingerprint(inputs: Dict, row_hash_groups: Iterable[Optional[np.ndarray]]) -> str:
+    """
+    Fingerprint everything one employee's pay is calculated from
+
+    Args:
+        inputs: JSON-serializable scalar inputs (hours, config entry, rates,
+            column names, linked provider ID)
+        row_hash_groups: Hashes of the employee's rows in each input frame, in
+            calculation order; None for a frame the employee has no rows in
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {'version': FINGERPRINT_VERSION, **inputs}, sort_keys=True, default=str
+    ).encode('utf-8'))
+    for hashes in row_hash_groups:
+        if hashes is None:
+            digest.update(b'|none')
+            continue
+        digest.update(f"|{len(hashes)}:".encode('ascii'))
+        digest.update(np.ascontiguousarray(hashes, dtype=np.uint64).tobytes())
+    return digest.hexdigest()
+
+
+class IncrementalResultStore:
+    """Last calculated result and input fingerprint of every employee, per pay period"""
+
+    def __init__(self, store_dir: str):
+        """
+        Initialize result store
+
+        Entries are pickled, so the store directory must only be writable by
+        trusted users.
+
+        Args:
+            store_dir: Directory that holds one file per pay period
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"Incremental payroll enabled: {self.store_dir}")
+
+    def _period_path(self, start_date: datetime, end_date: datetime, calculator: str) -> Path:
+        return self.store_dir / f"results_{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}_{calculator}.pkl"
+
+    def load(self, start_date: datetime, end_date: datetime, calculator: str) -> Dict[str, Dict]:
+        """
+        Load the stored results of a pay period
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            calculator: Calculator version ('v1' or 'v2')
+
+        Returns:
+            Dictionary of employee name -> {'fingerprint', 'result'} (empty if none stored)
+        """
+        path = self._period_path(start_date, end_date, calculator)
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable incremental results {path}: {str(e)}")
+            return {}
+
+    def save(self, start_date: datetime, end_date: datetime, calculator: str, entries: Dict[str, Dict]):
+        """
+        Replace the stored results of a pay period
+
+        Args:
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            calculator: Calculator version ('v1' or 'v2')
+            entries: Dictionary of employee name -> {'fingerprint', 'result'}
+        """
+        path = self._period_path(start_date, end_date, calculator)
+        tmp_path = None
+        try:
+            # A unique temporary file per writer: sessions, the service and
+            # multi-location runs may save the same period from several threads
+            with tempfile.NamedTemporaryFile('wb', dir=self.store_dir, prefix=f"{path.name}.",
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = Path(f.name)
+                pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not store incremental results {path}: {str(e)}")
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
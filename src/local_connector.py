@@ -0,0 +1,154 @@
+"""
+Local Data Connector
+Memory-mapped local filesystem backend: reads the payroll tables from a local
+directory instead of Azure (offline mode, testing and benchmarking)
+"""
+
+import pandas as pd
+import pyarrow as pa
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional, List, Dict
+import logging
+
+from data_source import DataSource
+from table_io import ARROW_EXTENSIONS, TABLE_EXTENSIONS, parse_table, partitions_from_paths
+from table_schemas import TableSchema
+
+logger = logging.getLogger(__name__)
+
+
+class LocalDataConnector(DataSource):
+    """Data source over a local directory, reading table files through memory maps"""
+
+    def __init__(self, data_dir: str):
+        """
+        Initialize local data connector
+
+        Args:
+            data_dir: Directory laid out like the container (e.g. a downloaded
+                export, with "Transaction details/Transaction details.csv" inside),
+                or a table mirror directory
+        """
+        super().__init__()
+        self.data_dir = Path(data_dir)
+        if not self.data_dir.is_dir():
+            raise FileNotFoundError(f"Offline data directory not found: {data_dir}")
+
+        logger.info(f"Reading tables from local directory: {self.data_dir}")
+
+    def _resolve_path(self, file_path: str) -> Path:
+        """Local file for a table path, accepting the same table in another format"""
+        path = self.data_dir / file_path
+        if path.is_file():
+            return path
+
+        # A table mirror keeps "Transaction details.csv" as "Transaction details.csv.parquet"
+        mirrored = path.with_name(path.name + '.parquet')
+        if mirrored.is_file():
+            return mirrored
+
+        for extension in TABLE_EXTENSIONS:
+            candidate = path.with_suffix(extension)
+            if candidate.is_file():
+                return candidate
+
+        raise FileNotFoundError(f"Table not found in {self.data_dir}: {file_path}")
+
+    def get_file_version(self, file_path: str) -> Dict[str, Optional[str]]:
+        """
+        Get the modification time and size of a table file
+
+        Args:
+            file_path: Path to table file, relative to the data directory
+
+        Returns:
+            Dictionary with 'etag' (always None), 'last_modified' and 'size'
+        """
+        stat = self._resolve_path(file_path).stat()
+        return {
+            'etag': None,
+            'last_modified': datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            'size': stat.st_size
+        }
+
+    def read_table_to_dataframe(
+        self,
+        file_path: str,
+        version: Optional[Dict[str, Optional[str]]] = None,
+        schema: Optional[TableSchema] = None
+    ) -> pd.DataFrame:
+        """
+        Read a CSV, Parquet or Arrow table from the data directory
+
+        The file is memory-mapped and parsed straight from the mapping, so
+        large exports are never copied into a read buffer first. CSV and
+        Parquet are decoded into new memory and the mapping is closed after
+        parsing. Arrow IPC files need no parsing at all: the frame's columns
+        can be views into the mapping, which then stays mapped until the
+        frame (and every frame sharing its buffers) is released.
+
+        Args:
+            file_path: Path to table file, relative to the data directory
+            version: Unused; local files are always read as they are
+            schema: Table schema for column projection and typing (all columns if None)
+
+        Returns:
+            pandas DataFrame
+        """
+        try:
+            path = self._resolve_path(file_path)
+            source = pa.memory_map(str(path), 'r')
+            logger.info(f"Memory-mapped {path} ({source.size()} bytes)")
+            self._count_bytes(source.size())
+            if path.suffix.lower() in ARROW_EXTENSIONS:
+                return parse_table(path.name, source.read_buffer(), schema)
+            with source:
+                return parse_table(path.name, source.read_buffer(), schema)
+        except Exception as e:
+            logger.error(f"Error reading table {file_path}: {str(e)}")
+            raise
+
+    def list_partitions(self, table_path: str) -> List[Dict]:
+        """
+        List date-partitioned shards stored alongside a table
+
+        See ``AzureDataConnector.list_partitions`` for the shard naming.
+
+        Args:
+            table_path: Path to the single-file table, relative to the data directory
+
+        Returns:
+            List of shard dictionaries, sorted by date
+        """
+        table_dir = os.path.dirname(table_path)
+        if not table_dir or not (self.data_dir / table_dir).is_dir():
+            return []
+
+        paths = []
+        for root, _, files in os.walk(self.data_dir / table_dir):
+            for file_name in files:
+                full_path = Path(root) / file_name
+                stat = full_path.stat()
+                paths.append(SimpleNamespace(
+                    name=full_path.relative_to(self.data_dir).as_posix(),
+                    is_directory=False,
+                    content_length=stat.st_size,
+                    etag=None,
+                    last_modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+                ))
+
+        return partitions_from_paths(paths)
+
+    def list_available_tables(self) -> List[str]:
+        """
+        List all available tables (directories) in the data directory
+
+        Returns:
+            List of table names
+        """
+        directories = [path.name for path in self.data_dir.iterdir() if path.is_dir()]
+        logger.info(f"Found {len(directories)} tables")
+        return sorted(directories)
@@ -0,0 +1,190 @@
+"""
+Money
+Integer-cents representation of money columns and the payroll rounding policy
+"""
+
+import pandas as pd
+import numpy as np
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+from typing import Iterable, List, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Money columns read through a table schema hold whole cents in this dtype,
+# which keeps missing amounts as NA instead of 0
+CENTS_DTYPE = 'Int64'
+
+# Which columns hold cents is recorded explicitly under this key of the
+# frame's (and its columns') attrs, not inferred from the dtype: a Parquet or
+# Arrow file written by another tool may hold whole dollars as nullable
+# integers. pandas carries attrs through slicing and copies, and
+# to_parquet/read_parquet keep them, so mirrored tables stay marked.
+CENTS_ATTR = 'cents_columns'
+
+# Hours are multiplied by rates in millionths of an hour
+HOUR_RESOLUTION = 1_000_000
+
+Cents = Union[int, np.ndarray]
+
+
+def to_cents(values: pd.Series) -> pd.Series:
+    """
+    Convert a dollar column to whole cents (applied once, at ingest)
+
+    Unparseable values become NA. Amounts with fractions of a cent (which
+    the source tables do not have) are rounded to the nearest cent.
+
+    Args:
+        values: Dollar amounts (numbers or numeric strings)
+
+    Returns:
+        Series of dtype CENTS_DTYPE, marked as cents
+    """
+    if is_cents(values):
+        return values
+    dollars = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    missing = np.isnan(dollars)
+    cents = np.rint(np.where(missing, 0.0, dollars) * 100).astype(np.int64)
+    cents = pd.Series(pd.arrays.IntegerArray(cents, missing), index=values.index, name=values.name)
+    cents.attrs[CENTS_ATTR] = [values.name]
+    return cents
+
+
+def mark_cents(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """
+    Record columns of a frame as holding whole cents (in place)
+
+    Args:
+        df: Frame whose integer columns hold cents
+        columns: Names of the cents columns (added to any already marked)
+
+    Returns:
+        df
+    """
+    marked = list(df.attrs.get(CENTS_ATTR, []))
+    df.attrs[CENTS_ATTR] = marked + [col for col in columns if col not in marked]
+    return df
+
+
+def cents_columns(df: pd.DataFrame) -> List[str]:
+    """Columns of a frame marked as cents (see mark_cents)"""
+    return [col for col in df.columns if is_cents(df[col])]
+
+
+def is_cents(values: pd.Series) -> bool:
+    """Whether a column holds cents: an integer column marked by mark_cents or to_cents"""
+    return values.name in values.attrs.get(CENTS_ATTR, ()) and pd.api.types.is_integer_dtype(values.dtype)
+
+
+def column_cents(values: pd.Series) -> np.ndarray:
+    """
+    Whole cents of a money column as int64, with missing amounts as 0
+
+    Accepts cents columns and, for frames not read through a schema, dollar columns.
+
+    Args:
+        values: Money column
+
+    Returns:
+        int64 array
+    """
+    if not is_cents(values):
+        values = to_cents(values)
+    return values.to_numpy(dtype=np.int64, na_value=0)
+
+
+def sum_cents(values: pd.Series) -> int:
+    """Exact sum of a money column in cents (missing amounts count as 0)"""
+    return int(column_cents(values).sum())
+
+
+def dollars_to_cents(amount: float) -> int:
+    """Whole cents of a dollar amount from config (e.g. an adding), rounded half away from zero"""
+    return round_half_away(Decimal(repr(float(amount))) * 100)
+
+
+def cents_to_dollars(cents: Cents) -> Union[float, np.ndarray]:
+    """
+    Dollars of whole cents, for results and reports
+
+    The result is the float nearest to the exact amount, so it prints and
+    compares as the exact cent value.
+    """
+    if isinstance(cents, np.ndarray):
+        return cents / 100
+    return int(cents) / 100
+
+
+def dollar_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A frame with its cents columns converted to dollars, for display
+
+    Args:
+        df: Frame possibly holding cents columns
+
+    Returns:
+        Frame with every cents column as float64 dollars (NaN where missing)
+    """
+    converted = {col: df[col].astype('float64') / 100 for col in cents_columns(df)}
+    if not converted:
+        return df
+    df = df.assign(**converted)
+    df.attrs[CENTS_ATTR] = [col for col in df.attrs[CENTS_ATTR] if col not in converted]
+    return df
+
+
+@lru_cache(maxsize=64)
+def _rate_ratio(rate: float) -> Tuple[int, int]:
+    """A rate as the exact fraction of its decimal representation (0.4 -> 2/5)"""
+    return Decimal(repr(float(rate))).as_integer_ratio()
+
+
+def round_half_away(value: Decimal) -> int:
+    """Round a Decimal to a whole number, halves away from zero"""
+    return int(value.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def _divide_round(numerator: Cents, denominator: int) -> Cents:
+    """Integer numerator / denominator rounded half away from zero, without floats"""
+    numerator = np.asarray(numerator, dtype=np.int64)
+    quotient = np.sign(numerator) * ((2 * np.abs(numerator) + denominator) // (2 * denominator))
+    return int(quotient) if quotient.ndim == 0 else quotient
+
+
+def apply_rate(cents: Cents, rate: float) -> Cents:
+    """
+    Multiply cents by a rate, rounding once to whole cents
+
+    This is the payroll rounding policy: each derived amount (commission,
+    discount deduction, hourly pay) is rounded half away from zero to the
+    cent exactly once per employee, after the employee's amounts are summed
+    exactly in cents. The rate is taken as the decimal it is written as
+    (0.4 is exactly 2/5), so the arithmetic is exact integer arithmetic.
+
+    Args:
+        cents: Whole cents (int or int64 array)
+        rate: Rate such as a commission rate or discount split ratio
+
+    Returns:
+        Whole cents (int, or int64 array for array input)
+    """
+    numerator, denominator = _rate_ratio(rate)
+    return _divide_round(np.asarray(cents, dtype=np.int64) * numerator, denominator)
+
+
+def hourly_pay_cents(hours: Union[float, np.ndarray], hourly_rate: float) -> Cents:
+    """
+    Pay for hours at an hourly rate in whole cents, rounded once as in apply_rate
+
+    Args:
+        hours: Hours worked (float or float array; resolved to millionths of an hour)
+        hourly_rate: Dollars per hour
+
+    Returns:
+        Whole cents (int, or int64 array for array input)
+    """
+    micro_hours = np.rint(np.asarray(hours, dtype='float64') * HOUR_RESOLUTION).astype(np.int64)
+    numerator, denominator = _rate_ratio(hourly_rate)
+    return _divide_round(micro_hours * (numerator * 100), denominator * HOUR_RESOLUTION)
@@ -0,0 +1,238 @@
+"""
+Multi-Location Payroll Runner
+Runs payroll for several salons concurrently, each with its own config
+"""
+
+import asyncio
+import pandas as pd
+import re
+import time
+import yaml
+from pathlib import Path
+from typing import Dict, List
+import logging
+
+from async_azure_connector import AsyncAzureDataConnector, DataLakeServiceClient
+from payroll_report import PayrollReportGenerator
+from report_writer import write_excel_report
+from startup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+class MultiLocationRunner:
+    """Generate payroll for every configured location in one run"""
+
+    def __init__(self, locations_path: str):
+        """
+        Initialize multi-location runner
+
+        Args:
+            locations_path: Path to locations YAML file listing each location's
+                name, payroll config and timecard
+        """
+        with open(locations_path, 'r') as f:
+            locations_config = yaml.safe_load(f)
+
+        self.locations = locations_config['locations']
+        self.max_concurrent_downloads = locations_config.get('max_concurrent_downloads', 16)
+
+        logger.info(f"Loaded {len(self.locations)} locations from {locations_path}")
+
+    def run(self, output_dir: str = None) -> pd.DataFrame:
+        """
+        Generate payroll reports for all locations
+
+        Each location's tables are downloaded concurrently with every other
+        location's, so the run takes about as long as the slowest location.
+        A location that fails is logged and left out of the consolidated report.
+
+        Args:
+            output_dir: Directory for per-location and consolidated reports (optional)
+
+        Returns:
+            Consolidated DataFrame with a 'location' column
+        """
+        return asyncio.run(self._run_all(output_dir))
+
+    async def _run_all(self, output_dir: str = None) -> pd.DataFrame:
+        run_start = time.perf_counter()
+
+        # One bound on in-flight downloads across all locations, and one service
+        # client (HTTP session) per storage account shared by its locations
+        download_slots = asyncio.Semaphore(self.max_concurrent_downloads)
+        service_clients = {}
+        try:
+            outcomes = await asyncio.gather(
+                *(
+                    self._run_location(location, download_slots, service_clients)
+                    for location in self.locations
+                ),
+                return_exceptions=True
+            )
+        finally:
+            for service_client in service_clients.values():
+                await service_client.close()
+
+        results = []
+        for location, outcome in zip(self.locations, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"[{location['name']}] Payroll failed: {str(outcome)}")
+                continue
+            results.append(outcome)
+
+        if not results:
+            raise RuntimeError("Payroll failed for every location")
+
+        combined_df = pd.concat(
+            [result['report_df'].assign(location=result['name']) for result in results],
+            ignore_index=True
+        )
+        combined_df = combined_df[['location'] + [col for col in combined_df.columns if col != 'location']]
+        summary_df = self._build_location_summary(results)
+
+        logger.info("\n" + "=" * 80)
+        logger.info("MULTI-LOCATION PAYROLL SUMMARY")
+        logger.info("=" * 80)
+        print("\n" + summary_df.to_string(index=False))
+        logger.info(f"Locations: {len(results)} of {len(self.locations)} succeeded")
+        logger.info(f"Total Payroll: ${combined_df['total_pay'].sum():,.2f}")
+        logger.info(f"Wall time: {time.perf_counter() - run_start:.1f}s "
+                   f"(slowest location {max(r['elapsed'] for r in results):.1f}s, "
+                   f"sum {sum(r['elapsed'] for r in results):.1f}s)")
+
+        if output_dir:
+            self._save_reports(results, combined_df, summary_df, Path(output_dir))
+
+        return combined_df
+
+    async def _run_location(
+        self,
+        location: Dict,
+        download_slots: asyncio.Semaphore,
+        service_clients: Dict
+    ) -> Dict:
+        """Load one location's timecard and tables, then calculate its payroll"""
+        name = location['name']
+        location_start = time.perf_counter()
+
+        generator = PayrollReportGenerator(location['config'])
+        azure_config = generator.config['azure']
+        tables = generator.config['azure_tables']
+
+        timecard_df, start_date, end_date, hours_by_employee = await asyncio.to_thread(
+            generator._load_timecard, location['timecard']
+        )
+        logger.info(f"[{name}] Pay period: {start_date.date()} to {end_date.date()}")
+
+        account_key = (azure_config['account_url'], azure_config['sas_token'])
+        if account_key not in service_clients:
+            service_clients[account_key] = DataLakeServiceClient(
+                account_url=azure_config['account_url'],
+                credential=azure_config['sas_token']
+            )
+
+        async with AsyncAzureDataConnector(
+            account_url=azure_config['account_url'],
+            container_name=azure_config['container_name'],
+            sas_token=azure_config['sas_token'],
+            mirror_dir=generator.config.get('cache', {}).get('mirror_dir'),
+            download_chunk_size=azure_config.get('download_chunk_size', 8 * 1024 * 1024),
+            max_concurrency=azure_config.get('max_concurrency', 8),
+            download_slots=download_slots,
+            service_client=service_clients[account_key]
+        ) as connector:
+            fetches = [
+                connector.get_transactions_for_period(start_date, end_date, tables['transactions']),
+                connector.get_discount_details(
+                    start_date, end_date, tables.get('discounts', 'Discount details/Discount details.csv')
+                )
+            ]
+            if generator.calculator_version == 'v2':
+                fetches.append(connector.get_service_provider_details(
+                    tables.get('service_providers', 'Service provider details/Service provider details.csv')
+                ))
+            fetched = await asyncio.gather(*fetches)
+
+        transactions_df, discounts_df = fetched[0], fetched[1]
+        service_providers_df = fetched[2] if len(fetched) > 2 else None
+        logger.info(f"[{name}] Transactions fetched: {len(transactions_df)}, discounts: {len(discounts_df)}")
+
+        payroll_results = await asyncio.to_thread(
+            generator._calculate_payroll,
+            hours_by_employee, transactions_df, discounts_df, service_providers_df,
+            pay_period=(start_date, end_date),
+            weekly_hours=generator._weekly_hours(timecard_df, start_date, end_date)
+        )
+        report_df = generator._build_report_frame(payroll_results, start_date, end_date)
+
+        elapsed = time.perf_counter() - location_start
+        logger.info(f"[{name}] Payroll calculated for {len(report_df)} employees in {elapsed:.1f}s")
+
+        return {
+            'name': name,
+            'generator': generator,
+            'report_df': report_df,
+            'start_date': start_date,
+            'end_date': end_date,
+            'elapsed': elapsed
+        }
+
+    def _build_location_summary(self, results: List[Dict]) -> pd.DataFrame:
+        """One summary row per location"""
+        return pd.DataFrame([
+            {
+                'Location': result['name'],
+                'Pay Period Start': result['start_date'].date(),
+                'Pay Period End': result['end_date'].date(),
+                'Total Employees': len(result['report_df']),
+                'Total Hours': result['report_df']['total_hours'].sum(),
+                'Total Payroll': result['report_df']['total_pay'].sum()
+            }
+            for result in results
+        ])
+
+    def _save_reports(
+        self,
+        results: List[Dict],
+        combined_df: pd.DataFrame,
+        summary_df: pd.DataFrame,
+        output_dir: Path
+    ):
+        """Save one report per location plus the consolidated report"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for result in results:
+            slug = re.sub(r'[^\w-]+', '_', result['name']).strip('_').lower()
+            result['generator']._save_report(
+                result['report_df'],
+                str(output_dir / f"payroll_{slug}.xlsx"),
+                result['start_date'],
+                result['end_date']
+            )
+
+        consolidated_path = output_dir / 'payroll_all_locations.xlsx'
+        logger.info(f"\nSaving consolidated report to: {consolidated_path}")
+        write_excel_report(str(consolidated_path), [('Payroll Report', combined_df), ('Summary', summary_df)])
+        logger.info(f"Consolidated report saved successfully: {consolidated_path}")
+
+
+def main():
+    """Main entry point for command-line usage"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lumin Payroll Calculator - all locations')
+    parser.add_argument('--locations', required=True, help='Path to locations YAML file')
+    parser.add_argument('--output', help='Directory for per-location and consolidated reports')
+
+    args = parser.parse_args()
+    configure_logging()
+
+    runner = MultiLocationRunner(args.locations)
+    runner.run(output_dir=args.output)
+
+    print("\nMulti-location payroll reports generated successfully!")
+
+
+if __name__ == '__main__':
+    main()
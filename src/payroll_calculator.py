@@ -3,15 +3,103 @@ Payroll Calculator
 Handles payroll calculations for different employee types
 """
 
+import numpy as np
 import pandas as pd
+import threading
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from addings_matcher import AddingsMatcher
+from money import apply_rate, cents_to_dollars, column_cents, dollars_to_cents, hourly_pay_cents, sum_cents
+from table_schemas import resolve_column, resolve_columns
+
 logger = logging.getLogger(__name__)
 
 
+class EmployeeRowIndex:
+    """Row positions of each employee's transactions, built once per frame"""
+    
+    def __init__(self, df: pd.DataFrame):
+        """
+        Initialize row index
+        
+        Args:
+            df: Transaction (or discount) data
+        """
+        self.df = df
+        self.columns = resolve_columns(df.columns, 'transactions', 'employee')
+        self._factorized = {}
+        self._positions = {}
+        self._cents = {}
+    
+    def _factorize(self, col: str) -> Tuple[np.ndarray, pd.Series]:
+        """Integer codes and distinct values of a name column (computed once)"""
+        if col not in self._factorized:
+            series = self.df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                uniques = pd.Series(series.cat.categories)
+            else:
+                codes, uniques = pd.factorize(series)
+                uniques = pd.Series(uniques)
+            self._factorized[col] = (codes, uniques)
+        return self._factorized[col]
+    
+    def positions(self, employee_name: str) -> Optional[np.ndarray]:
+        """
+        Row positions for an employee
+        
+        Name columns are tried in schema order and the first one with any
+        first-name match is used, as in the original per-call filter. Matching
+        runs over each column's distinct values rather than every row.
+        
+        Args:
+            employee_name: Employee name
+            
+        Returns:
+            Array of row positions, or None if no name column matched
+        """
+        name_parts = employee_name.split()
+        first_name = name_parts[0] if name_parts else employee_name
+        
+        if first_name not in self._positions:
+            found = None
+            for col in self.columns:
+                codes, uniques = self._factorize(col)
+                matching_codes = np.flatnonzero(
+                    uniques.str.contains(first_name, case=False, na=False).to_numpy()
+                )
+                if len(matching_codes) > 0:
+                    rows = np.flatnonzero(np.isin(codes, matching_codes))
+                    if len(rows) > 0:
+                        found = rows
+                        break
+            self._positions[first_name] = found
+        
+        return self._positions[first_name]
+    
+    def cents(self, col: str) -> np.ndarray:
+        """Whole cents of a money column as int64 (converted once)"""
+        if col not in self._cents:
+            self._cents[col] = column_cents(self.df[col])
+        return self._cents[col]
+    
+    def build(self, employee_names: List[str]) -> 'EmployeeRowIndex':
+        """
+        Precompute positions for a run's employees
+        
+        Args:
+            employee_names: Employee names
+            
+        Returns:
+            self
+        """
+        for employee_name in employee_names:
+            self.positions(employee_name)
+        return self
+
+
 class PayrollCalculator:
     """Calculate payroll for salon employees"""
     
@@ -33,6 +121,14 @@ class PayrollCalculator:
         self.senior_stylist_commission_rate = senior_stylist_commission_rate
         self.discount_split_ratio = discount_split_ratio
         
+        # Compiled addings matchers keyed by addings configuration
+        self._addings_matchers = {}
+        
+        # Employee row indexes keyed by id() of the frame they were built from;
+        # the lock lets generators and sessions on other threads share them
+        self._row_indexes = {}
+        self._row_indexes_lock = threading.Lock()
+        
         logger.info(f"PayrollCalculator initialized: hourly=${hourly_rate}, commission={senior_stylist_commission_rate*100}%")
     
     def calculate_hourly_pay(self, total_hours: float, hourly_rate: float = None) -> float:
@@ -44,10 +140,10 @@ class PayrollCalculator:
             hourly_rate: Hourly rate (uses default if not specified)
             
         Returns:
-            Total hourly pay
+            Total hourly pay, rounded to the cent
         """
         rate = hourly_rate if hourly_rate is not None else self.hourly_rate
-        return total_hours * rate
+        return cents_to_dollars(hourly_pay_cents(total_hours, rate))
     
     def calculate_commission(
         self,
@@ -64,7 +160,7 @@ class PayrollCalculator:
             commission_rate: Commission rate (uses default if not specified)
             
         Returns:
-            Tuple of (total_commission, filtered_transactions_df)
+            Tuple of (total_commission rounded to the cent, filtered_transactions_df)
         """
         rate = commission_rate if commission_rate is not None else self.senior_stylist_commission_rate
         
@@ -84,8 +180,10 @@ class PayrollCalculator:
             logger.error(f"Could not find amount column in transaction data")
             return 0.0, employee_transactions
         
-        total_sales = employee_transactions[amount_col].sum()
-        total_commission = total_sales * rate
+        # Sales are summed exactly in cents; the commission is rounded once
+        sales_cents = sum_cents(employee_transactions[amount_col])
+        total_sales = cents_to_dollars(sales_cents)
+        total_commission = cents_to_dollars(apply_rate(sales_cents, rate))
         
         logger.info(f"{employee_name}: Sales=${total_sales:.2f}, Commission={rate*100}% = ${total_commission:.2f}")
         
@@ -119,7 +217,7 @@ class PayrollCalculator:
             logger.warning(f"No tip column found in transaction data")
             return 0.0, employee_transactions
         
-        total_tips = employee_transactions[tip_col].sum()
+        total_tips = cents_to_dollars(sum_cents(employee_transactions[tip_col]))
         logger.info(f"{employee_name}: Tips=${total_tips:.2f}")
         
         return total_tips, employee_transactions
@@ -137,7 +235,7 @@ class PayrollCalculator:
             employee_name: Name of employee
             
         Returns:
-            Tuple of (total_deduction, filtered_discounts_df)
+            Tuple of (total_deduction rounded to the cent, filtered_discounts_df)
         """
         if discounts_df is None or len(discounts_df) == 0:
             return 0.0, pd.DataFrame()
@@ -155,8 +253,9 @@ class PayrollCalculator:
             logger.warning(f"No discount column found in discount data")
             return 0.0, employee_discounts
         
-        total_discount = employee_discounts[discount_col].sum()
-        deduction = total_discount * self.discount_split_ratio
+        discount_cents = sum_cents(employee_discounts[discount_col])
+        total_discount = cents_to_dollars(discount_cents)
+        deduction = cents_to_dollars(apply_rate(discount_cents, self.discount_split_ratio))
         
         logger.info(f"{employee_name}: Discounts=${total_discount:.2f}, Deduction (50%)=${deduction:.2f}")
         
@@ -182,37 +281,23 @@ class PayrollCalculator:
         if addings_config is None:
             return 0.0, []
         
-        # Filter transactions for this employee
-        employee_transactions = self._filter_employee_transactions(transactions_df, employee_name)
+        # Positions of this employee's transactions
+        positions = self._employee_positions(transactions_df, employee_name)
         
-        if len(employee_transactions) == 0:
+        if len(positions) == 0:
             return 0.0, []
         
         # Find service/product column
-        service_col = self._find_service_column(employee_transactions)
+        service_col = self._find_service_column(transactions_df)
         
         if service_col is None:
             logger.warning(f"No service column found in transaction data")
             return 0.0, []
         
-        total_addings = 0.0
-        adding_details = []
-        
-        # Calculate addings based on service/product matches
-        for service_name, adding_amount in addings_config.items():
-            matching_transactions = employee_transactions[
-                employee_transactions[service_col].str.contains(service_name, case=False, na=False)
-            ]
-            count = len(matching_transactions)
-            if count > 0:
-                subtotal = count * adding_amount
-                total_addings += subtotal
-                adding_details.append({
-                    'service': service_name,
-                    'count': count,
-                    'amount_per': adding_amount,
-                    'subtotal': subtotal
-                })
+        # Classify every service title against the whole catalog in one pass
+        total_addings, adding_details = self._get_addings_matcher(addings_config).calculate(
+            transactions_df[service_col].iloc[positions]
+        )
         
         logger.info(f"{employee_name}: Addings=${total_addings:.2f}")
         
@@ -244,30 +329,45 @@ class PayrollCalculator:
         # Calculate hourly pay
         hourly_pay = self.calculate_hourly_pay(total_hours)
         
-        # Calculate commission
-        commission, commission_transactions = self.calculate_commission(
-            transactions_df, employee_name
-        )
+        # Commission, tips and the discount deduction are summed from the
+        # employee's rows of each money column, without copying their rows
+        transaction_count = len(self._employee_positions(transactions_df, employee_name))
+        if transaction_count == 0:
+            logger.warning(f"No transactions found for {employee_name}")
         
-        # Calculate tips
-        tips, tip_transactions = self.calculate_tips(transactions_df, employee_name)
+        amount_col = self._find_amount_column(transactions_df)
+        if amount_col is None:
+            logger.error(f"Could not find amount column in transaction data")
+        sales_cents = self._employee_cents(transactions_df, employee_name, amount_col)
+        commission = cents_to_dollars(apply_rate(sales_cents, self.senior_stylist_commission_rate))
+        
+        tips = cents_to_dollars(self._employee_cents(
+            transactions_df, employee_name, self._find_tip_column(transactions_df)
+        ))
         
         # Calculate addings
         addings, adding_details = self.calculate_addings(
             transactions_df, employee_name, addings_config
         )
         
-        # Calculate discount deduction
-        discount_deduction, discount_details = self.calculate_discount_deduction(
-            discounts_df, employee_name
-        )
+        # Discount deduction
+        discount_deduction = 0.0
+        if discounts_df is not None and len(discounts_df) > 0:
+            discount_cents = self._employee_cents(
+                discounts_df, employee_name, self._find_discount_column(discounts_df)
+            )
+            discount_deduction = cents_to_dollars(apply_rate(discount_cents, self.discount_split_ratio))
         
         # Base pay is higher of commission vs hourly
         base_pay = max(commission, hourly_pay)
         pay_method = "commission" if commission > hourly_pay else "hourly"
         
-        # Total pay = base_pay + tips + addings - discount_deduction
-        total_pay = base_pay + tips + addings - discount_deduction
+        # Total pay = base_pay + tips + addings - discount_deduction, added in
+        # cents; every component is already a whole number of cents
+        total_pay = cents_to_dollars(
+            dollars_to_cents(base_pay) + dollars_to_cents(tips)
+            + dollars_to_cents(addings) - dollars_to_cents(discount_deduction)
+        )
         
         result = {
             'employee_name': employee_name,
@@ -282,9 +382,10 @@ class PayrollCalculator:
             'adding_details': adding_details,
             'discount_deduction': discount_deduction,
             'total_pay': total_pay,
-            'transaction_count': len(commission_transactions)
+            'transaction_count': transaction_count
         }
         
+        logger.info(f"{employee_name}: Sales=${cents_to_dollars(sales_cents):.2f}, Commission=${commission:.2f}")
         logger.info(f"{employee_name}: Base=${base_pay:.2f} ({pay_method}), Tips=${tips:.2f}, "
                    f"Addings=${addings:.2f}, Deduction=${discount_deduction:.2f}, Total=${total_pay:.2f}")
         
@@ -315,10 +416,12 @@ class PayrollCalculator:
         # Calculate tips if transaction data available
         tips = 0.0
         if transactions_df is not None and len(transactions_df) > 0:
-            tips, _ = self.calculate_tips(transactions_df, employee_name)
+            tips = cents_to_dollars(self._employee_cents(
+                transactions_df, employee_name, self._find_tip_column(transactions_df)
+            ))
         
-        # Total pay = hourly + tips
-        total_pay = hourly_pay + tips
+        # Total pay = hourly + tips, added in cents
+        total_pay = cents_to_dollars(dollars_to_cents(hourly_pay) + dollars_to_cents(tips))
         
         result = {
             'employee_name': employee_name,
@@ -335,56 +438,78 @@ class PayrollCalculator:
     
     # Helper methods
     
+    def _get_addings_matcher(self, addings_config: Dict[str, float]) -> AddingsMatcher:
+        """Compiled matcher for an addings configuration, cached per configuration"""
+        key = tuple(addings_config.items())
+        if key not in self._addings_matchers:
+            self._addings_matchers[key] = AddingsMatcher(addings_config)
+        return self._addings_matchers[key]
+    
+    def index_transactions(self, df: pd.DataFrame, employee_names: List[str] = None) -> EmployeeRowIndex:
+        """
+        Get (building if needed) the employee row index for a frame
+        
+        The index is kept for the lifetime of the frame object, so every
+        calculation for every employee in a run slices the same index.
+        
+        Args:
+            df: Transaction or discount data
+            employee_names: Employees to precompute (optional)
+            
+        Returns:
+            EmployeeRowIndex for df
+        """
+        with self._row_indexes_lock:
+            cached = self._row_indexes.get(id(df))
+            if cached is None or cached.df is not df:
+                # Drop indexes for frames from earlier runs
+                if len(self._row_indexes) >= 4:
+                    self._row_indexes.clear()
+                cached = EmployeeRowIndex(df)
+                self._row_indexes[id(df)] = cached
+            
+            if employee_names:
+                cached.build(employee_names)
+        return cached
+    
+    def _employee_positions(self, df: pd.DataFrame, employee_name: str) -> np.ndarray:
+        """Row positions of an employee's transactions (empty if none or no data)"""
+        if df is None or len(df) == 0:
+            return np.empty(0, dtype=np.intp)
+        positions = self.index_transactions(df).positions(employee_name)
+        if positions is None:
+            logger.warning(f"Could not find employee column. Available columns: {df.columns.tolist()}")
+            return np.empty(0, dtype=np.intp)
+        return positions
+    
+    def _employee_cents(self, df: pd.DataFrame, employee_name: str, column: Optional[str]) -> int:
+        """Exact sum in cents of one money column over an employee's rows"""
+        positions = self._employee_positions(df, employee_name)
+        if column is None or len(positions) == 0:
+            return 0
+        return int(self.index_transactions(df).cents(column)[positions].sum())
+    
     def _filter_employee_transactions(self, df: pd.DataFrame, employee_name: str) -> pd.DataFrame:
         """Filter transactions for a specific employee"""
-        # Try common employee column names
-        employee_cols = [
-            'ServiceProviderFirstName', 'ServiceProviderLastName', 'ServiceProvider',
-            'EmployeeName', 'Employee', 'Stylist', 'Provider'
-        ]
-        
-        for col in employee_cols:
-            if col in df.columns:
-                # Try matching first name or full name
-                name_parts = employee_name.split()
-                first_name = name_parts[0] if name_parts else employee_name
-                
-                mask = df[col].str.contains(first_name, case=False, na=False)
-                if mask.any():
-                    return df[mask].copy()
-        
-        logger.warning(f"Could not find employee column. Available columns: {df.columns.tolist()}")
-        return pd.DataFrame()
+        positions = self.index_transactions(df).positions(employee_name)
+        if positions is None:
+            logger.warning(f"Could not find employee column. Available columns: {df.columns.tolist()}")
+            return pd.DataFrame()
+        
+        return df.iloc[positions]
     
     def _find_amount_column(self, df: pd.DataFrame) -> str:
         """Find the transaction amount column"""
-        amount_cols = ['Amount', 'Total', 'TransactionAmount', 'TotalAmount', 'Price', 'ServiceAmount']
-        for col in amount_cols:
-            if col in df.columns:
-                return col
-        return None
+        return resolve_column(df.columns, 'transactions', 'amount')
     
     def _find_tip_column(self, df: pd.DataFrame) -> str:
         """Find the tip column"""
-        tip_cols = ['Tip', 'Tips', 'TipAmount', 'Gratuity']
-        for col in tip_cols:
-            if col in df.columns:
-                return col
-        return None
+        return resolve_column(df.columns, 'transactions', 'tip')
     
     def _find_discount_column(self, df: pd.DataFrame) -> str:
         """Find the discount amount column"""
-        discount_cols = ['DiscountAmount', 'Discount', 'DiscountValue', 'Amount']
-        for col in discount_cols:
-            if col in df.columns:
-                return col
-        return None
+        return resolve_column(df.columns, 'discounts', 'amount')
     
     def _find_service_column(self, df: pd.DataFrame) -> str:
         """Find the service/product name column"""
-        service_cols = ['ServiceTitle', 'Service', 'ServiceName', 'Product', 'ProductName', 'ItemName']
-        for col in service_cols:
-            if col in df.columns:
-                return col
-        return None
-
+        return resolve_column(df.columns, 'transactions', 'service')
@@ -4,13 +4,22 @@ Enhanced version that properly links transactions via ServiceProviderID
 """
 
 import pandas as pd
+import numpy as np
+import threading
 from datetime import datetime
 from typing import Dict, List, Tuple
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from money import apply_rate, cents_to_dollars, column_cents, hourly_pay_cents, mark_cents, sum_cents
+from provider_index import ProviderNameIndex, link_names
+from table_schemas import resolve_column, resolve_columns
+from timecard_processor import DAYS_PER_WEEK, week_numbers
+
 logger = logging.getLogger(__name__)
 
+# Money columns of the per-provider totals, in int64 cents
+AMOUNT_TOTALS = ['total_sales', 'tips', 'total_discounts']
+
 
 class PayrollCalculatorV2:
     """Calculate payroll for salon employees with proper transaction linking"""
@@ -26,40 +35,50 @@ class PayrollCalculatorV2:
         self.senior_stylist_commission_rate = senior_stylist_commission_rate
         self.discount_split_ratio = discount_split_ratio
         
+        # (provider table, index) for the most recently linked table; links
+        # themselves are returned, not kept, so calculators can be shared
+        self._provider_index = None
+        self._provider_index_lock = threading.Lock()
+        
         logger.info(f"PayrollCalculator initialized: hourly=${hourly_rate}, commission={senior_stylist_commission_rate*100}%")
     
     def link_employees_to_service_providers(
         self,
         employee_names: List[str],
-        service_providers_df: pd.DataFrame
+        service_providers_df: pd.DataFrame,
+        overrides: Dict[str, str] = None
     ) -> Dict[str, str]:
         """
         Link employee names to ServiceProviderIDs
         
+        Names are looked up in a ProviderNameIndex built once per provider
+        table. Ambiguous names are logged and left unlinked rather than taking
+        the first hit; use `overrides` (config `service_provider_id`) for them.
+        
         Args:
             employee_names: List of employee names from timecard
             service_providers_df: DataFrame with service provider details
+            overrides: Explicit employee name -> ServiceProviderID mapping
             
         Returns:
             Dictionary mapping employee name to ServiceProviderID
         """
-        name_to_id = {}
+        with self._provider_index_lock:
+            if self._provider_index is None or self._provider_index[0] is not service_providers_df:
+                self._provider_index = (service_providers_df, ProviderNameIndex(service_providers_df))
+            index = self._provider_index[1]
         
-        for emp_name in employee_names:
-            # Extract first name
-            first_name = emp_name.split()[0].lower()
-            
-            # Find matching service provider
-            for idx, row in service_providers_df.iterrows():
-                sp_first = str(row.get('ServiceProviderFirstName', '')).lower()
-                
-                if first_name in sp_first or sp_first in first_name:
-                    sp_id = row['ServiceProviderID']
-                    name_to_id[emp_name] = sp_id
-                    logger.info(f"Linked: {emp_name} -> {sp_id} ({row.get('ServiceProviderFirstName', '')} {row.get('ServiceProviderLastName', '')})")
-                    break
-        
-        return name_to_id
+        links = link_names(employee_names, index, overrides)
+        
+        for emp_name, sp_id in links['linked'].items():
+            logger.info(f"Linked: {emp_name} -> {sp_id}")
+        for emp_name, candidates in links['ambiguous'].items():
+            logger.warning(f"Ambiguous service provider for {emp_name}: {candidates} "
+                          f"(set service_provider_id in config to resolve)")
+        for emp_name in links['unmatched']:
+            logger.warning(f"No service provider found for {emp_name}")
+        
+        return links['linked']
     
     def get_employee_transactions(
         self,
@@ -79,35 +98,33 @@ class PayrollCalculatorV2:
         if len(transactions_df) == 0:
             return 0.0
         
-        # Sum all payment amounts
-        total = 0.0
-        payment_cols = ['CCAmount', 'CashAmount', 'CheckAmount', 'ACHAmount', 'VagaroPayLaterAmount', 'OtherAmount']
-        
-        for col in payment_cols:
-            if col in transactions_df.columns:
-                total += transactions_df[col].fillna(0).sum()
-        
-        return total
+        return cents_to_dollars(self._sales_cents(transactions_df))
     
     def calculate_tips_from_transactions(self, transactions_df: pd.DataFrame) -> float:
         """Calculate total tips from transactions"""
         if len(transactions_df) == 0:
             return 0.0
         
-        if 'Tip' in transactions_df.columns:
-            return transactions_df['Tip'].fillna(0).sum()
-        
-        return 0.0
+        return cents_to_dollars(self._role_cents(transactions_df, 'tip'))
     
     def calculate_discounts_from_transactions(self, transactions_df: pd.DataFrame) -> float:
         """Calculate total discounts from transactions"""
         if len(transactions_df) == 0:
             return 0.0
         
-        if 'Discount' in transactions_df.columns:
-            return transactions_df['Discount'].fillna(0).sum()
-        
-        return 0.0
+        return cents_to_dollars(self._role_cents(transactions_df, 'discount'))
+    
+    def _sales_cents(self, transactions_df: pd.DataFrame) -> int:
+        """Exact total of all payment columns in cents"""
+        return sum(
+            sum_cents(transactions_df[col])
+            for col in resolve_columns(transactions_df.columns, 'transactions', 'payments')
+        )
+    
+    def _role_cents(self, transactions_df: pd.DataFrame, role_name: str) -> int:
+        """Exact total of a money column (e.g. 'tip') in cents, 0 if the column is missing"""
+        col = resolve_column(transactions_df.columns, 'transactions', role_name)
+        return sum_cents(transactions_df[col]) if col is not None else 0
     
     def calculate_senior_stylist_pay(
         self,
@@ -125,26 +142,26 @@ class PayrollCalculatorV2:
         else:
             emp_transactions = pd.DataFrame()
         
-        # Calculate hourly pay
-        hourly_pay = total_hours * self.hourly_rate
-        
-        # Calculate commission from sales
-        total_sales = self.calculate_sales_from_transactions(emp_transactions)
-        commission = total_sales * self.senior_stylist_commission_rate
-        
-        # Calculate tips
-        tips = self.calculate_tips_from_transactions(emp_transactions)
-        
-        # Calculate discount deduction
-        total_discounts = self.calculate_discounts_from_transactions(emp_transactions)
-        discount_deduction = total_discounts * self.discount_split_ratio
+        # Amounts are summed exactly in cents; each derived amount is rounded once
+        hourly_cents = hourly_pay_cents(total_hours, self.hourly_rate)
+        sales_cents = self._sales_cents(emp_transactions)
+        commission_cents = apply_rate(sales_cents, self.senior_stylist_commission_rate)
+        tips_cents = self._role_cents(emp_transactions, 'tip')
+        discounts_cents = self._role_cents(emp_transactions, 'discount')
+        deduction_cents = apply_rate(discounts_cents, self.discount_split_ratio)
         
         # Base pay is higher of commission vs hourly
-        base_pay = max(commission, hourly_pay)
-        pay_method = "commission" if commission > hourly_pay else "hourly"
+        base_cents = max(commission_cents, hourly_cents)
+        pay_method = "commission" if commission_cents > hourly_cents else "hourly"
         
-        # Total pay
-        total_pay = base_pay + tips - discount_deduction
+        hourly_pay = cents_to_dollars(hourly_cents)
+        total_sales = cents_to_dollars(sales_cents)
+        commission = cents_to_dollars(commission_cents)
+        base_pay = cents_to_dollars(base_cents)
+        tips = cents_to_dollars(tips_cents)
+        total_discounts = cents_to_dollars(discounts_cents)
+        discount_deduction = cents_to_dollars(deduction_cents)
+        total_pay = cents_to_dollars(base_cents + tips_cents - deduction_cents)
         
         result = {
             'employee_name': employee_name,
@@ -179,16 +196,18 @@ class PayrollCalculatorV2:
         logger.info(f"Calculating pay for hourly employee: {employee_name}")
         
         # Calculate hourly pay
-        hourly_pay = total_hours * self.hourly_rate
+        hourly_cents = hourly_pay_cents(total_hours, self.hourly_rate)
+        hourly_pay = cents_to_dollars(hourly_cents)
         
         # Calculate tips if available
-        tips = 0.0
+        tips_cents = 0
         if service_provider_id and transactions_df is not None:
             emp_transactions = self.get_employee_transactions(transactions_df, service_provider_id)
-            tips = self.calculate_tips_from_transactions(emp_transactions)
+            tips_cents = self._role_cents(emp_transactions, 'tip')
+        tips = cents_to_dollars(tips_cents)
         
-        # Total pay
-        total_pay = hourly_pay + tips
+        # Total pay, added in cents
+        total_pay = cents_to_dollars(hourly_cents + tips_cents)
         
         result = {
             'employee_name': employee_name,
@@ -202,4 +221,250 @@ class PayrollCalculatorV2:
         logger.info(f"{employee_name}: Hourly=${hourly_pay:.2f}, Tips=${tips:.2f}, Total=${total_pay:.2f}")
         
         return result
-
+    
+    def aggregate_by_provider(self, transactions_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sum sales, tips, discounts and transaction counts for every provider in one pass
+        
+        Args:
+            transactions_df: Transactions for the pay period
+            
+        Returns:
+            DataFrame indexed by ServiceProviderID with columns
+            'total_sales', 'tips', 'total_discounts' (int64 cents, marked as
+            cents) and 'transaction_count'
+        """
+        columns = ['total_sales', 'tips', 'total_discounts', 'transaction_count']
+        if transactions_df is None or 'ServiceProviderID' not in transactions_df.columns:
+            if transactions_df is not None:
+                logger.warning("ServiceProviderID column not found in transactions")
+            return mark_cents(pd.DataFrame(columns=columns, dtype=np.int64), AMOUNT_TOTALS)
+        
+        grouped = self._provider_amounts(transactions_df).groupby(
+            transactions_df['ServiceProviderID'].array, observed=True, sort=False
+        )
+        totals = grouped.sum()
+        totals['transaction_count'] = grouped.size()
+        totals.index.name = 'ServiceProviderID'
+        
+        return mark_cents(totals[columns], AMOUNT_TOTALS)
+    
+    def aggregate_by_provider_week(
+        self,
+        transactions_df: pd.DataFrame,
+        start_date: datetime,
+        weeks: int
+    ) -> pd.DataFrame:
+        """
+        Sum sales, tips, discounts and transaction counts per provider and week in one pass
+        
+        Args:
+            transactions_df: Transactions for the pay period
+            start_date: Start of pay period (weeks are counted from it)
+            weeks: Number of weeks in the period (see timecard_processor.pay_weeks)
+            
+        Returns:
+            DataFrame shaped like aggregate_by_provider's result, indexed by
+            (ServiceProviderID, week) with week 0 for the first week
+        """
+        columns = ['total_sales', 'tips', 'total_discounts', 'transaction_count']
+        empty = mark_cents(pd.DataFrame(
+            columns=columns,
+            index=pd.MultiIndex.from_arrays([[], []], names=['ServiceProviderID', 'week']),
+            dtype=np.int64
+        ), AMOUNT_TOTALS)
+        if transactions_df is None or 'ServiceProviderID' not in transactions_df.columns:
+            if transactions_df is not None:
+                logger.warning("ServiceProviderID column not found in transactions")
+            return empty
+        
+        date_col = resolve_column(transactions_df.columns, 'transactions', 'date')
+        if date_col is None:
+            logger.warning("No date column found in transactions; counting every transaction in the first week")
+            week = np.zeros(len(transactions_df), dtype=np.int64)
+        else:
+            week = week_numbers(transactions_df[date_col], start_date, weeks)
+        
+        grouped = self._provider_amounts(transactions_df).groupby(
+            [transactions_df['ServiceProviderID'].array, week], observed=True, sort=False
+        )
+        totals = grouped.sum()
+        totals['transaction_count'] = grouped.size()
+        totals.index.names = ['ServiceProviderID', 'week']
+        
+        return mark_cents(totals[columns], AMOUNT_TOTALS)
+    
+    def _provider_amounts(self, transactions_df: pd.DataFrame) -> pd.DataFrame:
+        """Sales, tips and discounts of every transaction in int64 cents"""
+        payment_cols = resolve_columns(transactions_df.columns, 'transactions', 'payments')
+        tip_col = resolve_column(transactions_df.columns, 'transactions', 'tip')
+        discount_col = resolve_column(transactions_df.columns, 'transactions', 'discount')
+        
+        def cents(col):
+            if col is None:
+                return np.zeros(len(transactions_df), dtype=np.int64)
+            return column_cents(transactions_df[col])
+        
+        # Sum in int64 cents, so provider totals are exact
+        sales_cents = np.zeros(len(transactions_df), dtype=np.int64)
+        for col in payment_cols:
+            sales_cents += cents(col)
+        return pd.DataFrame({
+            'total_sales': sales_cents,
+            'tips': cents(tip_col),
+            'total_discounts': cents(discount_col)
+        })
+    
+    def calculate_all_employees(
+        self,
+        employees: List[Dict],
+        transactions_df: pd.DataFrame,
+        totals: pd.DataFrame = None,
+        weekly_hours: pd.DataFrame = None,
+        period_start: datetime = None
+    ) -> List[Dict]:
+        """
+        Calculate pay for many employees from one grouped pass over the transactions
+        
+        Produces the same result dictionaries as calculate_senior_stylist_pay and
+        calculate_hourly_employee_pay, without filtering or copying the
+        transactions once per employee.
+        
+        With weekly_hours, senior stylists get the higher of commission and
+        hourly pay week by week, as the web app does, instead of once for the
+        whole period. Every (provider, week) pair is compared in the same
+        vectorized pass, whatever the length of the period. Their results
+        then carry a 'weeks' list of weekly breakdowns, and 'pay_method' is
+        'mixed' when some weeks paid commission and others hourly.
+        
+        Args:
+            employees: List of dictionaries with 'employee_name', 'total_hours',
+                'pay_type' ('commission_vs_hourly' or 'hourly') and
+                'service_provider_id' (may be None)
+            transactions_df: Transactions for the pay period (unused if totals are given)
+            totals: Per-provider totals in cents shaped like aggregate_by_provider's
+                result (aggregate_by_provider_week's with weekly_hours), e.g. from
+                a DailyAggregateStore (computed from transactions_df if None)
+            weekly_hours: Hours per employee name and week, as returned by
+                TimecardProcessor.calculate_weekly_hours_by_employee (optional)
+            period_start: Start of pay period (required with weekly_hours)
+            
+        Returns:
+            List of pay breakdown dictionaries, in the order of `employees`,
+            each with the 'service_provider_id' it was calculated for
+        """
+        logger.info(f"Calculating pay for {len(employees)} employees in batch")
+        
+        employees_df = pd.DataFrame(employees, columns=['employee_name', 'total_hours', 'pay_type', 'service_provider_id'])
+        has_provider = employees_df['service_provider_id'].notna() & employees_df['service_provider_id'].astype(bool)
+        provider_ids = employees_df['service_provider_id'].where(has_provider)
+        columns = ['total_sales', 'tips', 'total_discounts', 'transaction_count']
+        
+        # Amounts and hours as (employee, week) matrices; without a weekly
+        # split the whole period is a single week
+        if weekly_hours is None:
+            if totals is None:
+                totals = self.aggregate_by_provider(transactions_df)
+            matched = totals.reindex(provider_ids).fillna(0)
+            amounts = {column: matched[column].to_numpy(dtype=np.int64)[:, np.newaxis] for column in columns}
+            hours = employees_df['total_hours'].to_numpy(dtype=float)[:, np.newaxis]
+        else:
+            weeks = weekly_hours.shape[1]
+            if totals is None:
+                totals = self.aggregate_by_provider_week(transactions_df, period_start, weeks)
+            amounts = {column: self._by_week(totals[column], provider_ids, weeks) for column in columns}
+            hours = weekly_hours.reindex(employees_df['employee_name']).fillna(0.0).to_numpy(dtype=float)
+        
+        # Vectorized commission vs hourly decision in int64 cents; each derived
+        # amount is rounded once per employee and week (see money.apply_rate)
+        sales_weeks = amounts['total_sales']
+        hourly_weeks = hourly_pay_cents(hours, self.hourly_rate)
+        commission_weeks = apply_rate(sales_weeks, self.senior_stylist_commission_rate)
+        base_weeks = np.maximum(commission_weeks, hourly_weeks)
+        commission_paid = commission_weeks > hourly_weeks
+        
+        sales_cents = sales_weeks.sum(axis=1)
+        commission_cents = commission_weeks.sum(axis=1)
+        senior_hourly_cents = hourly_weeks.sum(axis=1)
+        base_cents = base_weeks.sum(axis=1)
+        commission_week_count = commission_paid.sum(axis=1)
+        tips_cents = amounts['tips'].sum(axis=1)
+        discounts_cents = amounts['total_discounts'].sum(axis=1)
+        transaction_counts = amounts['transaction_count'].sum(axis=1)
+        deduction_cents = apply_rate(discounts_cents, self.discount_split_ratio)
+        senior_total_cents = base_cents + tips_cents - deduction_cents
+        
+        # Hourly employees are paid for the period's hours as a whole
+        hourly_cents = hourly_pay_cents(employees_df['total_hours'].to_numpy(dtype=float), self.hourly_rate)
+        hourly_total_cents = hourly_cents + tips_cents
+        
+        week_starts = None
+        if weekly_hours is not None:
+            week_starts = pd.Timestamp(period_start).normalize() + pd.to_timedelta(
+                np.arange(hours.shape[1]) * DAYS_PER_WEEK, unit='D'
+            )
+        
+        results = []
+        for i in range(len(employees_df)):
+            employee_name = employees_df.at[i, 'employee_name']
+            total_hours = employees_df.at[i, 'total_hours']
+            tips = cents_to_dollars(int(tips_cents[i]))
+            
+            if employees_df.at[i, 'pay_type'] == 'commission_vs_hourly':
+                if commission_week_count[i] == hours.shape[1]:
+                    pay_method = 'commission'
+                elif commission_week_count[i] == 0:
+                    pay_method = 'hourly'
+                else:
+                    pay_method = 'mixed'
+                result = {
+                    'employee_name': employee_name,
+                    'employee_type': 'senior_stylist',
+                    'total_hours': total_hours,
+                    'hourly_pay': cents_to_dollars(int(senior_hourly_cents[i])),
+                    'total_sales': cents_to_dollars(int(sales_cents[i])),
+                    'commission': cents_to_dollars(int(commission_cents[i])),
+                    'pay_method': pay_method,
+                    'base_pay': cents_to_dollars(int(base_cents[i])),
+                    'tips': tips,
+                    'total_discounts': cents_to_dollars(int(discounts_cents[i])),
+                    'discount_deduction': cents_to_dollars(int(deduction_cents[i])),
+                    'total_pay': cents_to_dollars(int(senior_total_cents[i])),
+                    'transaction_count': int(transaction_counts[i])
+                }
+                if week_starts is not None:
+                    result['weeks'] = [
+                        {
+                            'week_start': str(week_starts[week].date()),
+                            'hours': float(hours[i, week]),
+                            'hourly_pay': cents_to_dollars(int(hourly_weeks[i, week])),
+                            'total_sales': cents_to_dollars(int(sales_weeks[i, week])),
+                            'commission': cents_to_dollars(int(commission_weeks[i, week])),
+                            'base_pay': cents_to_dollars(int(base_weeks[i, week])),
+                            'pay_method': 'commission' if commission_paid[i, week] else 'hourly'
+                        }
+                        for week in range(len(week_starts))
+                    ]
+            else:
+                result = {
+                    'employee_name': employee_name,
+                    'employee_type': 'hourly',
+                    'total_hours': total_hours,
+                    'hourly_pay': cents_to_dollars(int(hourly_cents[i])),
+                    'tips': tips,
+                    'total_pay': cents_to_dollars(int(hourly_total_cents[i]))
+                }
+            
+            result['service_provider_id'] = provider_ids.iat[i] if has_provider.iat[i] else None
+            logger.info(f"{employee_name}: Base=${result.get('base_pay', result['hourly_pay']):.2f}, "
+                       f"Tips=${tips:.2f}, Total=${result['total_pay']:.2f}")
+            results.append(result)
+        
+        return results
+    
+    def _by_week(self, weekly_totals: pd.Series, provider_ids: pd.Series, weeks: int) -> np.ndarray:
+        """One (provider, week) total column as an int64 (employee, week) matrix, 0 where missing"""
+        matrix = pd.DataFrame(index=pd.Index([], name='ServiceProviderID'), columns=range(weeks))
+        if len(weekly_totals) > 0:
+            matrix = weekly_totals.unstack('week')
+        return matrix.reindex(index=provider_ids, columns=range(weeks)).fillna(0).to_numpy(dtype=np.int64)
@@ -4,29 +4,63 @@ Main module that orchestrates payroll calculation and report generation
 """
 
 import pandas as pd
+import numpy as np
 import yaml
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import logging
 
-from azure_connector import AzureDataConnector
+from daily_aggregates import DailyAggregateStore, period_days
+from data_source import DataSource
+from incremental import IncrementalResultStore, employee_fingerprint, row_hashes
 from payroll_calculator import PayrollCalculator
+from payroll_calculator_v2 import PayrollCalculatorV2
+from money import dollar_columns
+from period_session import PayPeriodSession
+from report_writer import (
+    details_as_sections, summary_frame, table_format, transaction_detail_frame, write_excel_report, write_table
+)
+from run_metrics import RunMetrics
+from table_mirror import source_namespace
+from startup import IMPORT_TIMINGS, timed_import
+from table_schemas import filter_by_period
+from timecard_cache import TimecardCache
 from timecard_processor import TimecardProcessor
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Data shared with batch worker processes. It is set in the parent right before
+# the pool forks, so workers inherit the frames copy-on-write instead of each
+# receiving a pickled copy.
+_BATCH_STATE = {}
+
+
+def _run_batch_period(period: Dict) -> pd.DataFrame:
+    """Batch worker entry point: calculate one pay period from the inherited data"""
+    return _BATCH_STATE['generator']._calculate_batch_period(
+        period,
+        _BATCH_STATE['transactions'],
+        _BATCH_STATE['discounts'],
+        _BATCH_STATE['service_providers']
+    )
+
 
 class PayrollReportGenerator:
     """Generate complete payroll reports"""
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, offline_dir: str = None):
         """
         Initialize payroll report generator
         
         Args:
             config_path: Path to configuration YAML file
+            offline_dir: Read tables from this local directory instead of Azure (optional)
         """
         logger.info(f"Initializing PayrollReportGenerator with config: {config_path}")
         
@@ -34,12 +68,10 @@ class PayrollReportGenerator:
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
-        # Initialize components
-        self.azure_connector = AzureDataConnector(
-            account_url=self.config['azure']['account_url'],
-            container_name=self.config['azure']['container_name'],
-            sas_token=self.config['azure']['sas_token']
-        )
+        # Initialize components (the data connector is created on first use)
+        self.offline_dir = offline_dir
+        self._data_connector = None
+        self._connector_lock = threading.Lock()
         
         self.payroll_calculator = PayrollCalculator(
             hourly_rate=self.config['payroll']['hourly_rate'],
@@ -47,65 +79,685 @@ class PayrollReportGenerator:
             discount_split_ratio=self.config['payroll']['discount_split_ratio']
         )
         
+        # 'v2' links transactions by ServiceProviderID and calculates all
+        # employees in one grouped pass; 'v1' matches transactions by name
+        self.calculator_version = self.config['payroll'].get('calculator', 'v1')
+        self.payroll_calculator_v2 = PayrollCalculatorV2(
+            hourly_rate=self.config['payroll']['hourly_rate'],
+            senior_stylist_commission_rate=self.config['payroll']['senior_stylist_commission_rate'],
+            discount_split_ratio=self.config['payroll']['discount_split_ratio']
+        )
+        
+        # V2 only: senior stylists get the higher of commission and hourly pay
+        # week by week (as the web app does) rather than once per period
+        self.weekly_split = self.config['payroll'].get('weekly_split', False)
+        
         self.timecard_processor = TimecardProcessor()
         
+        cache_config = self.config.get('cache', {})
+        self.timecard_cache = None
+        if cache_config.get('timecard_dir'):
+            self.timecard_cache = TimecardCache(
+                cache_config['timecard_dir'],
+                max_bytes=int(cache_config.get('timecard_max_mb', 256) * 1024 * 1024),
+                max_age_days=cache_config.get('timecard_max_age_days', 30)
+            )
+        
+        # Per-period employee results of this data source; reruns recalculate
+        # only changed employees
+        self.result_store = None
+        if cache_config.get('results_dir'):
+            self.result_store = IncrementalResultStore(
+                os.path.join(cache_config['results_dir'], self._source_namespace())
+            )
+        
+        # Per-provider daily totals of this data source; V2 single-period runs
+        # read period totals from here instead of transactions
+        self.aggregate_store = None
+        self.aggregates_lookback_days = cache_config.get('aggregates_lookback_days', 14)
+        if cache_config.get('aggregates_dir'):
+            self.aggregate_store = DailyAggregateStore(
+                os.path.join(cache_config['aggregates_dir'], self._source_namespace())
+            )
+        
+        # One Excel detail sheet per employee in single-period reports
+        self.detail_sheets = self.config.get('report', {}).get('detail_sheets', True)
+        
+        # Pay period sessions for breakdown queries, keyed by timecard file version
+        self._period_sessions = {}
+        self._sessions_lock = threading.Lock()
+        
+        # Stage metrics of the most recent generate_payroll_report call
+        self.metrics_config = self.config.get('metrics', {})
+        self.last_run_metrics = None
+        
         logger.info("PayrollReportGenerator initialized successfully")
     
+    @property
+    def data_connector(self) -> DataSource:
+        """
+        Connector the tables are read from, created the first time data is fetched
+        
+        In offline mode this is a LocalDataConnector over the offline directory
+        and the Azure SDK is never imported.
+        """
+        with self._connector_lock:
+            if self._data_connector is None:
+                if self.offline_dir:
+                    from local_connector import LocalDataConnector
+                    self._data_connector = LocalDataConnector(self.offline_dir)
+                else:
+                    AzureDataConnector = timed_import('azure_connector').AzureDataConnector
+                    self._data_connector = AzureDataConnector(
+                        account_url=self.config['azure']['account_url'],
+                        container_name=self.config['azure']['container_name'],
+                        sas_token=self.config['azure']['sas_token'],
+                        mirror_dir=self.config.get('cache', {}).get('mirror_dir'),
+                        download_chunk_size=self.config['azure'].get('download_chunk_size', 8 * 1024 * 1024),
+                        max_concurrency=self.config['azure'].get('max_concurrency', 8)
+                    )
+            return self._data_connector
+    
+    def _source_namespace(self) -> str:
+        """Subdirectory that keeps this data source's local stores apart from other sources'"""
+        if self.offline_dir:
+            return source_namespace('offline', os.path.abspath(self.offline_dir))
+        return source_namespace(self.config['azure']['account_url'], self.config['azure']['container_name'])
+    
+    @property
+    def azure_connector(self):
+        """Alias of data_connector, kept for existing callers"""
+        return self.data_connector
+    
     def generate_payroll_report(
         self,
         timecard_path: str,
-        output_path: str = None
+        output_path: str = None,
+        metrics_json_path: str = None,
+        metrics_prometheus_path: str = None,
+        export_paths: List[str] = None
     ) -> pd.DataFrame:
         """
         Generate complete payroll report
         
+        Every stage is measured (see ``RunMetrics``); the measurements are kept
+        in ``last_run_metrics`` and written out when a metrics path is given
+        here or in the 'metrics' section of the config.
+        
         Args:
             timecard_path: Path to timecard Excel file
             output_path: Path to save output report (optional)
+            metrics_json_path: Path for the JSON run summary (optional)
+            metrics_prometheus_path: Path for the Prometheus textfile (optional)
+            export_paths: Extra copies of the payroll table (.csv, .parquet,
+                .ndjson or .xlsx, chosen by extension) for downstream systems (optional)
             
         Returns:
             DataFrame with payroll report
         """
+        metrics = RunMetrics(self.metrics_config.get('run_name', 'payroll'))
+        self.last_run_metrics = metrics
+        
         logger.info("=" * 80)
         logger.info("GENERATING PAYROLL REPORT")
         logger.info("=" * 80)
         
-        # Step 1: Read and process timecard
+        # Step 1: Read the pay period (from the timecard cache, or the
+        # workbook's first rows; the entries are read from the same open workbook)
         logger.info("\n[1/5] Processing timecard...")
-        timecard_df = self.timecard_processor.read_timecard(timecard_path)
-        start_date, end_date = self.timecard_processor.parse_pay_period(timecard_path)
-        hours_by_employee = self.timecard_processor.calculate_total_hours_by_employee(timecard_df)
-        
-        logger.info(f"Pay period: {start_date.date()} to {end_date.date()}")
-        logger.info(f"Total employees: {len(hours_by_employee)}")
-        
-        # Step 2: Fetch transaction data from Azure
-        logger.info("\n[2/5] Fetching transaction data from Azure Blob Storage...")
-        transactions_df = self.azure_connector.get_transactions_for_period(
-            start_date,
-            end_date,
-            self.config['azure_tables']['transactions']
+        with metrics.stage('pay_period'):
+            start_date, end_date, load_timecard = self._open_timecard(timecard_path)
+        
+        # Steps 2-3: Fetch tables from Azure in the background while the
+        # timecard entries are parsed; the downloads don't depend on each other
+        logger.info("\n[2/5] Fetching data from Azure Blob Storage...")
+        from_aggregates = self._uses_daily_aggregates(output_path)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            fetches = self._start_table_fetches(
+                executor, start_date, end_date, metrics, sync_aggregates=from_aggregates
+            )
+            
+            with metrics.stage('timecard') as stage:
+                timecard_df, start_date, end_date, hours_by_employee = load_timecard()
+                stage['rows_out'] = len(timecard_df)
+            logger.info(f"Pay period: {start_date.date()} to {end_date.date()}")
+            logger.info(f"Total employees: {len(hours_by_employee)}")
+            
+            logger.info("\n[3/5] Waiting for table downloads...")
+            with metrics.stage('download_wait'):
+                tables = self._collect_table_fetches(fetches)
+        
+        transactions_df = tables['transactions']
+        discounts_df = tables['discounts']
+        service_providers_df = tables.get('service_providers')
+        if from_aggregates:
+            # Only the days the store lacked were read; the period's rows are not needed
+            logger.info(f"Transactions read into the daily aggregate store: {len(transactions_df)}")
+            transactions_df = None
+        else:
+            logger.info(f"Transactions fetched: {len(transactions_df)}")
+        logger.info(f"Discounts fetched: {len(discounts_df)}")
+        
+        # Step 4: Calculate payroll for each employee
+        logger.info("\n[4/5] Calculating payroll for each employee...")
+        rows_in = len(transactions_df) if transactions_df is not None else None
+        with metrics.stage('calculation', rows_in=rows_in) as stage:
+            payroll_results = self._calculate_payroll(
+                hours_by_employee, transactions_df, discounts_df, service_providers_df, metrics,
+                pay_period=(start_date, end_date),
+                weekly_hours=self._weekly_hours(timecard_df, start_date, end_date),
+                from_aggregates=from_aggregates
+            )
+            stage['rows_out'] = len(payroll_results)
+        
+        # Step 5: Generate report DataFrame
+        logger.info("\n[5/5] Generating final report...")
+        with metrics.stage('report', rows_in=len(payroll_results)) as stage:
+            report_df = self._build_report_frame(payroll_results, start_date, end_date)
+            stage['rows_out'] = len(report_df)
+        
+        # Calculate totals
+        total_payroll = report_df['total_pay'].sum()
+        total_hours = report_df['total_hours'].sum()
+        
+        logger.info("\n" + "=" * 80)
+        logger.info("PAYROLL REPORT SUMMARY")
+        logger.info("=" * 80)
+        logger.info(f"Pay Period: {start_date.date()} to {end_date.date()}")
+        logger.info(f"Pay Date: {(end_date + timedelta(days=7)).date()}")
+        logger.info(f"Total Employees: {len(report_df)}")
+        logger.info(f"Total Hours: {total_hours:.2f}")
+        logger.info(f"Total Payroll: ${total_payroll:,.2f}")
+        logger.info("=" * 80)
+        
+        # Display individual results
+        print("\n" + report_df.to_string(index=False))
+        
+        # Save to file if output path specified
+        if output_path:
+            with metrics.stage('save_report', rows_in=len(report_df)):
+                employee_details = None
+                if self.detail_sheets:
+                    employee_details = self._employee_details(
+                        payroll_results, transactions_df, discounts_df, start_date, end_date
+                    )
+                self._save_report(report_df, output_path, start_date, end_date, employee_details)
+        
+        # One stage for all exports: stage names are metric labels and must be unique
+        if export_paths:
+            with metrics.stage('export', rows_in=len(report_df)):
+                for export_path in export_paths:
+                    self._save_report(report_df, export_path, start_date, end_date)
+        
+        metrics.finish()
+        metrics.info.update({
+            'timecard': str(timecard_path),
+            'pay_period_start': str(start_date.date()),
+            'pay_period_end': str(end_date.date()),
+            'calculator': self.calculator_version,
+            'data_source': type(self.data_connector).__name__,
+            'employees': len(report_df),
+            'total_payroll': round(float(total_payroll), 2),
+            'import_seconds': {name: round(seconds, 4) for name, seconds in IMPORT_TIMINGS.items()}
+        })
+        metrics.log_summary()
+        self._write_run_metrics(metrics, metrics_json_path, metrics_prometheus_path)
+        
+        return report_df
+    
+    def _write_run_metrics(
+        self,
+        metrics: RunMetrics,
+        json_path: str = None,
+        prometheus_path: str = None
+    ):
+        """Write run metrics to the given paths, falling back to the config's metrics section"""
+        json_path = json_path or self.metrics_config.get('json_path')
+        prometheus_path = prometheus_path or self.metrics_config.get('prometheus_path')
+        
+        # Metrics must never fail an otherwise successful payroll run
+        try:
+            if json_path:
+                metrics.write_json(json_path)
+            if prometheus_path:
+                metrics.write_prometheus(prometheus_path)
+        except OSError as e:
+            logger.warning(f"Could not write run metrics: {str(e)}")
+    
+    def generate_batch_reports(
+        self,
+        timecard_paths: List[str],
+        output_dir: str = None,
+        max_workers: int = None
+    ) -> pd.DataFrame:
+        """
+        Generate payroll reports for several timecards from one transaction load
+        
+        Transactions and discounts are fetched once for the span of all pay
+        periods. Periods are then calculated in parallel worker processes that
+        read the shared frames inherited at fork time. Workers are forked only
+        after the download threads have finished and the network clients are
+        closed; if other threads are still running (e.g. when called from a
+        threaded server), the periods are calculated in-process instead.
+        
+        Args:
+            timecard_paths: Paths to timecard Excel files
+            output_dir: Directory for per-period and combined reports (optional)
+            max_workers: Number of worker processes (defaults to CPU count)
+            
+        Returns:
+            Combined DataFrame with every period's payroll report
+        """
+        logger.info("=" * 80)
+        logger.info(f"GENERATING BATCH PAYROLL REPORTS ({len(timecard_paths)} timecards)")
+        logger.info("=" * 80)
+        
+        # Step 1: Read every timecard (cheap on a timecard cache hit)
+        logger.info("\n[1/4] Processing timecards...")
+        periods = []
+        for timecard_path in timecard_paths:
+            timecard_df, start_date, end_date, hours_by_employee = self._load_timecard(timecard_path)
+            periods.append({
+                'timecard_path': timecard_path,
+                'start_date': start_date,
+                'end_date': end_date,
+                'hours_by_employee': hours_by_employee,
+                'weekly_hours': self._weekly_hours(timecard_df, start_date, end_date)
+            })
+            logger.info(f"  {timecard_path}: {start_date.date()} to {end_date.date()}")
+        periods.sort(key=lambda period: (period['start_date'], period['end_date']))
+        
+        range_start = min(period['start_date'] for period in periods)
+        range_end = max(period['end_date'] for period in periods)
+        
+        # Step 2: Fetch shared data once for the whole span
+        logger.info(f"\n[2/4] Fetching data for {range_start.date()} to {range_end.date()}...")
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            tables = self._collect_table_fetches(
+                self._start_table_fetches(executor, range_start, range_end)
+            )
+        transactions_df = tables['transactions']
+        discounts_df = tables['discounts']
+        service_providers_df = tables.get('service_providers')
+        
+        # Step 3: Calculate each period
+        logger.info("\n[3/4] Calculating payroll per period...")
+        reports = self._run_batch_periods(
+            periods, transactions_df, discounts_df, service_providers_df, max_workers
         )
+        combined_df = pd.concat(reports, ignore_index=True)
+        
+        # Step 4: Save reports
+        logger.info("\n[4/4] Generating reports...")
+        summary_df = self._build_batch_summary(combined_df)
+        print("\n" + summary_df.to_string(index=False))
+        
+        if output_dir:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for period, report_df in zip(periods, reports):
+                period_path = output_dir / (
+                    f"payroll_{period['start_date']:%Y-%m-%d}_{period['end_date']:%Y-%m-%d}.xlsx"
+                )
+                self._save_report(report_df, str(period_path), period['start_date'], period['end_date'])
+            self._save_combined_report(combined_df, summary_df, str(output_dir / 'payroll_combined.xlsx'))
+        
+        logger.info(f"Batch complete: {len(periods)} periods, total payroll ${combined_df['total_pay'].sum():,.2f}")
+        return combined_df
+    
+    def _run_batch_periods(
+        self,
+        periods: List[Dict],
+        transactions_df: pd.DataFrame,
+        discounts_df: pd.DataFrame,
+        service_providers_df: pd.DataFrame,
+        max_workers: int = None
+    ) -> List[pd.DataFrame]:
+        """Calculate periods in forked worker processes, or in-process when forking is unavailable"""
+        max_workers = min(max_workers or os.cpu_count() or 1, len(periods))
+        
+        if max_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # A forked child has only the forking thread, so a lock held by any
+            # other thread at fork time (SDK transfer workers, connection pool
+            # bookkeeping) stays held in the child forever. The table fetches
+            # have finished and their executor has joined by now; calculate
+            # in-process if any other thread is still running, and otherwise
+            # release this generator's network clients before forking.
+            running = [thread.name for thread in threading.enumerate() if thread is not threading.current_thread()]
+            if running:
+                logger.warning(f"Not forking batch workers while other threads run ({', '.join(running)}); "
+                               f"calculating periods in-process")
+                max_workers = 1
+            elif self._data_connector is not None:
+                self._data_connector.close()
         
-        logger.info(f"Transactions fetched: {len(transactions_df)}")
+        if max_workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return [
+                self._calculate_batch_period(period, transactions_df, discounts_df, service_providers_df)
+                for period in periods
+            ]
         
-        # Step 3: Fetch discount data (if available)
-        logger.info("\n[3/5] Fetching discount data...")
+        _BATCH_STATE.update({
+            'generator': self,
+            'transactions': transactions_df,
+            'discounts': discounts_df,
+            'service_providers': service_providers_df
+        })
         try:
-            discounts_df = self.azure_connector.get_discount_details(
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('fork')
+            ) as executor:
+                return list(executor.map(_run_batch_period, periods))
+        finally:
+            _BATCH_STATE.clear()
+    
+    def _calculate_batch_period(
+        self,
+        period: Dict,
+        transactions_df: pd.DataFrame,
+        discounts_df: pd.DataFrame,
+        service_providers_df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Slice the shared frames to one pay period and build its report"""
+        start_date, end_date = period['start_date'], period['end_date']
+        
+        period_transactions = filter_by_period(transactions_df, 'transactions', start_date, end_date)
+        if period_transactions is None:
+            period_transactions = transactions_df
+        
+        period_discounts = discounts_df
+        if discounts_df is not None and len(discounts_df) > 0:
+            period_discounts = filter_by_period(discounts_df, 'discounts', start_date, end_date)
+            if period_discounts is None:
+                period_discounts = discounts_df
+        
+        payroll_results = self._calculate_payroll(
+            period['hours_by_employee'], period_transactions, period_discounts, service_providers_df,
+            pay_period=(start_date, end_date), weekly_hours=period.get('weekly_hours')
+        )
+        return self._build_report_frame(payroll_results, start_date, end_date)
+    
+    def _build_batch_summary(self, combined_df: pd.DataFrame) -> pd.DataFrame:
+        """One summary row per pay period"""
+        summary_df = combined_df.groupby(
+            ['pay_period_start', 'pay_period_end', 'pay_date'], sort=True
+        ).agg(
+            total_employees=('employee_name', 'count'),
+            total_hours=('total_hours', 'sum'),
+            total_payroll=('total_pay', 'sum')
+        ).reset_index()
+        
+        summary_df.columns = ['Pay Period Start', 'Pay Period End', 'Pay Date',
+                              'Total Employees', 'Total Hours', 'Total Payroll']
+        return summary_df
+    
+    def _save_combined_report(
+        self,
+        combined_df: pd.DataFrame,
+        summary_df: pd.DataFrame,
+        output_path: str
+    ):
+        """Save all periods to one Excel file"""
+        logger.info(f"\nSaving combined report to: {output_path}")
+        
+        write_excel_report(output_path, [('Payroll Report', combined_df), ('Summary', summary_df)])
+        
+        logger.info(f"Combined report saved successfully: {output_path}")
+    
+    def _load_timecard(self, timecard_path: str) -> Tuple[pd.DataFrame, datetime, datetime, Dict[str, float]]:
+        """
+        Load timecard entries, pay period and hours, using the timecard cache when enabled
+        
+        Args:
+            timecard_path: Path to timecard Excel file
+            
+        Returns:
+            Tuple of (timecard_df, start_date, end_date, hours_by_employee)
+        """
+        return self._open_timecard(timecard_path)[2]()
+    
+    def _open_timecard(
+        self,
+        timecard_path: str
+    ) -> Tuple[datetime, datetime, Callable[[], Tuple[pd.DataFrame, datetime, datetime, Dict[str, float]]]]:
+        """
+        Read a timecard's pay period, returning a callable that loads the rest
+        
+        On a timecard cache hit the workbook is never opened. On a miss it is
+        opened once: the pay period comes from its first rows now, and the
+        entries from the same open workbook when the callable is invoked.
+        
+        Args:
+            timecard_path: Path to timecard Excel file
+            
+        Returns:
+            Tuple of (start_date, end_date, load) where load() returns
+            (timecard_df, start_date, end_date, hours_by_employee) as _load_timecard does
+        """
+        cache_key = None
+        if self.timecard_cache is not None:
+            cache_key = self.timecard_cache.content_hash(timecard_path)
+            cached = self.timecard_cache.get(cache_key)
+            if cached is not None:
+                loaded = (
+                    cached['timecard_df'],
+                    cached['start_date'],
+                    cached['end_date'],
+                    cached['hours_by_employee']
+                )
+                return cached['start_date'], cached['end_date'], lambda: loaded
+        
+        reader = self.timecard_processor.open_timecard(timecard_path)
+        
+        def load():
+            timecard_df = reader.read_entries()
+            hours_by_employee = self.timecard_processor.calculate_total_hours_by_employee(timecard_df)
+            if self.timecard_cache is not None:
+                self.timecard_cache.put(cache_key, timecard_df, reader.start_date, reader.end_date, hours_by_employee)
+            return timecard_df, reader.start_date, reader.end_date, hours_by_employee
+        
+        return reader.start_date, reader.end_date, load
+    
+    def _weekly_hours(
+        self,
+        timecard_df: pd.DataFrame,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[pd.DataFrame]:
+        """Hours per employee and week when the V2 weekly split is enabled, else None"""
+        if self.calculator_version != 'v2' or not self.weekly_split:
+            return None
+        return self.timecard_processor.calculate_weekly_hours_by_employee(timecard_df, start_date, end_date)
+    
+    def _uses_daily_aggregates(self, output_path: str = None) -> bool:
+        """
+        Whether a single-period run takes V2 provider totals from the daily aggregate store
+        
+        The store replaces the period's transactions only when nothing else
+        needs them: the Excel detail sheets list each employee's transactions,
+        so a run that writes them reads the period as usual.
+        
+        Args:
+            output_path: Report path of the run (detail sheets are written only with one)
+            
+        Returns:
+            True if the run should sync the store and calculate from it
+        """
+        if self.calculator_version != 'v2' or self.aggregate_store is None:
+            return False
+        if output_path and self.detail_sheets:
+            logger.info("Daily aggregate store not used: the detail sheets need the period's "
+                       "transactions (set report.detail_sheets to false to use it)")
+            return False
+        return True
+    
+    def _start_table_fetches(
+        self,
+        executor: ThreadPoolExecutor,
+        start_date: datetime,
+        end_date: datetime,
+        metrics: RunMetrics = None,
+        sync_aggregates: bool = False
+    ) -> Dict[str, Future]:
+        """
+        Submit the downloads of every table the calculator needs for a period
+        
+        Args:
+            executor: Executor that runs the downloads
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            metrics: Run metrics that get one stage per table (optional)
+            sync_aggregates: Bring the daily aggregate store up to date instead of
+                reading the period's transactions; the 'transactions' frame is
+                then only the days the sync read
+            
+        Returns:
+            Dictionary of table name -> future DataFrame
+        """
+        azure_tables = self.config['azure_tables']
+        connector = self.data_connector
+        fetches = {
+            'transactions': lambda: connector.get_transactions_for_period(
+                start_date, end_date, azure_tables['transactions']
+            ),
+            'discounts': lambda: self._fetch_discounts(start_date, end_date)
+        }
+        
+        # The daily aggregate store reads only the days it lacks
+        if sync_aggregates:
+            fetches['transactions'] = lambda: self.sync_daily_aggregates(period_days(start_date, end_date)[1])
+        
+        # V2 links employees to transactions through the service provider table
+        if self.calculator_version == 'v2':
+            fetches['service_providers'] = lambda: connector.get_service_provider_details(
+                azure_tables.get('service_providers', 'Service provider details/Service provider details.csv')
+            )
+        
+        return {
+            table_name: executor.submit(self._timed_fetch, table_name, fetch, metrics)
+            for table_name, fetch in fetches.items()
+        }
+    
+    def sync_daily_aggregates(self, through: datetime) -> pd.DataFrame:
+        """
+        Bring the daily aggregate store up to date through a day
+        
+        Args:
+            through: Last day the store must cover
+            
+        Returns:
+            Transactions read to update the store (empty if it was up to date)
+        """
+        return self.aggregate_store.sync(
+            self.data_connector,
+            through,
+            self.config['azure_tables']['transactions'],
+            lookback_days=self.aggregates_lookback_days
+        )
+    
+    def link_service_providers(
+        self,
+        employee_names: List[str],
+        service_providers_df: pd.DataFrame = None
+    ) -> Dict[str, str]:
+        """
+        Link employee names to ServiceProviderIDs as the V2 calculator does
+        
+        Args:
+            employee_names: Employee names (timecard or config spelling)
+            service_providers_df: Service provider table (downloaded if not given)
+            
+        Returns:
+            Dictionary mapping employee name to ServiceProviderID (unlinked names left out)
+        """
+        all_employees = []
+        for group in ('senior_stylists', 'stylists', 'front_desk'):
+            all_employees.extend(self.config['employees'].get(group, []))
+        employee_matches = self.timecard_processor.match_employee_names(employee_names, all_employees)
+        overrides = {
+            name: emp_config['service_provider_id']
+            for name, emp_config in employee_matches.items()
+            if emp_config.get('service_provider_id')
+        }
+        
+        if service_providers_df is None:
+            service_providers_df = self.data_connector.get_service_provider_details(
+                self.config['azure_tables'].get('service_providers', 'Service provider details/Service provider details.csv')
+            )
+        return self.payroll_calculator_v2.link_employees_to_service_providers(
+            employee_names, service_providers_df, overrides
+        )
+    
+    def _collect_table_fetches(self, fetches: Dict[str, Future]) -> Dict[str, pd.DataFrame]:
+        """Wait for submitted table downloads; the first failure is raised"""
+        return {table_name: future.result() for table_name, future in fetches.items()}
+    
+    def _timed_fetch(
+        self,
+        table_name: str,
+        fetch: Callable[[], pd.DataFrame],
+        metrics: RunMetrics = None
+    ) -> pd.DataFrame:
+        """Run one table download and log how long it took"""
+        fetch_start = time.perf_counter()
+        if metrics is None:
+            df = fetch()
+        else:
+            with metrics.stage(table_name, data_source=self.data_connector) as stage:
+                df = fetch()
+                stage['rows_out'] = len(df)
+        logger.info(f"Fetched {table_name}: {len(df)} rows in {time.perf_counter() - fetch_start:.2f}s")
+        return df
+    
+    def _fetch_discounts(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Fetch discounts for a period (empty if the table is unavailable)"""
+        try:
+            return self.data_connector.get_discount_details(
                 start_date,
                 end_date,
                 self.config['azure_tables'].get('discounts', 'Discount details/Discount details.csv')
             )
-            logger.info(f"Discounts fetched: {len(discounts_df)}")
         except Exception as e:
             logger.warning(f"Could not fetch discounts: {str(e)}")
-            discounts_df = pd.DataFrame()
+            return pd.DataFrame()
+    
+    def _calculate_payroll(
+        self,
+        hours_by_employee: Dict[str, float],
+        transactions_df: pd.DataFrame,
+        discounts_df: pd.DataFrame,
+        service_providers_df: pd.DataFrame = None,
+        metrics: RunMetrics = None,
+        pay_period: Optional[Tuple[datetime, datetime]] = None,
+        weekly_hours: Optional[pd.DataFrame] = None,
+        from_aggregates: bool = False
+    ) -> List[Dict]:
+        """
+        Match timecard employees to config and calculate their pay
         
-        # Step 4: Calculate payroll for each employee
-        logger.info("\n[4/5] Calculating payroll for each employee...")
-        payroll_results = []
+        With a result store (``cache.results_dir``) and a pay period, each
+        employee's inputs are fingerprinted and only employees whose
+        fingerprint differs from the stored one are recalculated; the rest
+        reuse their stored result, so the report matches a full run. With
+        from_aggregates, V2 takes provider totals from the daily aggregate
+        store (``cache.aggregates_dir``) instead of transactions.
         
+        Args:
+            hours_by_employee: Total hours per timecard employee
+            transactions_df: Transactions for the pay period
+            discounts_df: Discounts for the pay period
+            service_providers_df: Service provider table (V2 calculator only)
+            metrics: Run metrics for per-employee calculation times (optional)
+            pay_period: (start_date, end_date) of the results (optional)
+            weekly_hours: Hours per employee and week for the V2 weekly split
+                (see _weekly_hours; requires pay_period)
+            from_aggregates: Calculate V2 from the daily aggregate store; only for
+                callers that have just synced it through the period (requires pay_period)
+            
+        Returns:
+            List of pay breakdown dictionaries
+        """
         # Get all employees from config
         all_employees = []
         all_employees.extend(self.config['employees'].get('senior_stylists', []))
@@ -119,11 +771,152 @@ class PayrollReportGenerator:
             all_employees
         )
         
+        if self.calculator_version == 'v2':
+            return self._calculate_payroll_v2(
+                employee_matches, hours_by_employee, transactions_df, service_providers_df, pay_period,
+                weekly_hours, from_aggregates
+            )
+        return self._calculate_payroll_v1(
+            employee_matches, hours_by_employee, transactions_df, discounts_df, metrics, pay_period
+        )
+    
+    def _fingerprint_inputs(self, tc_name: str, total_hours: float, emp_config: Dict) -> Dict:
+        """Scalar inputs of one employee's pay calculation, for fingerprinting"""
+        payroll_config = self.config['payroll']
+        if emp_config.get('service_provider_id') is not None:
+            emp_config = dict(emp_config, service_provider_id=str(emp_config['service_provider_id']))
+        return {
+            'employee': tc_name,
+            'hours': total_hours,
+            'config': emp_config,
+            'calculator': self.calculator_version,
+            'rates': [
+                payroll_config['hourly_rate'],
+                payroll_config['senior_stylist_commission_rate'],
+                payroll_config['discount_split_ratio']
+            ]
+        }
+    
+    def _reuse_stored_results(
+        self,
+        pay_period: Tuple[datetime, datetime],
+        fingerprints: Dict[str, str]
+    ) -> Dict[str, Dict]:
+        """Stored results of the employees whose fingerprint is unchanged"""
+        stored = self.result_store.load(*pay_period, self.calculator_version)
+        reused = {
+            tc_name: stored[tc_name]['result']
+            for tc_name, fingerprint in fingerprints.items()
+            if tc_name in stored and stored[tc_name]['fingerprint'] == fingerprint
+        }
+        logger.info(f"Reusing {len(reused)} of {len(fingerprints)} stored employee results; "
+                   f"recalculating {len(fingerprints) - len(reused)}")
+        return reused
+    
+    def _store_results(
+        self,
+        pay_period: Tuple[datetime, datetime],
+        fingerprints: Dict[str, str],
+        payroll_results: List[Dict]
+    ):
+        """Store this run's results with their fingerprints, replacing the period's entries"""
+        entries = {
+            result['employee_name']: {'fingerprint': fingerprints[result['employee_name']], 'result': result}
+            for result in payroll_results
+        }
+        self.result_store.save(*pay_period, self.calculator_version, entries)
+    
+    def _build_report_frame(
+        self,
+        payroll_results: List[Dict],
+        start_date: datetime,
+        end_date: datetime
+    ) -> pd.DataFrame:
+        """Turn pay breakdowns into the report DataFrame with pay period columns"""
+        report_df = pd.DataFrame(payroll_results)
+        
+        # Add pay period info
+        report_df['pay_period_start'] = start_date.date()
+        report_df['pay_period_end'] = end_date.date()
+        report_df['pay_date'] = (end_date + timedelta(days=7)).date()
+        
+        # Reorder columns
+        columns_order = [
+            'employee_name', 'employee_type', 'pay_period_start', 'pay_period_end',
+            'pay_date', 'total_hours', 'total_pay'
+        ]
+        
+        # Add optional columns if they exist
+        optional_cols = ['hourly_pay', 'total_sales', 'commission', 'pay_method', 'base_pay',
+                        'tips', 'addings', 'total_discounts', 'discount_deduction', 'transaction_count']
+        
+        for col in optional_cols:
+            if col in report_df.columns:
+                columns_order.append(col)
+        
+        return report_df[columns_order]
+    
+    def _calculate_payroll_v1(
+        self,
+        employee_matches: Dict[str, Dict],
+        hours_by_employee: Dict[str, float],
+        transactions_df: pd.DataFrame,
+        discounts_df: pd.DataFrame,
+        metrics: RunMetrics = None,
+        pay_period: Optional[Tuple[datetime, datetime]] = None
+    ) -> List[Dict]:
+        """
+        Calculate payroll employee by employee with name-matched transactions
+        
+        V2 calculates every employee in one grouped pass, so per-employee
+        times are only recorded here.
+        """
+        payroll_results = []
+        
+        # Build the per-employee row indexes once for the whole run
+        transaction_index = self.payroll_calculator.index_transactions(
+            transactions_df, list(employee_matches.keys())
+        )
+        discount_index = None
+        if discounts_df is not None and len(discounts_df) > 0:
+            discount_index = self.payroll_calculator.index_transactions(
+                discounts_df, list(employee_matches.keys())
+            )
+        
+        incremental = pay_period is not None and self.result_store is not None
+        fingerprints = {}
+        reused = {}
+        if incremental:
+            # An employee's result depends on the rows the name index gives them:
+            # transactions always, discounts for commission employees
+            transaction_hashes = row_hashes(transactions_df)
+            discount_hashes = row_hashes(discounts_df) if discount_index is not None else None
+            
+            for tc_name, emp_config in employee_matches.items():
+                positions = transaction_index.positions(tc_name)
+                row_groups = [transaction_hashes[positions] if positions is not None else None]
+                inputs = self._fingerprint_inputs(tc_name, hours_by_employee[tc_name], emp_config)
+                inputs['transaction_columns'] = list(transactions_df.columns)
+                
+                if emp_config.get('pay_type', 'hourly') == 'commission_vs_hourly' and discount_index is not None:
+                    positions = discount_index.positions(tc_name)
+                    row_groups.append(discount_hashes[positions] if positions is not None else None)
+                    inputs['discount_columns'] = list(discounts_df.columns)
+                
+                fingerprints[tc_name] = employee_fingerprint(inputs, row_groups)
+            
+            reused = self._reuse_stored_results(pay_period, fingerprints)
+        
         for tc_name, emp_config in employee_matches.items():
+            if tc_name in reused:
+                payroll_results.append(reused[tc_name])
+                continue
+            
             total_hours = hours_by_employee[tc_name]
             pay_type = emp_config.get('pay_type', 'hourly')
             
             logger.info(f"\nProcessing: {tc_name} ({pay_type})")
+            employee_start = time.perf_counter()
             
             if pay_type == 'commission_vs_hourly':
                 # Senior stylist - calculate commission vs hourly
@@ -142,84 +935,237 @@ class PayrollReportGenerator:
                     transactions_df=transactions_df
                 )
             
+            if metrics is not None:
+                metrics.record_employee(tc_name, time.perf_counter() - employee_start)
             payroll_results.append(result)
         
-        # Step 5: Generate report DataFrame
-        logger.info("\n[5/5] Generating final report...")
-        report_df = pd.DataFrame(payroll_results)
+        if incremental:
+            self._store_results(pay_period, fingerprints, payroll_results)
         
-        # Add pay period info
-        report_df['pay_period_start'] = start_date.date()
-        report_df['pay_period_end'] = end_date.date()
-        report_df['pay_date'] = (end_date + timedelta(days=7)).date()
+        return payroll_results
+    
+    def _calculate_payroll_v2(
+        self,
+        employee_matches: Dict[str, Dict],
+        hours_by_employee: Dict[str, float],
+        transactions_df: pd.DataFrame,
+        service_providers_df: pd.DataFrame,
+        pay_period: Optional[Tuple[datetime, datetime]] = None,
+        weekly_hours: Optional[pd.DataFrame] = None,
+        from_aggregates: bool = False
+    ) -> List[Dict]:
+        """
+        Calculate payroll for all employees in one grouped pass keyed by ServiceProviderID
         
-        # Reorder columns
-        columns_order = [
-            'employee_name', 'employee_type', 'pay_period_start', 'pay_period_end',
-            'pay_date', 'total_hours', 'total_pay'
-        ]
+        With weekly_hours, the grouped pass is over (provider, week) pairs.
+        With from_aggregates, provider totals come from the synced daily aggregate store.
+        """
+        weekly = {}
+        if weekly_hours is not None:
+            weekly = {'weekly_hours': weekly_hours, 'period_start': pay_period[0]}
+        overrides = {
+            tc_name: emp_config['service_provider_id']
+            for tc_name, emp_config in employee_matches.items()
+            if emp_config.get('service_provider_id')
+        }
+        name_to_id = self.payroll_calculator_v2.link_employees_to_service_providers(
+            list(employee_matches.keys()),
+            service_providers_df,
+            overrides
+        )
         
-        # Add optional columns if they exist
-        optional_cols = ['hourly_pay', 'commission', 'pay_method', 'base_pay', 
-                        'tips', 'addings', 'discount_deduction', 'transaction_count']
+        employees = [
+            {
+                'employee_name': tc_name,
+                'total_hours': hours_by_employee[tc_name],
+                'pay_type': emp_config.get('pay_type', 'hourly'),
+                'service_provider_id': name_to_id.get(tc_name)
+            }
+            for tc_name, emp_config in employee_matches.items()
+        ]
         
-        for col in optional_cols:
-            if col in report_df.columns:
-                columns_order.append(col)
+        if from_aggregates:
+            # Provider totals come from the daily aggregate store; no transactions are scanned
+            provider_ids = list(dict.fromkeys(
+                employee['service_provider_id'] for employee in employees if employee['service_provider_id']
+            ))
+            if weekly_hours is not None:
+                totals = self.aggregate_store.weekly_totals(*pay_period, provider_ids)
+            else:
+                totals = self.aggregate_store.period_totals(*pay_period, provider_ids)
+            return self.payroll_calculator_v2.calculate_all_employees(employees, None, totals=totals, **weekly)
         
-        report_df = report_df[columns_order]
+        if pay_period is None or self.result_store is None:
+            return self.payroll_calculator_v2.calculate_all_employees(employees, transactions_df, **weekly)
         
-        # Calculate totals
-        total_payroll = report_df['total_pay'].sum()
-        total_hours = report_df['total_hours'].sum()
+        # An employee's result depends only on their provider's rows
+        provider_rows = {}
+        if transactions_df is not None and 'ServiceProviderID' in transactions_df.columns:
+            provider_rows = transactions_df.groupby('ServiceProviderID', observed=True, sort=False).indices
+        transaction_hashes = row_hashes(transactions_df)
+        columns = list(transactions_df.columns) if transactions_df is not None else []
         
-        logger.info("\n" + "=" * 80)
-        logger.info("PAYROLL REPORT SUMMARY")
-        logger.info("=" * 80)
-        logger.info(f"Pay Period: {start_date.date()} to {end_date.date()}")
-        logger.info(f"Pay Date: {(end_date + timedelta(days=7)).date()}")
-        logger.info(f"Total Employees: {len(report_df)}")
-        logger.info(f"Total Hours: {total_hours:.2f}")
-        logger.info(f"Total Payroll: ${total_payroll:,.2f}")
-        logger.info("=" * 80)
+        fingerprints = {}
+        for employee in employees:
+            tc_name = employee['employee_name']
+            positions = provider_rows.get(employee['service_provider_id']) if employee['service_provider_id'] else None
+            inputs = self._fingerprint_inputs(tc_name, employee['total_hours'], employee_matches[tc_name])
+            inputs.update({'service_provider_id': employee['service_provider_id'], 'transaction_columns': columns})
+            if weekly_hours is not None:
+                inputs['weekly_hours'] = (
+                    weekly_hours.loc[tc_name].tolist() if tc_name in weekly_hours.index else None
+                )
+            fingerprints[tc_name] = employee_fingerprint(
+                inputs, [transaction_hashes[positions] if positions is not None else None]
+            )
         
-        # Display individual results
-        print("\n" + report_df.to_string(index=False))
+        reused = self._reuse_stored_results(pay_period, fingerprints)
+        changed = [employee for employee in employees if employee['employee_name'] not in reused]
         
-        # Save to file if output path specified
-        if output_path:
-            self._save_report(report_df, output_path, start_date, end_date)
+        calculated = {}
+        if changed:
+            # Aggregate only the changed providers' rows, kept in their original order
+            changed_rows = [
+                provider_rows[employee['service_provider_id']]
+                for employee in changed
+                if employee['service_provider_id'] and employee['service_provider_id'] in provider_rows
+            ]
+            changed_transactions = transactions_df
+            if transactions_df is not None and provider_rows:
+                positions = np.unique(np.concatenate(changed_rows)) if changed_rows else np.empty(0, dtype=np.intp)
+                changed_transactions = transactions_df.iloc[positions]
+            
+            for result in self.payroll_calculator_v2.calculate_all_employees(changed, changed_transactions, **weekly):
+                calculated[result['employee_name']] = result
         
-        return report_df
+        payroll_results = [
+            reused[employee['employee_name']] if employee['employee_name'] in reused
+            else calculated[employee['employee_name']]
+            for employee in employees
+        ]
+        self._store_results(pay_period, fingerprints, payroll_results)
+        return payroll_results
     
     def _save_report(
         self,
         report_df: pd.DataFrame,
         output_path: str,
         start_date: datetime,
-        end_date: datetime
+        end_date: datetime,
+        employee_details: Iterator[Tuple[str, List[Tuple[str, pd.DataFrame]]]] = None
     ):
-        """Save report to Excel file"""
+        """
+        Save report as a streamed Excel workbook, or as CSV, Parquet or NDJSON
+        
+        The format follows the file extension. Excel reports get the payroll
+        table, a summary sheet and, if given, one detail sheet per employee.
+        
+        Args:
+            report_df: Payroll report
+            output_path: Output file path (.xlsx, .csv, .parquet, .ndjson or .jsonl)
+            start_date: Start date of pay period
+            end_date: End date of pay period
+            employee_details: Detail sections per employee (Excel only, optional)
+        """
         logger.info(f"\nSaving report to: {output_path}")
         
-        # Create Excel writer
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Write main report
-            report_df.to_excel(writer, sheet_name='Payroll Report', index=False)
+        if table_format(output_path) == 'excel':
+            summary_df = summary_frame(report_df, start_date, end_date, end_date + timedelta(days=7))
+            write_excel_report(
+                output_path,
+                [('Payroll Report', report_df), ('Summary', summary_df)],
+                employee_details
+            )
+        else:
+            write_table(report_df, output_path)
+        
+        logger.info(f"Report saved successfully: {output_path}")
+    
+    def _employee_details(
+        self,
+        payroll_results: List[Dict],
+        transactions_df: pd.DataFrame,
+        discounts_df: pd.DataFrame,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Iterator[Tuple[str, List[Tuple[str, pd.DataFrame]]]]:
+        """
+        Detail sections of each employee, generated one employee at a time
+        
+        Each employee gets the transactions their pay was calculated from
+        (name-matched for V1, by ServiceProviderID for V2), the addings, the
+        weekly breakdowns of the V2 weekly split and, for V1 senior stylists,
+        their discounts.
+        
+        Args:
+            payroll_results: Pay breakdowns of the run
+            transactions_df: Transactions of the run
+            discounts_df: Discounts of the run
+            start_date: Start date of pay period
+            end_date: End date of pay period
             
-            # Create summary sheet
-            summary_data = {
-                'Pay Period Start': [start_date.date()],
-                'Pay Period End': [end_date.date()],
-                'Pay Date': [(end_date + timedelta(days=7)).date()],
-                'Total Employees': [len(report_df)],
-                'Total Hours': [report_df['total_hours'].sum()],
-                'Total Payroll': [report_df['total_pay'].sum()]
+        Returns:
+            Iterator of (employee name, sections)
+        """
+        has_transactions = transactions_df is not None and len(transactions_df) > 0
+        has_discounts = discounts_df is not None and len(discounts_df) > 0
+        detail_df = transaction_detail_frame(transactions_df) if has_transactions else None
+        
+        provider_rows = {}
+        if self.calculator_version == 'v2' and has_transactions and 'ServiceProviderID' in transactions_df.columns:
+            provider_rows = transactions_df.groupby('ServiceProviderID', observed=True, sort=False).indices
+        
+        for result in payroll_results:
+            employee_name = result['employee_name']
+            positions = None
+            if self.calculator_version == 'v2':
+                provider_id = result.get('service_provider_id')
+                positions = provider_rows.get(provider_id) if provider_id else None
+            elif has_transactions:
+                positions = self.payroll_calculator.index_transactions(transactions_df).positions(employee_name)
+            
+            details = {
+                'transactions': detail_df.iloc[positions] if positions is not None else pd.DataFrame()
             }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            if result.get('employee_type') == 'senior_stylist':
+                if 'weeks' in result:
+                    details['weeks'] = result['weeks']
+                if 'adding_details' in result:
+                    details['addings'] = result['adding_details']
+                if self.calculator_version == 'v1':
+                    positions = None
+                    if has_discounts:
+                        positions = self.payroll_calculator.index_transactions(discounts_df).positions(employee_name)
+                    details['discounts'] = dollar_columns(discounts_df.iloc[positions]) if positions is not None else pd.DataFrame()
+            
+            yield employee_name, details_as_sections(details)
+    
+    def period_session(self, timecard_path: str) -> PayPeriodSession:
+        """
+        Get (creating if needed) the session of a timecard
         
-        logger.info(f"Report saved successfully: {output_path}")
+        Sessions are kept per timecard file and replaced when the file
+        changes, so repeated breakdowns of one pay period share a single
+        timecard parse and a single download of each table.
+        
+        Args:
+            timecard_path: Path to timecard Excel file
+            
+        Returns:
+            PayPeriodSession for the timecard
+        """
+        stat = os.stat(timecard_path)
+        key = (os.path.abspath(timecard_path), stat.st_mtime_ns, stat.st_size)
+        
+        with self._sessions_lock:
+            session = self._period_sessions.get(key)
+            if session is None:
+                # Keep only a few recent periods in memory
+                if len(self._period_sessions) >= 4:
+                    self._period_sessions.pop(next(iter(self._period_sessions)))
+                session = PayPeriodSession(self, timecard_path)
+                self._period_sessions[key] = session
+            return session
     
     def generate_detailed_breakdown(
         self,
@@ -230,67 +1176,52 @@ class PayrollReportGenerator:
         """
         Generate detailed breakdown for a specific employee
         
+        The timecard and tables are loaded once per timecard (see
+        ``period_session``) and shared by later breakdowns of the same period.
+        
         Args:
             timecard_path: Path to timecard Excel file
-            employee_name: Name of employee
-            output_path: Path to save output (optional)
+            employee_name: Name of employee as on the timecard
+            output_path: Path to save the breakdown as an Excel workbook (optional)
             
         Returns:
-            Dictionary with detailed breakdown
+            Dictionary with the employee's pay breakdown plus 'transactions',
+            'services' and, for V1 senior stylists, 'discounts' DataFrames
+            
+        Raises:
+            KeyError: If the employee is not on the timecard
         """
         logger.info(f"Generating detailed breakdown for: {employee_name}")
         
-        # Read timecard and get dates
-        timecard_df = self.timecard_processor.read_timecard(timecard_path)
-        start_date, end_date = self.timecard_processor.parse_pay_period(timecard_path)
-        
-        # Get employee hours
-        hours_by_employee = self.timecard_processor.calculate_total_hours_by_employee(timecard_df)
-        total_hours = hours_by_employee.get(employee_name, 0)
+        session = self.period_session(timecard_path)
+        breakdown = session.employee_breakdown(employee_name)
         
-        # Fetch data
-        transactions_df = self.azure_connector.get_transactions_for_period(
-            start_date, end_date
-        )
-        
-        try:
-            discounts_df = self.azure_connector.get_discount_details(start_date, end_date)
-        except:
-            discounts_df = pd.DataFrame()
-        
-        # Calculate payroll with details
-        # This would need employee config - simplified for now
-        result = self.payroll_calculator.calculate_senior_stylist_pay(
-            employee_name=employee_name,
-            total_hours=total_hours,
-            transactions_df=transactions_df,
-            discounts_df=discounts_df
-        )
+        if output_path:
+            details = {'transactions': breakdown['transactions']}
+            if 'weeks' in breakdown:
+                details['weeks'] = breakdown['weeks']
+            if 'adding_details' in breakdown:
+                details['addings'] = breakdown['adding_details']
+            if 'discounts' in breakdown:
+                details['discounts'] = breakdown['discounts']
+            pay_df = pd.DataFrame([{
+                key: value for key, value in breakdown.items()
+                if not isinstance(value, (pd.DataFrame, list, dict))
+            }])
+            write_excel_report(
+                output_path,
+                [('Breakdown', pay_df), ('Services', breakdown['services'])],
+                [(breakdown['employee_name'], details_as_sections(details))]
+            )
+            logger.info(f"Breakdown saved to: {output_path}")
         
-        return result
-
+        return breakdown
 
 def main():
     """Main entry point for command-line usage"""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description='Lumin Payroll Calculator')
-    parser.add_argument('--config', required=True, help='Path to config YAML file')
-    parser.add_argument('--timecard', required=True, help='Path to timecard Excel file')
-    parser.add_argument('--output', help='Path to output Excel file')
-    
-    args = parser.parse_args()
-    
-    # Generate report
-    generator = PayrollReportGenerator(args.config)
-    report_df = generator.generate_payroll_report(
-        timecard_path=args.timecard,
-        output_path=args.output
-    )
-    
-    print("\nPayroll report generated successfully!")
+    from cli import main as cli_main
+    cli_main()
 
 
 if __name__ == '__main__':
     main()
-
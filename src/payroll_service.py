@@ -0,0 +1,486 @@
+"""
+Payroll Service
+HTTP service that keeps pay period data warm and serves precomputed payroll
+results as gzip-compressed JSON
+"""
+
+import pandas as pd
+import numpy as np
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+import logging
+
+from period_session import PayPeriodSession
+from startup import configure_logging, resolve_timecard_paths
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api'
+
+# Responses smaller than this are sent uncompressed
+MIN_GZIP_BYTES = 512
+
+# One entity tag of an If-None-Match list, weak or strong
+_ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+
+def _json_default(value):
+    """JSON encoding for the pandas, numpy and date values in payroll results"""
+    if isinstance(value, pd.DataFrame):
+        return _frame_records(value)
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _frame_records(df: pd.DataFrame) -> List[Dict]:
+    """Rows of a frame as dictionaries, with missing values as None"""
+    if len(df) == 0:
+        return []
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches a response's ETag
+
+    The header may be '*' or a comma-separated list of tags; weak tags (W/)
+    match their strong counterpart, as the weak comparison of RFC 9110 requires.
+
+    Args:
+        if_none_match: If-None-Match header value (may be None)
+        etag: The response's ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in _ENTITY_TAG.findall(if_none_match)
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows a gzip response
+
+    Codings are matched case-insensitively with their q-values: 'gzip;q=0'
+    refuses gzip, and '*' covers gzip when it is not listed itself.
+
+    Args:
+        accept_encoding: Accept-Encoding header value (may be None)
+
+    Returns:
+        True if gzip is acceptable
+    """
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def _name_key(name: str) -> str:
+    """Lookup key for names in URLs: case-insensitive"""
+    return name.strip().casefold()
+
+
+class CachedResponse:
+    """A JSON response body, encoded and compressed once"""
+
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, payload, gzip_level: int = 6):
+        """
+        Encode a payload
+
+        Args:
+            payload: JSON-serializable payload (DataFrames become lists of records)
+            gzip_level: gzip compression level
+        """
+        self.body = json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+        self.gzipped = gzip.compress(self.body, compresslevel=gzip_level, mtime=0) \
+            if len(self.body) >= MIN_GZIP_BYTES else None
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+
+class PayrollService:
+    """
+    Warm cache of every pay period's payroll responses
+
+    All responses are computed up front from PayPeriodSessions and kept as
+    encoded, compressed bytes, so requests are served without touching
+    pandas. A refresher thread compares the table versions (blob ETags, or
+    file times for local data) and the timecard files every
+    ``refresh_seconds``; when anything changed, a new set of responses is
+    built in the background and swapped in atomically. Requests never wait
+    for a rebuild and never see a partially built set.
+    """
+
+    def __init__(
+        self,
+        generator,
+        timecards: str,
+        refresh_seconds: float = 60,
+        gzip_level: int = 6
+    ):
+        """
+        Initialize payroll service
+
+        Args:
+            generator: PayrollReportGenerator to calculate with
+            timecards: Directory or glob of timecard Excel files, one per pay period
+            refresh_seconds: How often table and timecard versions are checked
+            gzip_level: gzip compression level of the responses
+        """
+        self.generator = generator
+        self.timecards = timecards
+        self.refresh_seconds = refresh_seconds
+        self.gzip_level = gzip_level
+
+        self._responses: Dict[str, CachedResponse] = {}
+        self._version = None
+        self.refreshed_at = None
+        self.refresh_count = 0
+
+        # Readers take a reference to the current dictionary and the status
+        # under _lock; only one refresh runs at a time. The generator keeps no
+        # per-run calculation state, so other users of it (e.g. breakdown
+        # sessions on other threads) can run alongside a refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def get(self, path: str) -> Optional[CachedResponse]:
+        """
+        Cached response for a request path
+
+        Args:
+            path: URL path such as '/api/periods' (percent-encoded or not)
+
+        Returns:
+            CachedResponse, or None if there is none for the path
+        """
+        with self._lock:
+            responses = self._responses
+        return responses.get(self._route_key(unquote(path)))
+
+    @staticmethod
+    def _route_key(path: str) -> str:
+        """Normalized cache key of a path: no trailing slash, case-insensitive names"""
+        return _name_key(path.rstrip('/'))
+
+    def current_version(self) -> Tuple:
+        """
+        Versions of everything the responses are computed from
+
+        Returns:
+            Tuple of the timecard files' (path, mtime, size) and each table's
+            version (blob ETags or local file times)
+        """
+        timecard_versions = []
+        for path in resolve_timecard_paths(self.timecards):
+            stat = os.stat(path)
+            timecard_versions.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+
+        connector = self.generator.data_connector
+        table_versions = []
+        for table_name, table_path in sorted(self.generator.config['azure_tables'].items()):
+            try:
+                table_versions.append((table_name, tuple(connector.table_version(table_path))))
+            except Exception as e:
+                # Missing optional tables (e.g. refunds) have no version
+                logger.debug(f"No version for table {table_name}: {str(e)}")
+                table_versions.append((table_name, None))
+
+        return tuple(timecard_versions), tuple(table_versions)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rebuild the responses if any timecard or table changed
+
+        Args:
+            force: Rebuild even if nothing changed
+
+        Returns:
+            True if the responses were rebuilt
+        """
+        with self._refresh_lock:
+            version = self.current_version()
+            if not force and version == self._version:
+                return False
+
+            refresh_start = time.perf_counter()
+            responses = self._build_responses([path for path, _, _ in version[0]])
+
+            with self._lock:
+                self._responses = responses
+                self._version = version
+                self.refreshed_at = datetime.now()
+                self.refresh_count += 1
+
+            logger.info(f"Payroll service refreshed: {len(version[0])} pay periods, "
+                       f"{len(responses)} responses in {time.perf_counter() - refresh_start:.2f}s")
+            return True
+
+    def _build_responses(self, timecard_paths: List[str]) -> Dict[str, CachedResponse]:
+        """Compute and encode every response of every pay period"""
+        responses = {}
+        periods = []
+
+        for timecard_path in timecard_paths:
+            # A fresh session per refresh, so changed tables are read again
+            session = PayPeriodSession(self.generator, timecard_path)
+            try:
+                report_df = session.report()
+            except Exception as e:
+                logger.error(f"Skipping timecard {timecard_path}: {str(e)}")
+                continue
+
+            period_id = f"{session.start_date:%Y-%m-%d}_{session.end_date:%Y-%m-%d}"
+            prefix = f"{API_PREFIX}/periods/{period_id}"
+            period = {
+                'period_id': period_id,
+                'pay_period_start': session.start_date.date(),
+                'pay_period_end': session.end_date.date(),
+                'pay_date': report_df['pay_date'].iloc[0] if len(report_df) > 0 else None,
+                'timecard': os.path.basename(timecard_path),
+                'employees': len(report_df),
+                'total_hours': report_df['total_hours'].sum(),
+                'total_payroll': report_df['total_pay'].sum()
+            }
+            periods.append(period)
+
+            responses[self._route_key(f"{prefix}/report")] = CachedResponse(
+                {**period, 'report': report_df}, self.gzip_level
+            )
+            responses[self._route_key(f"{prefix}/services")] = CachedResponse(
+                {'period_id': period_id, 'services': session.service_breakdown()}, self.gzip_level
+            )
+            for employee_name in report_df['employee_name']:
+                breakdown = session.employee_breakdown(employee_name)
+                responses[self._route_key(f"{prefix}/employees/{employee_name}")] = CachedResponse(
+                    {'period_id': period_id, **breakdown}, self.gzip_level
+                )
+
+        periods.sort(key=lambda period: period['period_id'], reverse=True)
+        responses[self._route_key(f"{API_PREFIX}/periods")] = CachedResponse(
+            {'periods': periods}, self.gzip_level
+        )
+        return responses
+
+    def start_refresher(self):
+        """Check for changed tables and timecards in a background thread"""
+        def refresh_loop():
+            while not self._stop.wait(self.refresh_seconds):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Payroll service refresh failed: {str(e)}")
+
+        self._refresher = threading.Thread(target=refresh_loop, name='payroll-refresh', daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        """Stop the background refresher"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+
+    def health(self) -> Dict:
+        """Service status for the health endpoint"""
+        with self._lock:
+            response_count = len(self._responses)
+            refreshed_at = self.refreshed_at
+            refresh_count = self.refresh_count
+        return {
+            'status': 'ok' if refreshed_at is not None else 'starting',
+            'refreshed_at': refreshed_at.isoformat(timespec='seconds') if refreshed_at else None,
+            'refresh_count': refresh_count,
+            'responses': response_count
+        }
+
+
+class PayrollRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the payroll service's cached responses
+
+    GET /api/periods, /api/periods/<period>/report,
+    /api/periods/<period>/services, /api/periods/<period>/employees/<name>
+    and /api/health. Responses are gzip-compressed when the client accepts
+    it and carry an ETag, so unchanged data is answered with 304.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'LuminPayroll'
+
+    @property
+    def service(self) -> PayrollService:
+        return self.server.payroll_service
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+
+        if path.rstrip('/') == f"{API_PREFIX}/health":
+            self._send(200, CachedResponse(self.service.health()))
+            return
+
+        response = self.service.get(path)
+        if response is None:
+            self._send(404, CachedResponse({'error': f"Not found: {path}"}))
+            return
+
+        if _etag_matches(self.headers.get('If-None-Match'), response.etag):
+            self.send_response(304)
+            self.send_header('ETag', response.etag)
+            self._send_common_headers()
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self._send(200, response)
+
+    def do_OPTIONS(self):
+        # CORS preflight
+        self.send_response(204)
+        self._send_common_headers()
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'If-None-Match')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _send(self, status: int, response: CachedResponse):
+        accepts_gzip = _accepts_gzip(self.headers.get('Accept-Encoding'))
+        body = response.gzipped if accepts_gzip and response.gzipped is not None else response.body
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', response.etag)
+        if body is response.gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self._send_common_headers()
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_common_headers(self):
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if self.server.allow_origin:
+            self.send_header('Access-Control-Allow-Origin', self.server.allow_origin)
+
+    def log_message(self, format: str, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+def create_server(
+    service: PayrollService,
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    allow_origin: str = None
+) -> ThreadingHTTPServer:
+    """
+    Create the HTTP server for a payroll service
+
+    Args:
+        service: PayrollService whose responses are served
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free port)
+        allow_origin: Value of the Access-Control-Allow-Origin header for the
+            web app (optional; no CORS header if None)
+
+    Returns:
+        ThreadingHTTPServer, not yet serving
+    """
+    server = ThreadingHTTPServer((host, port), PayrollRequestHandler)
+    server.daemon_threads = True
+    server.payroll_service = service
+    server.allow_origin = allow_origin
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for command-line usage"""
+    parser = argparse.ArgumentParser(description='Lumin Payroll Calculator - payroll HTTP service')
+    parser.add_argument('--config', required=True, help='Path to config YAML file')
+    parser.add_argument('--timecards', help='Directory or glob of timecard Excel files (default: service.timecards)')
+    parser.add_argument('--offline', metavar='DIR',
+                        help='Read tables from a local copy of the container instead of Azure')
+    parser.add_argument('--host', help='Interface to listen on (default: service.host or 127.0.0.1)')
+    parser.add_argument('--port', type=int, help='Port to listen on (default: service.port or 8080)')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+
+    from payroll_report import PayrollReportGenerator
+    generator = PayrollReportGenerator(args.config, offline_dir=args.offline)
+    service_config = generator.config.get('service', {})
+
+    # The web app links employees to transactions by ServiceProviderID, as calculator V2 does
+    generator.calculator_version = service_config.get('calculator', 'v2')
+
+    timecards = args.timecards or service_config.get('timecards')
+    if not timecards:
+        parser.error("Give --timecards or set service.timecards in the config")
+
+    service = PayrollService(
+        generator,
+        timecards,
+        refresh_seconds=service_config.get('refresh_seconds', 60),
+        gzip_level=service_config.get('gzip_level', 6)
+    )
+    service.refresh(force=True)
+    service.start_refresher()
+
+    server = create_server(
+        service,
+        host=args.host or service_config.get('host', '127.0.0.1'),
+        port=args.port if args.port is not None else service_config.get('port', 8080),
+        allow_origin=service_config.get('allow_origin')
+    )
+    host, port = server.server_address[:2]
+    logger.info(f"Payroll service listening on http://{host}:{port}{API_PREFIX}/periods")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Pay Period Session
+Loads one pay period's timecard and tables once and answers report and
+breakdown queries from memory
+"""
+
+import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from money import dollar_columns
+from report_writer import transaction_detail_frame
+
+logger = logging.getLogger(__name__)
+
+SERVICE_BREAKDOWN_COLUMNS = ['Service', 'transaction_count', 'total_sales', 'tips', 'total_discounts']
+
+
+class PayPeriodSession:
+    """
+    Everything one pay period's payroll is calculated from, loaded on first use
+
+    The timecard, the transaction, discount and service provider tables, the
+    provider links and the pay breakdowns are each loaded or calculated once
+    and kept for the lifetime of the session, so any number of report,
+    employee and service queries cost one timecard parse and one download of
+    each table. A session is a snapshot: create a new one to pick up changed
+    tables. Loading is serialized, so a session can be shared between threads.
+    """
+
+    def __init__(self, generator, timecard_path: str):
+        """
+        Initialize session
+
+        Args:
+            generator: PayrollReportGenerator that provides config, data source and calculators
+            timecard_path: Path to timecard Excel file
+        """
+        self.generator = generator
+        self.timecard_path = timecard_path
+        self._lock = threading.RLock()
+        self._timecard = None
+        self._tables = None
+        self._provider_links = None
+        self._payroll_results = None
+        self._report = None
+        self._detail_frame = None
+        self._provider_rows = None
+
+    # Loaded data
+
+    def _load_timecard(self):
+        with self._lock:
+            if self._timecard is None:
+                self._timecard = self.generator._load_timecard(self.timecard_path)
+                logger.info(f"Session loaded timecard: {self.timecard_path}")
+            return self._timecard
+
+    @property
+    def timecard_df(self) -> pd.DataFrame:
+        return self._load_timecard()[0]
+
+    @property
+    def start_date(self) -> datetime:
+        return self._load_timecard()[1]
+
+    @property
+    def end_date(self) -> datetime:
+        return self._load_timecard()[2]
+
+    @property
+    def hours_by_employee(self) -> Dict[str, float]:
+        return self._load_timecard()[3]
+
+    @property
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        """
+        Transactions, discounts and (calculator V2) service providers of the period
+
+        The tables are downloaded in parallel the first time any of them is needed.
+        """
+        with self._lock:
+            if self._tables is None:
+                start_date, end_date = self.start_date, self.end_date
+                generator = self.generator
+                azure_tables = generator.config['azure_tables']
+                connector = generator.data_connector
+                fetches = {
+                    'transactions': lambda: connector.get_transactions_for_period(
+                        start_date, end_date, azure_tables['transactions']
+                    ),
+                    'discounts': lambda: generator._fetch_discounts(start_date, end_date)
+                }
+                if generator.calculator_version == 'v2':
+                    fetches['service_providers'] = lambda: connector.get_service_provider_details(
+                        azure_tables.get('service_providers', 'Service provider details/Service provider details.csv')
+                    )
+
+                with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+                    futures = {
+                        table_name: executor.submit(generator._timed_fetch, table_name, fetch)
+                        for table_name, fetch in fetches.items()
+                    }
+                    self._tables = generator._collect_table_fetches(futures)
+            return self._tables
+
+    @property
+    def transactions_df(self) -> pd.DataFrame:
+        return self.tables['transactions']
+
+    @property
+    def discounts_df(self) -> pd.DataFrame:
+        return self.tables['discounts']
+
+    @property
+    def provider_links(self) -> Dict[str, str]:
+        """Timecard employee name -> ServiceProviderID (unlinked employees left out)"""
+        with self._lock:
+            if self._provider_links is None:
+                self._provider_links = self.generator.link_service_providers(
+                    list(self.hours_by_employee.keys()),
+                    self.tables.get('service_providers')
+                )
+            return self._provider_links
+
+    # Queries
+
+    @property
+    def payroll_results(self) -> List[Dict]:
+        """Pay breakdowns of every timecard employee"""
+        with self._lock:
+            if self._payroll_results is None:
+                self._payroll_results = self.generator._calculate_payroll(
+                    self.hours_by_employee,
+                    self.transactions_df,
+                    self.discounts_df,
+                    self.tables.get('service_providers'),
+                    pay_period=(self.start_date, self.end_date),
+                    weekly_hours=self.generator._weekly_hours(self.timecard_df, self.start_date, self.end_date)
+                )
+            return self._payroll_results
+
+    def report(self) -> pd.DataFrame:
+        """
+        Payroll report of the period, as generate_payroll_report builds it
+
+        Returns:
+            DataFrame with one row per employee
+        """
+        with self._lock:
+            if self._report is None:
+                self._report = self.generator._build_report_frame(
+                    self.payroll_results, self.start_date, self.end_date
+                )
+            return self._report.copy()
+
+    def employee_names(self) -> List[str]:
+        """Timecard names of the period's employees"""
+        return list(self.hours_by_employee.keys())
+
+    def _resolve_employee(self, employee_name: str) -> Dict:
+        """Pay breakdown of an employee by exact or case-insensitive timecard name"""
+        results = self.payroll_results
+        for result in results:
+            if result['employee_name'] == employee_name:
+                return result
+        for result in results:
+            if result['employee_name'].casefold() == employee_name.casefold():
+                return result
+        raise KeyError(f"No employee named {employee_name!r} in timecard {self.timecard_path}")
+
+    def _employee_positions(self, employee_name: str):
+        """Row positions of an employee's transactions (None if they have none)"""
+        transactions_df = self.transactions_df
+        if transactions_df is None or len(transactions_df) == 0:
+            return None
+
+        if self.generator.calculator_version == 'v2':
+            with self._lock:
+                if self._provider_rows is None:
+                    self._provider_rows = {}
+                    if 'ServiceProviderID' in transactions_df.columns:
+                        self._provider_rows = transactions_df.groupby(
+                            'ServiceProviderID', observed=True, sort=False
+                        ).indices
+            provider_id = self.provider_links.get(employee_name)
+            return self._provider_rows.get(provider_id) if provider_id else None
+
+        return self.generator.payroll_calculator.index_transactions(transactions_df).positions(employee_name)
+
+    def _transaction_details(self) -> Optional[pd.DataFrame]:
+        with self._lock:
+            if self._detail_frame is None and self.transactions_df is not None and len(self.transactions_df) > 0:
+                self._detail_frame = transaction_detail_frame(self.transactions_df)
+            return self._detail_frame
+
+    def employee_transactions(self, employee_name: str) -> pd.DataFrame:
+        """
+        The transactions an employee's pay was calculated from
+
+        Args:
+            employee_name: Timecard employee name
+
+        Returns:
+            DataFrame with Date, Service, Sales, Amount, Tip and Discount columns
+            (those present), empty if the employee has no transactions
+        """
+        employee_name = self._resolve_employee(employee_name)['employee_name']
+        detail_df = self._transaction_details()
+        positions = self._employee_positions(employee_name)
+        if detail_df is None or positions is None:
+            return pd.DataFrame()
+        return detail_df.iloc[positions]
+
+    def service_breakdown(self, employee_name: str = None) -> pd.DataFrame:
+        """
+        Transaction count, sales, tips and discounts per service
+
+        Args:
+            employee_name: Limit to one employee's transactions (optional; all
+                transactions of the period if omitted)
+
+        Returns:
+            DataFrame with one row per service, highest sales first
+        """
+        if employee_name is None:
+            detail_df = self._transaction_details()
+        else:
+            detail_df = self.employee_transactions(employee_name)
+
+        if detail_df is None or len(detail_df) == 0 or 'Service' not in detail_df.columns:
+            return pd.DataFrame(columns=SERVICE_BREAKDOWN_COLUMNS)
+
+        grouped = detail_df.groupby('Service', observed=True, sort=False)
+        breakdown = pd.DataFrame({'transaction_count': grouped.size()})
+        for label, column in (('total_sales', 'Sales'), ('tips', 'Tip'), ('total_discounts', 'Discount')):
+            # Amounts are whole cents, so the sums are rounded back to the cent
+            breakdown[label] = grouped[column].sum().round(2) if column in detail_df.columns else 0.0
+
+        breakdown = breakdown.sort_values('total_sales', ascending=False, kind='stable')
+        return breakdown.reset_index()[SERVICE_BREAKDOWN_COLUMNS]
+
+    def employee_breakdown(self, employee_name: str) -> Dict:
+        """
+        Pay breakdown of one employee with the data behind it
+
+        Args:
+            employee_name: Timecard employee name (matched case-insensitively)
+
+        Returns:
+            The employee's pay breakdown dictionary plus 'transactions' (their
+            transaction rows), 'services' (their per-service totals) and, for
+            V1 senior stylists, 'discounts' (their discount rows)
+
+        Raises:
+            KeyError: If the employee is not on the timecard
+        """
+        breakdown = dict(self._resolve_employee(employee_name))
+        employee_name = breakdown['employee_name']
+        breakdown['transactions'] = self.employee_transactions(employee_name)
+        breakdown['services'] = self.service_breakdown(employee_name)
+
+        if breakdown.get('employee_type') == 'senior_stylist' and self.generator.calculator_version == 'v1':
+            discounts_df = self.discounts_df
+            positions = None
+            if discounts_df is not None and len(discounts_df) > 0:
+                positions = self.generator.payroll_calculator.index_transactions(discounts_df).positions(employee_name)
+            breakdown['discounts'] = dollar_columns(discounts_df.iloc[positions]) if positions is not None else pd.DataFrame()
+
+        return breakdown
@@ -0,0 +1,160 @@
+"""
+Provider Name Index
+Hash index from employee names to ServiceProviderIDs
+"""
+
+import pandas as pd
+import re
+from typing import Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a name and strip punctuation and repeated whitespace"""
+    return ' '.join(re.sub(r"[^\w\s]", ' ', str(name).lower()).split())
+
+
+class ProviderNameIndex:
+    """Index of service provider names built once per provider table"""
+
+    # Lookup levels, most specific first
+    LEVELS = ['full_name', 'first_initial', 'first_name', 'last_name', 'initials']
+
+    def __init__(self, service_providers_df: pd.DataFrame):
+        """
+        Build the index
+
+        Args:
+            service_providers_df: DataFrame with service provider details
+        """
+        self.keys = {level: {} for level in self.LEVELS}
+        self.active_ids = set()
+
+        if service_providers_df is None or 'ServiceProviderID' not in service_providers_df.columns:
+            logger.warning("ServiceProviderID column not found in service provider details")
+            return
+
+        ids = service_providers_df['ServiceProviderID']
+        first_names = self._column(service_providers_df, 'ServiceProviderFirstName')
+        last_names = self._column(service_providers_df, 'ServiceProviderLastName')
+        statuses = self._column(service_providers_df, 'ServiceProviderStatus')
+
+        for sp_id, first, last, status in zip(ids, first_names, last_names, statuses):
+            if pd.isna(sp_id):
+                continue
+
+            first = normalize_name(first) if pd.notna(first) else ''
+            last = normalize_name(last) if pd.notna(last) else ''
+
+            if status is not None and pd.notna(status) and str(status).lower() == 'active':
+                self.active_ids.add(sp_id)
+
+            if first:
+                self._add('first_name', first, sp_id)
+            if last:
+                self._add('last_name', last, sp_id)
+            if first and last:
+                self._add('full_name', f"{first} {last}", sp_id)
+                self._add('first_initial', f"{first} {last[0]}", sp_id)
+                self._add('initials', f"{first[0]}{last[0]}", sp_id)
+
+        logger.info(f"Indexed {len(ids)} service providers")
+
+    @staticmethod
+    def _column(df: pd.DataFrame, col: str) -> pd.Series:
+        """Column values, or a column of None if the table lacks it"""
+        if col in df.columns:
+            return df[col]
+        return pd.Series([None] * len(df), index=df.index)
+
+    def _add(self, level: str, key: str, sp_id):
+        self.keys[level].setdefault(key, set()).add(sp_id)
+
+    def _candidates(self, level: str, tokens: List[str]) -> Set:
+        """Provider IDs matching any token (or adjacent token pair) at one level"""
+        index = self.keys[level]
+        found = set()
+
+        if level == 'full_name':
+            keys = [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        elif level == 'first_initial':
+            keys = [f"{a} {b}" for a, b in zip(tokens, tokens[1:]) if len(b) == 1]
+        elif level == 'initials':
+            keys = [t for t in tokens if len(t) == 2]
+        else:
+            keys = tokens
+
+        for key in keys:
+            found.update(index.get(key, ()))
+        return found
+
+    def lookup(self, employee_name: str) -> List:
+        """
+        Find candidate ServiceProviderIDs for an employee name
+
+        Levels are tried from most to least specific (full name, first name plus
+        last initial, first name, last name, initials); the first level with any
+        match decides. If several providers match, active providers are preferred.
+
+        Args:
+            employee_name: Employee name from timecard (e.g. "Aubrie B. Senior Stylist")
+
+        Returns:
+            List of matching ServiceProviderIDs (one element if unambiguous)
+        """
+        tokens = normalize_name(employee_name).split()
+
+        for level in self.LEVELS:
+            candidates = self._candidates(level, tokens)
+            if not candidates:
+                continue
+
+            if len(candidates) > 1:
+                active = candidates & self.active_ids
+                if len(active) == 1:
+                    candidates = active
+            return sorted(candidates, key=str)
+
+        return []
+
+
+def link_names(
+    employee_names: List[str],
+    index: ProviderNameIndex,
+    overrides: Optional[Dict[str, str]] = None
+) -> Dict[str, Dict]:
+    """
+    Resolve employee names against a provider index
+
+    Args:
+        employee_names: List of employee names from timecard
+        index: Provider name index
+        overrides: Explicit employee name -> ServiceProviderID mapping from config
+            (IDs are compared as strings, so unquoted YAML numbers work)
+
+    Returns:
+        Dictionary with 'linked' (name -> ServiceProviderID), 'ambiguous'
+        (name -> candidate IDs) and 'unmatched' (list of names)
+    """
+    overrides = overrides or {}
+    linked = {}
+    ambiguous = {}
+    unmatched = []
+
+    for emp_name in employee_names:
+        if emp_name in overrides:
+            # ServiceProviderID is read as a string column
+            linked[emp_name] = str(overrides[emp_name])
+            continue
+
+        candidates = index.lookup(emp_name)
+        if len(candidates) == 1:
+            linked[emp_name] = candidates[0]
+        elif len(candidates) > 1:
+            ambiguous[emp_name] = candidates
+        else:
+            unmatched.append(emp_name)
+
+    return {'linked': linked, 'ambiguous': ambiguous, 'unmatched': unmatched}
@@ -0,0 +1,460 @@
+"""
+Report Writer
+Streams payroll reports to Excel and to CSV, Parquet and NDJSON for
+downstream systems
+"""
+
+import pandas as pd
+import numpy as np
+import math
+import os
+import re
+import zipfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import logging
+
+from money import column_cents, dollar_columns, is_cents, mark_cents
+from table_schemas import resolve_column, resolve_columns
+
+logger = logging.getLogger(__name__)
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+TABLE_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# Excel sheet titles: at most 31 characters, none of []:*?/\
+_INVALID_TITLE_CHARS = re.compile(r'[\[\]:*?/\\]')
+_MAX_TITLE_LENGTH = 31
+
+# Control characters are not allowed in XML text
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Excel stores dates as days since 1899-12-30
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Cell style indexes into the cellXfs of _STYLES
+_STYLE_DATETIME = 1
+_STYLE_DATE = 2
+_STYLE_BOLD = 3
+
+# Rows are buffered and written to the zip stream in blocks
+_ROWS_PER_WRITE = 4096
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_STYLES = (
+    _XML_DECLARATION
+    + f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_EMPTY_CELL = '<c/>'
+
+
+def _string_cell(value: str, style: int = 0) -> str:
+    text = escape(_INVALID_XML_CHARS.sub('', value))
+    style_attr = f' s="{style}"' if style else ''
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _number_cell(value, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    return f'<c{style_attr}><v>{value!r}</v></c>'
+
+
+def _value_cell(value) -> str:
+    """Cell XML for one Python value of any supported type"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return _EMPTY_CELL
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return _number_cell(int(value))
+    if isinstance(value, (float, np.floating)):
+        return _number_cell(float(value)) if math.isfinite(value) else _EMPTY_CELL
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        return _number_cell((value - _EXCEL_EPOCH).total_seconds() / 86400, _STYLE_DATETIME)
+    if isinstance(value, date):
+        return _number_cell(float((value - _EXCEL_EPOCH.date()).days), _STYLE_DATE)
+    return _string_cell(str(value))
+
+
+def _column_cells(series: pd.Series) -> List[str]:
+    """
+    Cell XML for a whole column
+
+    Numeric and datetime columns are converted with one vectorized step;
+    other columns fall back to converting value by value.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) and not series.hasnans:
+        return [f'<c t="b"><v>{int(value)}</v></c>' for value in series.tolist()]
+    if pd.api.types.is_integer_dtype(dtype) and not series.hasnans:
+        return [f'<c><v>{value}</v></c>' for value in series.tolist()]
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        return [
+            f'<c><v>{value!r}</v></c>' if finite else _EMPTY_CELL
+            for value, finite in zip(values.tolist(), np.isfinite(values).tolist())
+        ]
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            series = series.dt.tz_localize(None)
+        serials = ((series - _EXCEL_EPOCH) / pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.nan)
+        return [
+            f'<c s="{_STYLE_DATETIME}"><v>{value!r}</v></c>' if finite else _EMPTY_CELL
+            for value, finite in zip(serials.tolist(), np.isfinite(serials).tolist())
+        ]
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Render each category once
+        rendered = [_value_cell(value) for value in dtype.categories.tolist()]
+        return [rendered[code] if code >= 0 else _EMPTY_CELL for code in series.cat.codes.tolist()]
+    return [_value_cell(value) for value in series.astype(object).tolist()]
+
+
+class ExcelReportWriter:
+    """
+    Streaming .xlsx writer
+
+    Each sheet's XML is rendered column by column and streamed straight into
+    the zip archive, so memory holds one sheet's cells at most and no cell
+    objects are ever created. Strings are stored inline; dates and
+    timestamps get date formats. Use as a context manager; the archive is
+    completed on exit and moved into place.
+    """
+
+    def __init__(self, output_path: str):
+        """
+        Initialize writer
+
+        Args:
+            output_path: Path of the .xlsx file to write
+        """
+        self.output_path = output_path
+        self._tmp_path = f"{output_path}.tmp"
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._titles = []
+        self.rows_written = 0
+
+    def __enter__(self) -> 'ExcelReportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+            os.remove(self._tmp_path)
+
+    def close(self):
+        """Write the workbook parts and move the file into place"""
+        if not self._titles:
+            # A workbook needs at least one sheet
+            self._write_sheet('Sheet1', [])
+
+        sheets = ''.join(
+            f'<sheet name="{escape(title, {chr(34): "&quot;"})}" sheetId="{index}" r:id="rId{index}"/>'
+            for index, title in enumerate(self._titles, start=1)
+        )
+        self._zip.writestr('xl/workbook.xml', (
+            _XML_DECLARATION
+            + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets}</sheets></workbook>'
+        ))
+
+        relationships = ''.join(
+            f'<Relationship Id="rId{index}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(self._titles) + 1)
+        )
+        relationships += (
+            f'<Relationship Id="rId{len(self._titles) + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        )
+        self._zip.writestr('xl/_rels/workbook.xml.rels', (
+            _XML_DECLARATION
+            + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + relationships + '</Relationships>'
+        ))
+        self._zip.writestr('xl/styles.xml', _STYLES)
+        self._zip.writestr('_rels/.rels', (
+            _XML_DECLARATION
+            + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+
+        overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for index in range(1, len(self._titles) + 1)
+        )
+        self._zip.writestr('[Content_Types].xml', (
+            _XML_DECLARATION
+            + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + overrides + '</Types>'
+        ))
+
+        self._zip.close()
+        os.replace(self._tmp_path, self.output_path)
+
+    def _unique_title(self, title: str) -> str:
+        """Valid, unique sheet title derived from a name"""
+        used = {existing.lower() for existing in self._titles}
+        base = _INVALID_TITLE_CHARS.sub('_', _INVALID_XML_CHARS.sub('', str(title))).strip("' ") or 'Sheet'
+        candidate = base[:_MAX_TITLE_LENGTH]
+        counter = 2
+        while candidate.lower() in used:
+            suffix = f" ({counter})"
+            candidate = base[:_MAX_TITLE_LENGTH - len(suffix)] + suffix
+            counter += 1
+        return candidate
+
+    @staticmethod
+    def _header_row(columns: Iterable) -> str:
+        return '<row>' + ''.join(_string_cell(str(column), _STYLE_BOLD) for column in columns) + '</row>'
+
+    @staticmethod
+    def _frame_rows(df: pd.DataFrame) -> Iterable[str]:
+        """Row XML for every row of a frame (columns rendered first, then zipped)"""
+        if len(df.columns) == 0:
+            return ('<row/>' for _ in range(len(df)))
+        columns = [_column_cells(df.iloc[:, position]) for position in range(len(df.columns))]
+        return ('<row>' + ''.join(cells) + '</row>' for cells in zip(*columns))
+
+    def _write_sheet(self, title: str, blocks: Iterable[Iterable[str]]) -> str:
+        """Stream row XML blocks into a new worksheet part"""
+        title = self._unique_title(title)
+        self._titles.append(title)
+        part_name = f'xl/worksheets/sheet{len(self._titles)}.xml'
+
+        with self._zip.open(part_name, 'w', force_zip64=True) as stream:
+            stream.write((_XML_DECLARATION + f'<worksheet xmlns="{_MAIN_NS}"><sheetData>').encode('utf-8'))
+            buffer = []
+            for block in blocks:
+                for row in block:
+                    buffer.append(row)
+                    if len(buffer) >= _ROWS_PER_WRITE:
+                        stream.write(''.join(buffer).encode('utf-8'))
+                        buffer.clear()
+            stream.write((''.join(buffer) + '</sheetData></worksheet>').encode('utf-8'))
+        return title
+
+    def write_frame(self, title: str, df: pd.DataFrame) -> str:
+        """
+        Write a DataFrame as a new sheet with a bold header row
+
+        Args:
+            title: Sheet title (sanitized and made unique)
+            df: Data to write
+
+        Returns:
+            Sheet title used
+        """
+        self.rows_written += len(df)
+        return self._write_sheet(title, [[self._header_row(df.columns)], self._frame_rows(df)])
+
+    def write_sections(self, title: str, sections: List[Tuple[str, pd.DataFrame]]) -> str:
+        """
+        Write several tables one below the other on a new sheet
+
+        Each table is preceded by its section name and separated from the
+        next by a blank row. Empty tables are listed with "(none)".
+
+        Args:
+            title: Sheet title (sanitized and made unique)
+            sections: List of (section name, DataFrame)
+
+        Returns:
+            Sheet title used
+        """
+        def blocks():
+            for index, (section_name, df) in enumerate(sections):
+                if index > 0:
+                    yield ['<row/>']
+                yield [self._header_row([section_name])]
+                if df is None or len(df) == 0:
+                    yield ['<row>' + _string_cell('(none)') + '</row>']
+                    continue
+                self.rows_written += len(df)
+                yield [self._header_row(df.columns)]
+                yield self._frame_rows(df)
+
+        return self._write_sheet(title, blocks())
+
+
+def table_format(output_path: str) -> Optional[str]:
+    """
+    Report format for an output path, from its extension
+
+    Args:
+        output_path: Output file path
+
+    Returns:
+        'excel', 'csv', 'parquet' or 'ndjson', or None if the extension is not supported
+    """
+    extension = Path(output_path).suffix.lower()
+    if extension in EXCEL_EXTENSIONS:
+        return 'excel'
+    return TABLE_FORMATS.get(extension)
+
+
+def write_table(df: pd.DataFrame, output_path: str):
+    """
+    Write one table as CSV, Parquet or NDJSON (chosen by the file extension)
+
+    Args:
+        df: Table to write
+        output_path: Output file path ending in .csv, .parquet, .ndjson or .jsonl
+
+    Raises:
+        ValueError: If the extension is not one of these formats
+    """
+    output_format = table_format(output_path)
+    tmp_path = f"{output_path}.tmp"
+
+    if output_format == 'csv':
+        df.to_csv(tmp_path, index=False)
+    elif output_format == 'parquet':
+        # Date objects (pay period columns) are stored as Parquet dates
+        df.to_parquet(tmp_path, index=False)
+    elif output_format == 'ndjson':
+        df.to_json(tmp_path, orient='records', lines=True, date_format='iso')
+    else:
+        raise ValueError(f"Unsupported table format for {output_path} "
+                         f"(use {', '.join(sorted(TABLE_FORMATS))})")
+
+    os.replace(tmp_path, output_path)
+    logger.info(f"Wrote {len(df)} rows to {output_path}")
+
+
+def write_excel_report(
+    output_path: str,
+    sheets: List[Tuple[str, pd.DataFrame]],
+    employee_details: Optional[Iterable[Tuple[str, List[Tuple[str, pd.DataFrame]]]]] = None
+):
+    """
+    Stream a report workbook: fixed sheets first, then one detail sheet per employee
+
+    Args:
+        output_path: Path of the .xlsx file to write
+        sheets: List of (sheet title, DataFrame) written in order
+        employee_details: Iterable of (employee name, sections) for detail
+            sheets, consumed lazily one employee at a time (optional)
+    """
+    with ExcelReportWriter(output_path) as writer:
+        for title, df in sheets:
+            writer.write_frame(title, df)
+
+        detail_count = 0
+        for employee_name, sections in employee_details or []:
+            writer.write_sections(employee_name, sections)
+            detail_count += 1
+
+    logger.info(f"Wrote {writer.rows_written} rows to {output_path}"
+               + (f" with {detail_count} employee detail sheets" if detail_count else ""))
+
+
+def summary_frame(report_df: pd.DataFrame, start_date: datetime, end_date: datetime, pay_date: datetime) -> pd.DataFrame:
+    """
+    One-row summary of a single pay period report
+
+    Args:
+        report_df: Payroll report
+        start_date: Start date of pay period
+        end_date: End date of pay period
+        pay_date: Pay date
+
+    Returns:
+        Summary DataFrame
+    """
+    return pd.DataFrame({
+        'Pay Period Start': [start_date.date()],
+        'Pay Period End': [end_date.date()],
+        'Pay Date': [pay_date.date()],
+        'Total Employees': [len(report_df)],
+        'Total Hours': [report_df['total_hours'].sum()],
+        'Total Payroll': [report_df['total_pay'].sum()]
+    })
+
+
+def transaction_detail_frame(transactions_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The transaction columns shown on employee detail sheets
+
+    Detail sheets hold every transaction of every employee, so only the
+    columns pay is derived from are kept; the payment columns are summed
+    into one 'Sales' column.
+
+    Args:
+        transactions_df: Transactions read with the transactions schema
+
+    Returns:
+        DataFrame with the same rows and Date, Service, Sales, Amount, Tip and
+        Discount columns (those present), money in dollars
+    """
+    columns = transactions_df.columns
+    detail = pd.DataFrame(index=transactions_df.index)
+    for role_name, label in (('date', 'Date'), ('service', 'Service')):
+        column = resolve_column(columns, 'transactions', role_name)
+        if column is not None:
+            detail[label] = transactions_df[column]
+
+    payment_columns = resolve_columns(columns, 'transactions', 'payments')
+    if payment_columns:
+        sales_cents = sum(column_cents(transactions_df[column]) for column in payment_columns)
+        detail['Sales'] = sales_cents / 100
+
+    for role_name, label in (('amount', 'Amount'), ('tip', 'Tip'), ('discount', 'Discount')):
+        column = resolve_column(columns, 'transactions', role_name)
+        if column is not None:
+            detail[label] = transactions_df[column]
+            if is_cents(transactions_df[column]):
+                mark_cents(detail, [label])
+    return dollar_columns(detail)
+
+
+def details_as_sections(details: Dict[str, object]) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    Detail sections of one employee as (section name, DataFrame) pairs
+
+    Args:
+        details: Dictionary with optional 'weeks', 'transactions', 'addings'
+            and 'discounts' (DataFrames or lists of records)
+
+    Returns:
+        List of sections in display order
+    """
+    sections = []
+    for key, section_name in (
+        ('weeks', 'Weeks'), ('transactions', 'Transactions'), ('addings', 'Addings'), ('discounts', 'Discounts')
+    ):
+        if key not in details:
+            continue
+        value = details[key]
+        if not isinstance(value, pd.DataFrame):
+            value = pd.DataFrame(value or [])
+        sections.append((section_name, value))
+    return sections
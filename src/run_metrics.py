@@ -0,0 +1,205 @@
+"""
+Run Metrics
+Per-stage timing and volume instrumentation for payroll runs
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+class RunMetrics:
+    """Collects stage and per-employee measurements for one payroll run"""
+
+    def __init__(self, run_name: str = 'payroll'):
+        """
+        Initialize run metrics
+
+        Args:
+            run_name: Name of the run, used as the metric prefix label
+        """
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self.stages: List[Dict] = []
+        self.employee_seconds: Dict[str, float] = {}
+        self.info: Dict[str, object] = {}
+        self._start = time.perf_counter()
+        self._finished_wall_s = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None, data_source=None):
+        """
+        Measure a stage of the run
+
+        Wall time, CPU time of the calling thread and peak RSS are recorded on
+        exit. Set 'rows_in'/'rows_out' on the yielded dictionary when they are
+        only known inside the block. With a data source, bytes it downloads in
+        this thread during the stage are recorded too.
+
+        Args:
+            name: Stage name (e.g. 'timecard')
+            rows_in: Rows going into the stage (optional)
+            data_source: DataSource whose downloads are attributed to the stage (optional)
+
+        Yields:
+            Stage record dictionary
+        """
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        bytes_before = data_source.bytes_downloaded_in_thread() if data_source is not None else None
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_s'] = round(time.thread_time() - cpu_start, 4)
+            record['bytes_downloaded'] = (
+                data_source.bytes_downloaded_in_thread() - bytes_before if data_source is not None else None
+            )
+            record['peak_rss_mb'] = peak_rss_mb()
+            with self._lock:
+                self.stages.append(record)
+
+    def record_employee(self, employee_name: str, seconds: float):
+        """Record the calculation time of one employee"""
+        with self._lock:
+            self.employee_seconds[employee_name] = round(seconds, 6)
+
+    def finish(self):
+        """Freeze the total run time"""
+        self._finished_wall_s = round(time.perf_counter() - self._start, 4)
+
+    @property
+    def wall_s(self) -> float:
+        if self._finished_wall_s is not None:
+            return self._finished_wall_s
+        return round(time.perf_counter() - self._start, 4)
+
+    def to_dict(self) -> Dict:
+        """
+        Run summary
+
+        Returns:
+            Dictionary with run info, total wall time, peak RSS, stages and
+            per-employee calculation times
+        """
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_s': self.wall_s,
+            'peak_rss_mb': peak_rss_mb(),
+            'info': self.info,
+            'stages': self.stages,
+            'employee_seconds': self.employee_seconds
+        }
+
+    def log_summary(self):
+        """Log one line per stage"""
+        logger.info("Run metrics:")
+        for record in self.stages:
+            details = [f"{record['wall_s']:.2f}s wall", f"{record['cpu_s']:.2f}s cpu"]
+            if record['rows_in'] is not None:
+                details.append(f"{record['rows_in']} rows in")
+            if record['rows_out'] is not None:
+                details.append(f"{record['rows_out']} rows out")
+            if record['bytes_downloaded']:
+                details.append(f"{record['bytes_downloaded'] / (1024 * 1024):.1f} MB downloaded")
+            if record['peak_rss_mb'] is not None:
+                details.append(f"peak RSS {record['peak_rss_mb']:.0f} MB")
+            logger.info(f"  {record['stage']:20s} " + ', '.join(details))
+        logger.info(f"  {'total':20s} {self.wall_s:.2f}s wall")
+
+    def write_json(self, path: str):
+        """
+        Write the run summary as JSON
+
+        Args:
+            path: Output file path
+        """
+        self._write_atomic(path, json.dumps(self.to_dict(), indent=2, default=str))
+        logger.info(f"Run metrics written to: {path}")
+
+    def write_prometheus(self, path: str):
+        """
+        Write the run as a Prometheus textfile (node_exporter textfile collector)
+
+        Args:
+            path: Output file path, normally ending in .prom
+        """
+        run = self.run_name
+        lines = []
+
+        def metric(name: str, help_text: str, samples: List):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        metric('payroll_run_timestamp_seconds', 'Unix time the payroll run started',
+               [({'run': run}, round(self.started_at.timestamp(), 3))])
+        metric('payroll_run_wall_seconds', 'Wall time of the whole payroll run',
+               [({'run': run}, self.wall_s)])
+        metric('payroll_run_peak_rss_megabytes', 'Peak resident memory of the payroll process',
+               [({'run': run}, peak_rss_mb())])
+
+        stage_fields = [
+            ('wall_s', 'payroll_stage_wall_seconds', 'Wall time per payroll stage'),
+            ('cpu_s', 'payroll_stage_cpu_seconds', 'CPU time per payroll stage'),
+            ('rows_in', 'payroll_stage_rows_in', 'Rows into each payroll stage'),
+            ('rows_out', 'payroll_stage_rows_out', 'Rows out of each payroll stage'),
+            ('bytes_downloaded', 'payroll_stage_downloaded_bytes', 'Bytes downloaded per payroll stage'),
+            ('peak_rss_mb', 'payroll_stage_peak_rss_megabytes', 'Process peak resident memory at the end of each stage')
+        ]
+        for field, name, help_text in stage_fields:
+            metric(name, help_text, [
+                ({'run': run, 'stage': record['stage']}, record.get(field)) for record in self.stages
+            ])
+
+        metric('payroll_employee_calculation_seconds', 'Calculation time per employee',
+               [({'run': run, 'employee': employee}, seconds)
+                for employee, seconds in self.employee_seconds.items()])
+
+        self._write_atomic(path, '\n'.join(lines) + '\n')
+        logger.info(f"Prometheus metrics written to: {path}")
+
+    @staticmethod
+    def _write_atomic(path: str, text: str):
+        """Write via a temporary file so collectors never read a partial file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def _escape_label(value) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
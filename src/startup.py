@@ -0,0 +1,57 @@
+"""
+Startup Helpers
+Logging setup, timed deferred imports and timecard path resolution, shared by
+the command-line entry points and the library modules
+"""
+
+import glob
+import importlib
+import os
+import time
+from typing import Dict, List
+import logging
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Seconds spent on the first import of each deferred module in this process
+IMPORT_TIMINGS: Dict[str, float] = {}
+
+
+def timed_import(module_name: str):
+    """
+    Import a module and record how long its first import took
+
+    Args:
+        module_name: Module to import (e.g. 'azure_connector')
+
+    Returns:
+        The imported module
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    IMPORT_TIMINGS.setdefault(module_name, time.perf_counter() - start)
+    return module
+
+
+def configure_logging():
+    """Configure logging for command-line runs (library modules never do this themselves)"""
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+
+def resolve_timecard_paths(pattern: str) -> List[str]:
+    """
+    Expand a directory or glob pattern to timecard Excel files
+
+    Args:
+        pattern: Directory containing timecards, or a glob such as "data/input/*.xlsx"
+
+    Returns:
+        Sorted list of file paths (Excel lock files are skipped)
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.xlsx')
+
+    return sorted(
+        path for path in glob.glob(pattern)
+        if os.path.isfile(path) and not os.path.basename(path).startswith('~$')
+    )
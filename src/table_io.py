@@ -0,0 +1,200 @@
+"""
+Table I/O
+Parsing and date-partition helpers shared by the data connectors
+"""
+
+import pandas as pd
+import pyarrow as pa
+import posixpath
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from money import cents_columns, mark_cents
+from table_schemas import TableSchema, filter_by_period
+
+logger = logging.getLogger(__name__)
+
+# Shard file names for partitioned tables: "2025-10" (monthly) or "2025-10-05" (daily)
+PARTITION_NAME_PATTERN = re.compile(r'^(\d{4})-(\d{2})(?:-(\d{2}))?$')
+
+# Table file formats, by extension
+TABLE_EXTENSIONS = ('.csv', '.parquet', '.arrow', '.feather')
+ARROW_EXTENSIONS = ('.arrow', '.feather')
+
+
+def parse_table(file_path: str, content, schema: Optional[TableSchema] = None) -> pd.DataFrame:
+    """
+    Parse a CSV, Parquet or Arrow IPC table from an in-memory buffer
+    
+    The buffer (downloaded bytes or a memory-mapped file) is parsed in place
+    without decoding to str. With a schema, only the schema's columns are
+    parsed and they get explicit dtypes.
+    
+    Args:
+        file_path: Path of the table (the extension selects the format)
+        content: File content as bytes, bytearray or pyarrow Buffer
+        schema: Table schema for column projection and typing (all columns if None)
+        
+    Returns:
+        pandas DataFrame
+    """
+    extension = posixpath.splitext(file_path.lower())[1]
+    if extension == '.parquet':
+        df = pd.read_parquet(pa.BufferReader(content))
+    elif extension in ARROW_EXTENSIONS:
+        table = pa.ipc.open_file(pa.BufferReader(content)).read_all()
+        if schema is not None:
+            table = table.select([col for col in table.column_names if schema.wants_column(col)])
+        df = table.to_pandas()
+    elif schema is not None:
+        df = pd.read_csv(
+            pa.BufferReader(content),
+            encoding='utf-8',
+            usecols=schema.wants_column,
+            dtype=schema.read_dtypes()
+        )
+    else:
+        df = pd.read_csv(pa.BufferReader(content), encoding='utf-8')
+    
+    if schema is not None:
+        df = schema.apply(df)
+    
+    memory_mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
+    logger.info(f"Loaded table: {file_path} ({len(df)} rows, {len(df.columns)} columns, "
+               f"{memory_mb:.1f} MB in memory)")
+    return df
+
+
+def partitions_from_paths(paths: Iterable) -> List[Dict]:
+    """
+    Pick the date-partitioned shards out of a directory listing
+    
+    Args:
+        paths: Path items from ``get_paths`` (name, is_directory, etag, ...)
+        
+    Returns:
+        List of shard dictionaries with 'path', 'first_date', 'last_date', 'size',
+        'etag' and 'last_modified', sorted by date
+    """
+    partitions = []
+    for path in paths:
+        if path.is_directory:
+            continue
+        
+        stem, ext = posixpath.splitext(posixpath.basename(path.name))
+        # A table mirror keeps the shard's own extension ("2025-10.csv.parquet")
+        inner_stem, inner_ext = posixpath.splitext(stem)
+        if inner_ext.lower() in TABLE_EXTENSIONS:
+            stem = inner_stem
+        match = PARTITION_NAME_PATTERN.match(stem)
+        if ext.lower() not in TABLE_EXTENSIONS or match is None:
+            continue
+        
+        year, month, day = match.group(1), match.group(2), match.group(3)
+        try:
+            if day is not None:
+                first_date = datetime(int(year), int(month), int(day)).date()
+                last_date = first_date
+            else:
+                first_date = datetime(int(year), int(month), 1).date()
+                last_date = (pd.Timestamp(first_date) + pd.offsets.MonthEnd(0)).date()
+        except ValueError:
+            logger.warning(f"Skipping partition with invalid date: {path.name}")
+            continue
+        
+        last_modified = getattr(path, 'last_modified', None)
+        partitions.append({
+            'path': path.name,
+            'first_date': first_date,
+            'last_date': last_date,
+            'size': getattr(path, 'content_length', None),
+            'etag': getattr(path, 'etag', None),
+            'last_modified': last_modified.isoformat() if last_modified is not None else None
+        })
+    
+    partitions.sort(key=lambda p: (p['first_date'], p['last_date']))
+    return partitions
+
+
+def select_partitions(partitions: List[Dict], start_date: datetime, end_date: datetime) -> List[Dict]:
+    """Shards that overlap the period"""
+    selected = [
+        p for p in partitions
+        if p['first_date'] <= end_date.date() and p['last_date'] >= start_date.date()
+    ]
+    
+    selected_bytes = sum(p['size'] or 0 for p in selected)
+    logger.info(f"Partition pruning: reading {len(selected)} of {len(partitions)} shards "
+               f"({selected_bytes} bytes)")
+    return selected
+
+
+def partition_version(partition: Dict) -> Optional[Dict[str, Optional[str]]]:
+    """Version info from the directory listing, so shards need no properties request"""
+    if not partition['etag']:
+        return None
+    return {
+        'etag': partition['etag'],
+        'last_modified': partition['last_modified'],
+        'size': partition['size']
+    }
+
+
+def partition_reads(
+    partitions: List[Dict],
+    start_date: datetime,
+    end_date: datetime
+) -> List[Tuple[str, Optional[Dict[str, Optional[str]]]]]:
+    """
+    Shards a connector reads for a period, as (path, version) pairs
+
+    Args:
+        partitions: Shards from a connector's ``list_partitions``
+        start_date: Start date of pay period
+        end_date: End date of pay period
+
+    Returns:
+        List of (shard path, version info or None) in date order
+    """
+    return [(p['path'], partition_version(p)) for p in select_partitions(partitions, start_date, end_date)]
+
+
+def concat_partitions(frames: List[pd.DataFrame], schema: Optional[TableSchema] = None) -> pd.DataFrame:
+    """Concatenate shard frames into one table (empty if no shard overlapped the period)"""
+    if len(frames) == 0:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    
+    # pandas keeps attrs only when every shard has the same; keep every
+    # shard's cents marks so re-applying the schema does not convert them again
+    mark_cents(df, [col for frame in frames for col in cents_columns(frame)])
+    
+    # Shards carry their own category sets; re-apply to restore shared categoricals
+    if schema is not None:
+        df = schema.apply(df)
+    return df
+
+
+def period_rows(df: pd.DataFrame, table_name: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """
+    Rows of a fetched table that fall in a pay period
+
+    Args:
+        df: Table as read by a connector
+        table_name: Schema name ('transactions' or 'discounts')
+        start_date: Start date of pay period
+        end_date: End date of pay period
+
+    Returns:
+        Filtered DataFrame, or the whole table if it has no date column
+    """
+    filtered_df = filter_by_period(df, table_name, start_date, end_date)
+
+    if filtered_df is None:
+        logger.warning(f"No date column found in {table_name} data. Available columns: {df.columns.tolist()}")
+        return df
+
+    logger.info(f"Found {len(filtered_df)} {table_name} in period")
+    return filtered_df
@@ -0,0 +1,247 @@
+"""
+Table Mirror
+Local columnar (Parquet) mirror of Azure tables, revalidated against blob ETags
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import json
+import os
+import re
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Optional, Dict
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Appended to a table's file name, so tables differing only by extension stay apart
+MIRROR_SUFFIX = '.parquet'
+
+# Parquet key-value metadata entry pairing a mirrored data file with its metadata file
+_TOKEN_KEY = b'payroll_mirror_token'
+
+# Entry pandas keeps DataFrame.attrs under (as DataFrame.to_parquet writes it),
+# so read_parquet restores the cents marks of mirrored money columns
+_ATTRS_KEY = b'PANDAS_ATTRS'
+
+
+def source_namespace(account_url: str, container_name: str) -> str:
+    """
+    Relative directory that keeps one storage container's local copies apart
+
+    Locations or containers sharing a cache directory would otherwise
+    overwrite each other's copies of tables with the same path.
+
+    Args:
+        account_url: Storage account URL
+        container_name: Container name
+
+    Returns:
+        Path such as "myaccount.dfs.core.windows.net/reports"
+    """
+    account = urlparse(account_url).netloc or account_url
+    parts = [re.sub(r'[^A-Za-z0-9._-]', '_', part) for part in (account, container_name)]
+    return os.path.join(*parts)
+
+
+class TableMirror:
+    """
+    On-disk Parquet copy of Azure tables keyed by blob ETag
+
+    Every store writes a fresh token into both the Parquet file and its
+    metadata file, and a copy is only loaded when the two tokens match. A
+    crash between the two file replacements, or two threads storing the same
+    table at once, therefore leaves a miss rather than data paired with
+    another version's ETag.
+    """
+
+    def __init__(self, mirror_dir: str, namespace: Optional[str] = None):
+        """
+        Initialize table mirror
+
+        Args:
+            mirror_dir: Local directory that holds the mirrored tables
+            namespace: Subdirectory for one container's tables (see source_namespace)
+        """
+        self.mirror_dir = Path(mirror_dir) / namespace if namespace else Path(mirror_dir)
+        self.mirror_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"Table mirror enabled: {self.mirror_dir}")
+
+    def _data_path(self, file_path: str) -> Path:
+        """Local Parquet path for a table path in the container (its extension kept: X.csv -> X.csv.parquet)"""
+        path = self.mirror_dir / file_path
+        return path.with_name(path.name + MIRROR_SUFFIX)
+
+    def _meta_path(self, file_path: str) -> Path:
+        """Local metadata path for a table path in the container"""
+        path = self.mirror_dir / file_path
+        return path.with_name(path.name + '.meta.json')
+
+    def read_metadata(self, file_path: str) -> Optional[Dict]:
+        """
+        Read stored metadata for a mirrored table
+
+        Args:
+            file_path: Path to table in container
+
+        Returns:
+            Metadata dictionary, or None if the table is not mirrored
+        """
+        meta_path = self._meta_path(file_path)
+        if not meta_path.exists() or not self._data_path(file_path).exists():
+            return None
+
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable mirror metadata {meta_path}: {str(e)}")
+            return None
+
+    def is_current(
+        self,
+        file_path: str,
+        etag: str,
+        last_modified: str = None,
+        schema_key: str = None
+    ) -> bool:
+        """
+        Check whether the mirrored copy matches the blob version
+
+        Args:
+            file_path: Path to table in container
+            etag: Current ETag of the blob
+            last_modified: Current last-modified timestamp of the blob (used when no ETag)
+            schema_key: Signature of the schema the copy must have been read with
+
+        Returns:
+            True if the mirror can be used instead of downloading
+        """
+        meta = self.read_metadata(file_path)
+        if meta is None or meta.get('schema') != schema_key:
+            return False
+
+        if etag:
+            return meta.get('etag') == etag
+        return last_modified is not None and meta.get('last_modified') == last_modified
+
+    def load(
+        self,
+        file_path: str,
+        etag: str,
+        last_modified: str = None,
+        schema_key: str = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Load a mirrored table if it is still current
+
+        Args:
+            file_path: Path to table in container
+            etag: Current ETag of the blob
+            last_modified: Current last-modified timestamp of the blob
+            schema_key: Signature of the schema the copy must have been read with
+
+        Returns:
+            DataFrame from the mirror, or None on a miss
+        """
+        if not self.is_current(file_path, etag, last_modified, schema_key):
+            return None
+
+        token = self.read_metadata(file_path).get('token')
+        try:
+            # One open file for the token check and the data, so a concurrent
+            # replacement can't pair one file's token with another's rows
+            with open(self._data_path(file_path), 'rb') as f:
+                metadata = pq.read_schema(f).metadata or {}
+                if token is None or metadata.get(_TOKEN_KEY) != token.encode('ascii'):
+                    logger.info(f"Mirror copy of {file_path} does not match its metadata; ignoring it")
+                    return None
+                f.seek(0)
+                df = pd.read_parquet(f)
+        except Exception as e:
+            logger.warning(f"Could not read mirror for {file_path}: {str(e)}")
+            return None
+
+        logger.info(f"Mirror hit: {file_path} ({len(df)} rows, etag {etag})")
+        return df
+
+    def store(
+        self,
+        file_path: str,
+        df: pd.DataFrame,
+        etag: str,
+        last_modified: str = None,
+        schema_key: str = None
+    ):
+        """
+        Write a table to the mirror
+
+        Args:
+            file_path: Path to table in container
+            df: Parsed table
+            etag: ETag of the blob the table was parsed from
+            last_modified: Last-modified timestamp of the blob
+            schema_key: Signature of the schema the table was read with
+        """
+        data_path = self._data_path(file_path)
+        meta_path = self._meta_path(file_path)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        token = uuid.uuid4().hex
+
+        # Write to temporary files unique to this call, so a crash never
+        # leaves a torn file and concurrent stores never share one
+        tmp_paths = []
+        try:
+            tmp_data = self._temp_path(data_path)
+            tmp_paths.append(tmp_data)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                _TOKEN_KEY: token.encode('ascii'),
+                _ATTRS_KEY: json.dumps(df.attrs).encode('utf-8')
+            })
+            pq.write_table(table, tmp_data)
+
+            tmp_meta = self._temp_path(meta_path)
+            tmp_paths.append(tmp_meta)
+            with open(tmp_meta, 'w') as f:
+                json.dump({
+                    'source': file_path,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'schema': schema_key,
+                    'token': token,
+                    'rows': len(df),
+                    'columns': [str(col) for col in df.columns]
+                }, f, indent=2)
+
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+            logger.info(f"Mirrored: {file_path} -> {data_path}")
+        except Exception as e:
+            logger.warning(f"Could not mirror {file_path}: {str(e)}")
+            for tmp in tmp_paths:
+                tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _temp_path(path: Path) -> Path:
+        """New empty temporary file next to a path"""
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix='.tmp')
+        os.close(fd)
+        return Path(tmp_name)
+
+    def invalidate(self, file_path: str):
+        """
+        Remove a table from the mirror
+
+        Args:
+            file_path: Path to table in container
+        """
+        for path in (self._data_path(file_path), self._meta_path(file_path)):
+            if path.exists():
+                path.unlink()
@@ -0,0 +1,277 @@
+"""
+Table Schemas
+Typed column definitions and column projection for the Azure tables
+"""
+
+import pandas as pd
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Iterable, Tuple
+import logging
+
+from money import mark_cents, to_cents
+
+logger = logging.getLogger(__name__)
+
+# Bump when apply() changes how typed columns are represented (e.g. how cents
+# columns are marked), so copies cached by older code are read again
+TYPED_FORMAT_VERSION = 2
+
+
+class ColumnRole:
+    """A logical column (e.g. 'tip') and the physical names it may appear under"""
+
+    def __init__(self, name: str, candidates: List[str], dtype: str, match_all: bool = False):
+        """
+        Initialize column role
+
+        Args:
+            name: Role name used by the calculators (e.g. 'tip', 'date')
+            candidates: Physical column names in order of preference
+            dtype: Target type: 'category', 'datetime', 'float', 'cents' (money
+                as whole cents marked with money.mark_cents) or 'string'
+            match_all: Keep every candidate present instead of only the first
+        """
+        self.name = name
+        self.candidates = candidates
+        self.dtype = dtype
+        self.match_all = match_all
+
+
+class TableSchema:
+    """Column roles for one Azure table"""
+
+    def __init__(self, name: str, roles: List[ColumnRole]):
+        """
+        Initialize table schema
+
+        Args:
+            name: Table name (matches the keys under `azure_tables` in config)
+            roles: Column roles read from this table
+        """
+        self.name = name
+        self.roles = {role.name: role for role in roles}
+
+    @property
+    def signature(self) -> str:
+        """Stable description of the schema, used to invalidate cached copies"""
+        parts = [
+            f"{role.name}:{role.dtype}:{'all' if role.match_all else 'first'}:{','.join(role.candidates)}"
+            for role in self.roles.values()
+        ]
+        return f"v{TYPED_FORMAT_VERSION}|{self.name}|" + '|'.join(parts)
+
+    def resolve(self, columns: Iterable[str], role_name: str) -> Optional[str]:
+        """
+        Find the physical column for a role
+
+        Args:
+            columns: Columns available in the table
+            role_name: Role to resolve
+
+        Returns:
+            Column name, or None if no candidate is present
+        """
+        resolved = self.resolve_all(columns, role_name)
+        return resolved[0] if resolved else None
+
+    def resolve_all(self, columns: Iterable[str], role_name: str) -> List[str]:
+        """
+        Find every physical column present for a role, in order of preference
+
+        Args:
+            columns: Columns available in the table
+            role_name: Role to resolve
+
+        Returns:
+            List of column names (empty if none are present)
+        """
+        available = set(columns)
+        return [col for col in self.roles[role_name].candidates if col in available]
+
+    def projected_columns(self, columns: Iterable[str]) -> List[str]:
+        """
+        Columns to keep when reading a table with this schema
+
+        Args:
+            columns: Columns available in the table
+
+        Returns:
+            List of column names in table order
+        """
+        columns = list(columns)
+        keep = set()
+        for role in self.roles.values():
+            present = self.resolve_all(columns, role.name)
+            keep.update(present if role.match_all else present[:1])
+        return [col for col in columns if col in keep]
+
+    def wants_column(self, column: str) -> bool:
+        """Whether a column is a candidate for any role (for read_csv usecols)"""
+        return any(column in role.candidates for role in self.roles.values())
+
+    def read_dtypes(self) -> Dict[str, str]:
+        """
+        Dtypes that can be applied while parsing CSV
+
+        Returns:
+            Mapping of candidate column name to pandas dtype
+        """
+        dtypes = {}
+        for role in self.roles.values():
+            if role.dtype == 'category':
+                for col in role.candidates:
+                    dtypes.setdefault(col, 'category')
+        return dtypes
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Project a parsed table to the schema's columns and convert types
+
+        Numbers and dates are converted after parsing with errors coerced to NaN/NaT,
+        so a stray malformed value does not fail the whole load. Money columns
+        become whole cents here, once, and are marked as cents (money.mark_cents);
+        applying the schema again leaves them as they are.
+
+        Args:
+            df: Parsed table
+
+        Returns:
+            Projected, typed DataFrame
+        """
+        df = df[self.projected_columns(df.columns)]
+
+        converted = {}
+        cents_columns = []
+        for role in self.roles.values():
+            for col in self.resolve_all(df.columns, role.name):
+                if col in converted:
+                    continue
+                if role.dtype == 'datetime':
+                    converted[col] = pd.to_datetime(df[col], errors='coerce')
+                elif role.dtype == 'float':
+                    converted[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+                elif role.dtype == 'cents':
+                    converted[col] = to_cents(df[col])
+                    cents_columns.append(col)
+                elif role.dtype == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                    converted[col] = df[col].astype('category')
+
+        if converted:
+            df = df.assign(**converted)
+        return mark_cents(df, cents_columns) if cents_columns else df
+
+
+# Columns the calculators read from each table. Candidate lists replace the
+# column-name guessing that used to be repeated across the calculators.
+EMPLOYEE_NAME_COLUMNS = [
+    'ServiceProviderFirstName', 'ServiceProviderLastName', 'ServiceProvider',
+    'EmployeeName', 'Employee', 'Stylist', 'Provider'
+]
+
+PAYMENT_COLUMNS = ['CCAmount', 'CashAmount', 'CheckAmount', 'ACHAmount', 'VagaroPayLaterAmount', 'OtherAmount']
+
+TABLE_SCHEMAS = {
+    'transactions': TableSchema('transactions', [
+        ColumnRole('date', ['Date', 'TransactionDate', 'CreatedDate', 'InvoiceDate'], 'datetime'),
+        ColumnRole('provider_id', ['ServiceProviderID'], 'category'),
+        ColumnRole('employee', EMPLOYEE_NAME_COLUMNS, 'category', match_all=True),
+        ColumnRole('payments', PAYMENT_COLUMNS, 'cents', match_all=True),
+        ColumnRole('amount', ['Amount', 'Total', 'TransactionAmount', 'TotalAmount', 'Price', 'ServiceAmount'], 'cents'),
+        ColumnRole('tip', ['Tip', 'Tips', 'TipAmount', 'Gratuity'], 'cents'),
+        ColumnRole('discount', ['Discount', 'DiscountAmount', 'DiscountValue'], 'cents'),
+        ColumnRole('service', ['ServiceTitle', 'Service', 'ServiceName', 'Product', 'ProductName', 'ItemName'], 'category'),
+    ]),
+    'service_providers': TableSchema('service_providers', [
+        ColumnRole('provider_id', ['ServiceProviderID'], 'category'),
+        ColumnRole('first_name', ['ServiceProviderFirstName'], 'string'),
+        ColumnRole('last_name', ['ServiceProviderLastName'], 'string'),
+        ColumnRole('status', ['ServiceProviderStatus'], 'category'),
+    ]),
+    'discounts': TableSchema('discounts', [
+        ColumnRole('date', ['Date', 'DiscountDate', 'CreatedDate'], 'datetime'),
+        ColumnRole('provider_id', ['ServiceProviderID'], 'category'),
+        ColumnRole('employee', EMPLOYEE_NAME_COLUMNS, 'category', match_all=True),
+        ColumnRole('amount', ['DiscountAmount', 'Discount', 'DiscountValue', 'Amount'], 'cents'),
+    ]),
+}
+
+
+def get_schema(table_name: str) -> Optional[TableSchema]:
+    """
+    Look up the schema for a table
+
+    Args:
+        table_name: Table name (e.g. 'transactions')
+
+    Returns:
+        TableSchema, or None if the table is read untyped
+    """
+    return TABLE_SCHEMAS.get(table_name)
+
+
+@lru_cache(maxsize=256)
+def _resolve_cached(table_name: str, role_name: str, columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Role resolution memoized per table header, so repeated lookups on one frame are free"""
+    return tuple(TABLE_SCHEMAS[table_name].resolve_all(columns, role_name))
+
+
+def resolve_column(columns: Iterable[str], table_name: str, role_name: str) -> Optional[str]:
+    """
+    Find the physical column for a role in a table
+
+    Args:
+        columns: Columns available in the table
+        table_name: Table name (e.g. 'transactions')
+        role_name: Role to resolve (e.g. 'tip')
+
+    Returns:
+        Column name, or None if no candidate is present
+    """
+    resolved = _resolve_cached(table_name, role_name, tuple(columns))
+    return resolved[0] if resolved else None
+
+
+def resolve_columns(columns: Iterable[str], table_name: str, role_name: str) -> List[str]:
+    """
+    Find every physical column present for a role in a table
+
+    Args:
+        columns: Columns available in the table
+        table_name: Table name (e.g. 'transactions')
+        role_name: Role to resolve (e.g. 'payments')
+
+    Returns:
+        List of column names
+    """
+    return list(_resolve_cached(table_name, role_name, tuple(columns)))
+
+
+def filter_by_period(
+    df: pd.DataFrame,
+    table_name: str,
+    start_date: datetime,
+    end_date: datetime
+) -> Optional[pd.DataFrame]:
+    """
+    Keep the rows of a table whose date falls in [start_date, end_date]
+
+    Args:
+        df: Table read with its schema (date column already parsed)
+        table_name: Table name (e.g. 'transactions')
+        start_date: Start date of pay period
+        end_date: End date of pay period
+
+    Returns:
+        Filtered DataFrame, or None if the table has no date column
+    """
+    date_col = resolve_column(df.columns, table_name, 'date')
+    if date_col is None:
+        return None
+
+    dates = df[date_col]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+
+    mask = (dates >= start_date) & (dates <= end_date)
+    return df[mask].copy()
@@ -0,0 +1,164 @@
+"""
+Timecard Cache
+Caches parsed timecards keyed by the content hash of the Excel file
+"""
+
+import pandas as pd
+import hashlib
+import os
+import pickle
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload layout changes so old entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+class TimecardCache:
+    """Content-addressed cache of parsed timecards with size and age eviction"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_days: float = 30
+    ):
+        """
+        Initialize timecard cache
+
+        Entries are pickled, so the cache directory must only be writable by
+        trusted users.
+
+        Args:
+            cache_dir: Directory that holds cached timecards
+            max_bytes: Total size above which the least recently used entries are evicted
+            max_age_days: Entries not used for this many days are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600
+
+        logger.info(f"Timecard cache enabled: {self.cache_dir}")
+
+    @staticmethod
+    def content_hash(file_path: str) -> str:
+        """
+        Hash the content of a timecard file
+
+        Args:
+            file_path: Path to timecard Excel file
+
+        Returns:
+            Hex SHA-256 digest of the file content
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Load a cached timecard
+
+        Args:
+            key: Content hash of the timecard file
+
+        Returns:
+            Dictionary with 'timecard_df', 'start_date', 'end_date' and
+            'hours_by_employee', or None on a miss
+        """
+        path = self._entry_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable timecard cache entry {path.name}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if payload.get('version') != CACHE_FORMAT_VERSION:
+            path.unlink(missing_ok=True)
+            return None
+
+        # Mark as recently used for LRU eviction
+        os.utime(path)
+        logger.info(f"Timecard cache hit: {key[:12]}")
+        return payload['data']
+
+    def put(
+        self,
+        key: str,
+        timecard_df: pd.DataFrame,
+        start_date: datetime,
+        end_date: datetime,
+        hours_by_employee: Dict[str, float]
+    ):
+        """
+        Store a parsed timecard
+
+        Args:
+            key: Content hash of the timecard file
+            timecard_df: Parsed timecard entries
+            start_date: Pay period start
+            end_date: Pay period end
+            hours_by_employee: Total hours per employee
+        """
+        path = self._entry_path(key)
+        tmp_path = path.with_name(path.name + '.tmp')
+        payload = {
+            'version': CACHE_FORMAT_VERSION,
+            'data': {
+                'timecard_df': timecard_df,
+                'start_date': start_date,
+                'end_date': end_date,
+                'hours_by_employee': hours_by_employee
+            }
+        }
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            logger.info(f"Cached timecard: {key[:12]} ({path.stat().st_size} bytes)")
+        except Exception as e:
+            logger.warning(f"Could not cache timecard: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove entries that are too old, then least recently used entries over the size limit"""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                logger.info(f"Evicted expired timecard cache entry: {path.name}")
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            logger.info(f"Evicted timecard cache entry over size limit: {path.name}")
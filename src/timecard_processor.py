@@ -4,14 +4,111 @@ Handles reading and processing timecard Excel files
 """
 
 import pandas as pd
+import numpy as np
+import openpyxl
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import re
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of rows above the column header row on the TimeCard sheet
+TIMECARD_HEADER_ROW = 3
+
+DAYS_PER_WEEK = 7
+
+
+def pay_weeks(start_date: datetime, end_date: datetime) -> int:
+    """
+    Number of weeks in a pay period, counted from its start date
+
+    A biweekly period has 2; a last partial week counts as a week.
+
+    Args:
+        start_date: Start of pay period
+        end_date: End of pay period (inclusive)
+
+    Returns:
+        Number of weeks (at least 1)
+    """
+    days = (pd.Timestamp(end_date).normalize() - pd.Timestamp(start_date).normalize()).days + 1
+    return max(1, -(-days // DAYS_PER_WEEK))
+
+
+def week_numbers(dates: pd.Series, start_date: datetime, weeks: int) -> np.ndarray:
+    """
+    Week of the pay period (0 for the first) of each date
+
+    Weeks start on the period's start date, as in the web app's week 1 /
+    week 2 split. Dates before or after the period fall in the first or last
+    week; missing or unparseable dates fall in the first.
+
+    Args:
+        dates: Dates or timestamps (datetimes or date strings)
+        start_date: Start of pay period
+        weeks: Number of weeks in the period (see pay_weeks)
+
+    Returns:
+        int64 array of week numbers
+    """
+    dates = pd.Series(dates, copy=False)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce', format='mixed')
+    days = (dates - pd.Timestamp(start_date).normalize()).dt.days
+    return (days // DAYS_PER_WEEK).fillna(0).clip(0, weeks - 1).to_numpy(dtype=np.int64)
+
+
+class TimecardReader:
+    """
+    A timecard workbook opened once: the pay period is read on open and the
+    entries when asked for, from the same streaming row iterator
+    """
+
+    def __init__(self, processor: 'TimecardProcessor', file_path: str):
+        """
+        Open a timecard and read its pay period
+
+        Args:
+            processor: TimecardProcessor that parses the rows
+            file_path: Path to timecard Excel file
+        """
+        self.processor = processor
+        self.file_path = file_path
+        self._workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            self._rows = self._workbook['TimeCard'].iter_rows(values_only=True)
+
+            # First 3 rows hold the title and date range; row 4 is the header
+            preamble = [next(self._rows, ()) for _ in range(TIMECARD_HEADER_ROW)]
+            self.start_date, self.end_date = processor._parse_date_range(processor._find_date_range(preamble))
+        except Exception:
+            self.close()
+            raise
+
+    def read_entries(self) -> pd.DataFrame:
+        """
+        Read the timecard entries and close the workbook
+
+        Returns:
+            Timecard DataFrame
+        """
+        try:
+            header = next(self._rows, ())
+            data = [row for row in self._rows if any(value is not None for value in row)]
+        finally:
+            self.close()
+
+        df = self.processor._entries_to_dataframe(header, data)
+        logger.info(f"Loaded {len(df)} timecard entries")
+        return df
+
+    def close(self):
+        """Close the workbook (safe to call more than once)"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
 
 class TimecardProcessor:
     """Process timecard Excel files"""
@@ -20,44 +117,85 @@ class TimecardProcessor:
         """Initialize timecard processor"""
         logger.info("TimecardProcessor initialized")
     
-    def read_timecard(self, file_path: str) -> pd.DataFrame:
+    def load_timecard(self, file_path: str) -> Tuple[pd.DataFrame, datetime, datetime]:
         """
-        Read timecard Excel file
+        Read timecard entries and pay period in a single pass over the workbook
+        
+        The workbook is opened once in openpyxl's streaming read-only mode and
+        the period header and data rows are taken from the same row iterator.
         
         Args:
             file_path: Path to timecard Excel file
             
         Returns:
-            DataFrame with timecard data
+            Tuple of (timecard DataFrame, start_date, end_date)
         """
-        logger.info(f"Reading timecard: {file_path}")
-        
-        # Read Excel file, skipping first 3 rows to get to actual data
-        df = pd.read_excel(file_path, sheet_name='TimeCard', skiprows=3)
+        reader = self.open_timecard(file_path)
+        return reader.read_entries(), reader.start_date, reader.end_date
+    
+    def open_timecard(self, file_path: str) -> TimecardReader:
+        """
+        Open a timecard and read its pay period, leaving the entries for later
         
-        # Clean data - remove rows with NaN in Entry Date
-        df = df[df['Entry Date'].notna()].copy()
+        Lets a caller start work that needs only the pay period (such as
+        table downloads) before the entries are parsed, without opening the
+        workbook twice.
         
-        # Remove total row
-        df = df[~df['Employee'].isna()]
+        Args:
+            file_path: Path to timecard Excel file
+            
+        Returns:
+            TimecardReader with start_date and end_date set
+        """
+        logger.info(f"Reading timecard: {file_path}")
+        return TimecardReader(self, file_path)
+    
+    def read_timecard(self, file_path: str) -> pd.DataFrame:
+        """
+        Read timecard Excel file
         
-        logger.info(f"Loaded {len(df)} timecard entries")
+        Args:
+            file_path: Path to timecard Excel file
+            
+        Returns:
+            DataFrame with timecard data
+        """
+        df, _, _ = self.load_timecard(file_path)
         return df
     
     def parse_pay_period(self, file_path: str) -> Tuple[datetime, datetime]:
         """
         Parse pay period dates from timecard file
         
+        Only the first rows of the sheet are streamed; data rows are not read.
+        
         Args:
             file_path: Path to timecard Excel file
             
         Returns:
             Tuple of (start_date, end_date)
         """
-        # Read first row to get date range
-        df_raw = pd.read_excel(file_path, sheet_name='TimeCard', nrows=1)
-        date_range_str = df_raw.iloc[0, 0]
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook['TimeCard'].iter_rows(max_row=TIMECARD_HEADER_ROW, values_only=True)
+            preamble = list(rows)
+        finally:
+            workbook.close()
+        
+        return self._parse_date_range(self._find_date_range(preamble))
+    
+    def _find_date_range(self, preamble: List[tuple]) -> str:
+        """Find the "Oct 5, 2025 to Oct 18, 2025" cell in the rows above the header"""
+        # The date range sits under the report title; fall back to any row above the header
+        ordered = preamble[1:2] + preamble[:1] + preamble[2:]
+        for row in ordered:
+            if row and isinstance(row[0], str) and ' to ' in row[0]:
+                return row[0]
         
+        raise ValueError(f"Pay period not found in timecard header rows: {preamble}")
+    
+    def _parse_date_range(self, date_range_str: str) -> Tuple[datetime, datetime]:
+        """Parse a "<start> to <end>" string into dates"""
         logger.info(f"Pay period string: {date_range_str}")
         
         # Parse date range (e.g., "Oct 5, 2025 to Oct 18, 2025")
@@ -72,6 +210,26 @@ class TimecardProcessor:
             logger.error(f"Error parsing pay period: {str(e)}")
             raise
     
+    def _entries_to_dataframe(self, header: tuple, data: List[tuple]) -> pd.DataFrame:
+        """Build the cleaned timecard DataFrame from raw worksheet rows"""
+        # Name blank header cells the way pandas.read_excel does
+        columns = [
+            value if value is not None else f"Unnamed: {i}"
+            for i, value in enumerate(header)
+        ]
+        width = len(columns)
+        df = pd.DataFrame([row[:width] + (None,) * (width - len(row)) for row in data], columns=columns)
+        
+        # Empty columns come back as float NaN from read_excel, not None
+        df = df.astype({col: 'float64' for col in df.columns if df[col].isna().all()})
+        
+        # Clean data - remove rows with NaN in Entry Date
+        df = df[df['Entry Date'].notna()].copy()
+        
+        # Remove total row
+        df = df[~df['Employee'].isna()]
+        return df
+    
     def parse_hours(self, hours_str: str) -> float:
         """
         Parse hours string (e.g., "9h 18m") to decimal hours
@@ -105,6 +263,26 @@ class TimecardProcessor:
             logger.warning(f"Error parsing hours '{hours_str}': {str(e)}")
             return 0.0
     
+    def parse_hours_series(self, hours: pd.Series) -> pd.Series:
+        """
+        Parse a whole column of hours strings (e.g. "9h 18m") to decimal hours
+        
+        Vectorized equivalent of parse_hours: missing, "----" and unparseable
+        values become 0.0, and each entry is rounded to 2 decimals.
+        
+        Args:
+            hours: Series of hours strings in format "Xh Ym"
+            
+        Returns:
+            Series of decimal hours
+        """
+        text = hours.astype('string')
+        hour_part = pd.to_numeric(text.str.extract(r'(\d+)h', expand=False), errors='coerce').fillna(0)
+        minute_part = pd.to_numeric(text.str.extract(r'(\d+)m', expand=False), errors='coerce').fillna(0)
+        
+        total_hours = hour_part + minute_part / 60.0
+        return total_hours.astype('float64').round(2)
+    
     def calculate_total_hours_by_employee(self, timecard_df: pd.DataFrame) -> Dict[str, float]:
         """
         Calculate total hours for each employee
@@ -118,7 +296,7 @@ class TimecardProcessor:
         logger.info("Calculating total hours by employee")
         
         # Parse hours for each entry
-        timecard_df['hours_decimal'] = timecard_df['Total Hours'].apply(self.parse_hours)
+        timecard_df['hours_decimal'] = self.parse_hours_series(timecard_df['Total Hours'])
         
         # Group by employee and sum hours
         hours_by_employee = timecard_df.groupby('Employee')['hours_decimal'].sum().to_dict()
@@ -129,6 +307,37 @@ class TimecardProcessor:
         
         return hours_by_employee
     
+    def calculate_weekly_hours_by_employee(
+        self,
+        timecard_df: pd.DataFrame,
+        start_date: datetime,
+        end_date: datetime
+    ) -> pd.DataFrame:
+        """
+        Calculate hours for each employee and week of the pay period
+        
+        Entries are assigned to weeks by their Entry Date (see week_numbers),
+        so the weeks of an employee add up to their total hours.
+        
+        Args:
+            timecard_df: DataFrame with timecard data
+            start_date: Start of pay period
+            end_date: End of pay period
+            
+        Returns:
+            DataFrame indexed by employee name with one column of hours per
+            week (0 for the first week)
+        """
+        weeks = pay_weeks(start_date, end_date)
+        hours = self.parse_hours_series(timecard_df['Total Hours'])
+        week = week_numbers(timecard_df['Entry Date'], start_date, weeks)
+        
+        weekly_hours = hours.groupby([timecard_df['Employee'].to_numpy(), week]).sum().unstack(fill_value=0.0)
+        weekly_hours = weekly_hours.reindex(columns=range(weeks), fill_value=0.0).round(2)
+        weekly_hours.index.name = 'Employee'
+        weekly_hours.columns.name = 'week'
+        return weekly_hours
+    
     def get_employee_role(self, timecard_df: pd.DataFrame, employee_name: str) -> str:
         """
         Get employee role from timecard
@@ -222,7 +431,7 @@ class TimecardProcessor:
         logger.info("Generating timecard summary")
         
         # Calculate hours
-        timecard_df['hours_decimal'] = timecard_df['Total Hours'].apply(self.parse_hours)
+        timecard_df['hours_decimal'] = self.parse_hours_series(timecard_df['Total Hours'])
         
         # Group by employee
         summary = timecard_df.groupby(['Employee', 'Role']).agg({
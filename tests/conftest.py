@@ -0,0 +1,9 @@
+"""
+Test configuration
+The modules in src/ import each other by flat name, as when run as scripts
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,169 @@
+"""
+Tests for the daily aggregate store's range queries against a raw groupby
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from daily_aggregates import DailyAggregateStore
+from money import CENTS_DTYPE, is_cents, mark_cents
+from table_schemas import filter_by_period
+from timecard_processor import pay_weeks, week_numbers
+
+PROVIDERS = ['101', '102', '103', '104']
+
+
+@pytest.fixture(params=['timestamps', 'date_only'])
+def transactions(request) -> pd.DataFrame:
+    """
+    Random transactions over two months, amounts in cents as read through the schema
+
+    With timestamps, some rows are stamped exactly at midnight; date-only
+    rows are all at midnight.
+    """
+    rng = np.random.default_rng(7)
+    count = 3000
+    timestamps = pd.Timestamp('2025-09-01') + pd.to_timedelta(rng.integers(0, 61 * 24 * 60, count), unit='min')
+    at_midnight = rng.random(count) < 0.1 if request.param == 'timestamps' else np.ones(count, dtype=bool)
+    timestamps = timestamps.where(~at_midnight, timestamps.normalize())
+
+    def cents(low: int, high: int) -> pd.Series:
+        values = pd.Series(rng.integers(low, high, count), dtype=CENTS_DTYPE)
+        values[rng.random(count) < 0.1] = pd.NA
+        return values
+
+    return mark_cents(pd.DataFrame({
+        'TransactionDate': timestamps,
+        # Provider 104 never has a transaction
+        'ServiceProviderID': pd.Series(rng.choice(PROVIDERS[:3], count)).astype('category'),
+        'CCAmount': cents(0, 20000),
+        'CashAmount': cents(0, 5000),
+        'Tip': cents(0, 3000),
+        'Discount': cents(-1000, 0)
+    }), ['CCAmount', 'CashAmount', 'Tip', 'Discount'])
+
+
+@pytest.fixture
+def store(tmp_path, transactions) -> DailyAggregateStore:
+    store = DailyAggregateStore(str(tmp_path / 'aggregates'))
+    store.update(transactions, datetime(2025, 9, 1), datetime(2025, 10, 31))
+    return store
+
+
+def _grouped(rows: pd.DataFrame, by) -> pd.DataFrame:
+    """Totals of rows by a plain groupby, in cents as the store reports them"""
+    rows = rows.assign(
+        ServiceProviderID=rows['ServiceProviderID'].astype(str),
+        sales=rows['CCAmount'].fillna(0) + rows['CashAmount'].fillna(0)
+    )
+    grouped = rows.groupby(by, observed=True).agg(
+        total_sales=('sales', 'sum'),
+        tips=('Tip', lambda values: values.fillna(0).sum()),
+        total_discounts=('Discount', lambda values: values.fillna(0).sum()),
+        transaction_count=('sales', 'size')
+    )
+    for column in ('total_sales', 'tips', 'total_discounts'):
+        grouped[column] = grouped[column].astype('int64')
+    return grouped
+
+
+def _raw_day_totals(transactions: pd.DataFrame, first_day, last_day) -> pd.DataFrame:
+    """Totals of the rows whose day is in [first_day, last_day]"""
+    day = transactions['TransactionDate'].dt.normalize()
+    return _grouped(transactions[(day >= first_day) & (day <= last_day)], 'ServiceProviderID')
+
+
+def _assert_totals_equal(actual: pd.DataFrame, expected: pd.DataFrame):
+    expected = expected.reindex(actual.index, fill_value=0)
+    for column in ('total_sales', 'tips', 'total_discounts'):
+        assert is_cents(actual[column])
+        np.testing.assert_array_equal(actual[column].to_numpy(), expected[column].to_numpy(dtype=np.int64))
+    np.testing.assert_array_equal(actual['transaction_count'].to_numpy(), expected['transaction_count'].to_numpy())
+
+
+@pytest.mark.parametrize('first_day, last_day', [
+    ('2025-09-01', '2025-10-31'),
+    ('2025-09-14', '2025-09-27'),
+    ('2025-10-05', '2025-10-05'),
+    ('2025-08-01', '2025-09-03'),   # starts before the first stored day
+    ('2025-10-30', '2025-11-15')    # ends after the last stored day
+])
+def test_range_totals_match_groupby(store, transactions, first_day, last_day):
+    first_day, last_day = pd.Timestamp(first_day), pd.Timestamp(last_day)
+    totals = store.range_totals(first_day, last_day)
+    expected = _raw_day_totals(transactions, first_day, last_day)
+
+    assert sorted(totals.index) == sorted(expected.index)
+    _assert_totals_equal(totals, expected)
+
+
+def test_range_totals_for_requested_providers(store, transactions):
+    first_day, last_day = pd.Timestamp('2025-09-10'), pd.Timestamp('2025-09-20')
+    totals = store.range_totals(first_day, last_day, [102, '104', '999'])
+    expected = _raw_day_totals(transactions, first_day, last_day)
+
+    assert list(totals.index) == ['102', '104', '999']
+    _assert_totals_equal(totals, expected)
+    assert (totals.loc[['104', '999']].to_numpy() == 0).all()
+
+
+def test_empty_range_is_zero(store):
+    totals = store.range_totals(pd.Timestamp('2025-10-10'), pd.Timestamp('2025-10-01'), PROVIDERS)
+    assert (totals.to_numpy() == 0).all()
+
+
+PERIODS = [
+    (datetime(2025, 9, 7), datetime(2025, 9, 21)),   # two whole weeks
+    (datetime(2025, 9, 3), datetime(2025, 10, 1)),   # four weeks
+    (datetime(2025, 9, 3), datetime(2025, 9, 13)),   # a short last week
+    (datetime(2025, 9, 7), datetime(2025, 9, 20, 23, 59, 59, 999999))   # end at the last instant
+]
+
+
+@pytest.mark.parametrize('start_date, end_date', PERIODS)
+def test_period_totals_match_raw_filter(store, transactions, start_date, end_date):
+    # The raw path keeps start <= TransactionDate <= end: with date-only
+    # data that is the whole end day
+    rows = filter_by_period(transactions, 'transactions', start_date, end_date)
+    expected = _grouped(rows, 'ServiceProviderID')
+    totals = store.period_totals(start_date, end_date)
+
+    assert sorted(totals.index) == sorted(expected.index)
+    _assert_totals_equal(totals, expected)
+
+
+@pytest.mark.parametrize('start_date, end_date', PERIODS)
+def test_weekly_totals_match_raw_filter(store, transactions, start_date, end_date):
+    rows = filter_by_period(transactions, 'transactions', start_date, end_date)
+    rows = rows.assign(week=week_numbers(rows['TransactionDate'], start_date, pay_weeks(start_date, end_date)))
+    expected = _grouped(rows, ['ServiceProviderID', 'week'])
+    totals = store.weekly_totals(start_date, end_date)
+
+    assert sorted(totals.index) == sorted(expected.index)
+    _assert_totals_equal(totals, expected)
+
+    # The weeks add up to the period
+    period = store.period_totals(start_date, end_date)
+    summed = totals.groupby(level='ServiceProviderID').sum()
+    _assert_totals_equal(summed.reindex(period.index), period)
+
+
+def test_store_reloads_from_disk(store, tmp_path):
+    reloaded = DailyAggregateStore(str(tmp_path / 'aggregates'))
+    first_day, last_day = pd.Timestamp('2025-09-01'), pd.Timestamp('2025-10-31')
+    pd.testing.assert_frame_equal(reloaded.range_totals(first_day, last_day), store.range_totals(first_day, last_day))
+
+
+def test_update_replaces_every_day_in_range(store, transactions):
+    # Re-reading a range without a provider's rows removes their stored days
+    day = transactions['TransactionDate'].dt.normalize()
+    in_range = (day >= '2025-09-10') & (day <= '2025-09-20')
+    kept = transactions[~(in_range & (transactions['ServiceProviderID'] == '101'))]
+    store.update(kept[in_range[kept.index]], datetime(2025, 9, 10), datetime(2025, 9, 20))
+
+    totals = store.range_totals(pd.Timestamp('2025-09-01'), pd.Timestamp('2025-10-31'))
+    expected = _raw_day_totals(kept, pd.Timestamp('2025-09-01'), pd.Timestamp('2025-10-31'))
+    _assert_totals_equal(totals, expected)
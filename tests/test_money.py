@@ -0,0 +1,157 @@
+"""
+Tests for the integer-cents helpers and the payroll rounding policy
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from money import (
+    CENTS_DTYPE, _divide_round, apply_rate, cents_columns, column_cents, dollar_columns,
+    dollars_to_cents, hourly_pay_cents, is_cents, mark_cents, round_half_away, sum_cents, to_cents
+)
+from table_io import concat_partitions, parse_table
+from table_schemas import TABLE_SCHEMAS
+
+
+def _exact(cents: int, rate: str) -> int:
+    """Reference: cents * rate in exact decimal arithmetic, rounded half away from zero"""
+    return int((Decimal(cents) * Decimal(rate)).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2.5', 3), ('-2.5', -3), ('0.5', 1), ('-0.5', -1),
+    ('2.4999', 2), ('-2.4999', -2), ('0', 0)
+])
+def test_round_half_away(value, expected):
+    assert round_half_away(Decimal(value)) == expected
+
+
+@pytest.mark.parametrize('numerator, denominator, expected', [
+    (5, 10, 1), (-5, 10, -1),      # exactly half a unit
+    (15, 10, 2), (-15, 10, -2),
+    (14, 10, 1), (-14, 10, -1),
+    (16, 10, 2), (-16, 10, -2),
+    (0, 7, 0)
+])
+def test_divide_round_halves_away_from_zero(numerator, denominator, expected):
+    assert _divide_round(numerator, denominator) == expected
+
+
+def test_divide_round_arrays():
+    result = _divide_round(np.array([5, -5, 15, -15, 14]), 10)
+    assert result.dtype == np.int64
+    assert result.tolist() == [1, -1, 2, -2, 1]
+
+
+@pytest.mark.parametrize('rate', ['0.4', '0.333', '0.5', '0.1'])
+def test_apply_rate_matches_exact_decimal(rate):
+    cents = np.arange(-5000, 5001, dtype=np.int64)
+    expected = [_exact(int(c), rate) for c in cents]
+    assert apply_rate(cents, float(rate)).tolist() == expected
+    assert [apply_rate(int(c), float(rate)) for c in cents[::97]] == expected[::97]
+
+
+def test_apply_rate_half_cents():
+    # 0.5 of an odd cent count is exactly half a cent
+    assert apply_rate(1, 0.5) == 1
+    assert apply_rate(-1, 0.5) == -1
+    assert apply_rate(3, 0.5) == 2
+    assert apply_rate(-3, 0.5) == -2
+    # 150 * 0.333 = 49.95 and 101 * 0.4 = 40.4
+    assert apply_rate(150, 0.333) == 50
+    assert apply_rate(-150, 0.333) == -50
+    assert apply_rate(101, 0.4) == 40
+    assert apply_rate(-101, 0.4) == -40
+
+
+def test_apply_rate_is_exact_where_floats_are_not():
+    # 90 * 0.35 is 31.499999999999996 as floats; exactly 31.5 cents
+    assert apply_rate(90, 0.35) == 32
+    assert apply_rate(-90, 0.35) == -32
+    assert apply_rate(125, 0.4) == 50
+    assert isinstance(apply_rate(125, 0.4), int)
+
+
+def test_hourly_pay_cents():
+    assert hourly_pay_cents(2.5, 15.0) == 3750
+    assert hourly_pay_cents(1 / 3, 10.0) == 333
+    # 0.05 h at $15.10 = 75.5 cents
+    assert hourly_pay_cents(0.05, 15.10) == 76
+    assert hourly_pay_cents(np.array([2.5, 0.05]), 15.0).tolist() == [3750, 75]
+
+
+def test_dollars_to_cents_uses_the_written_decimal():
+    # The float 2.675 is slightly below 2.675; config amounts mean the decimal
+    assert dollars_to_cents(2.675) == 268
+    assert dollars_to_cents(-2.675) == -268
+    assert dollars_to_cents(4) == 400
+
+
+def test_to_cents_keeps_missing_and_unparseable_as_na():
+    values = pd.Series([1.5, None, 'abc', '2.25', np.nan, -0.07], index=list('abcdef'), name='Tip')
+    cents = to_cents(values)
+
+    assert str(cents.dtype) == CENTS_DTYPE
+    assert cents.name == 'Tip'
+    assert list(cents.index) == list('abcdef')
+    assert cents.isna().tolist() == [False, True, True, False, True, False]
+    assert cents.dropna().tolist() == [150, 225, -7]
+
+
+def test_to_cents_leaves_cents_columns_alone():
+    cents = to_cents(pd.Series([1.5, None], name='Tip'))
+    assert is_cents(cents)
+    assert to_cents(cents) is cents
+
+
+def test_nullable_integers_are_not_cents_unless_marked():
+    # Whole dollars as nullable integers, as another tool may write them
+    df = pd.DataFrame({'Tip': pd.Series([15, None], dtype=CENTS_DTYPE)})
+    assert not is_cents(df['Tip'])
+    assert column_cents(df['Tip']).tolist() == [1500, 0]
+
+    mark_cents(df, ['Tip'])
+    assert is_cents(df['Tip']) and is_cents(df[df['Tip'].notna()]['Tip'])
+    assert column_cents(df['Tip']).tolist() == [15, 0]
+
+
+def test_schema_marks_cents_once():
+    raw = pd.DataFrame({'ServiceProviderID': ['101'], 'CCAmount': [12.34], 'Tip': ['2.50']})
+    df = TABLE_SCHEMAS['transactions'].apply(raw)
+
+    assert cents_columns(df) == ['CCAmount', 'Tip']
+    assert not raw.attrs
+    reapplied = TABLE_SCHEMAS['transactions'].apply(df)
+    assert reapplied['CCAmount'].tolist() == [1234]
+    assert dollar_columns(reapplied)['Tip'].tolist() == [2.5]
+    assert cents_columns(dollar_columns(reapplied)) == []
+
+
+def test_cents_marks_survive_shards_and_parquet(tmp_path):
+    schema = TABLE_SCHEMAS['transactions']
+    shards = [
+        schema.apply(pd.DataFrame({'CCAmount': [1.25]})),
+        schema.apply(pd.DataFrame({'CCAmount': [2.5], 'Tip': [1.0]}))
+    ]
+    df = concat_partitions(shards, schema)
+    assert df['CCAmount'].tolist() == [125, 250]
+    assert df['Tip'].tolist() == [pd.NA, 100]
+
+    # Parquet written with the marks (as the table mirror does) reads back as cents
+    df.to_parquet(tmp_path / 'marked.parquet')
+    assert parse_table('marked.parquet', (tmp_path / 'marked.parquet').read_bytes(), schema)['CCAmount'].tolist() == [125, 250]
+
+    # The same integers written without them are whole dollars
+    df.attrs = {}
+    df.to_parquet(tmp_path / 'plain.parquet')
+    assert parse_table('plain.parquet', (tmp_path / 'plain.parquet').read_bytes(), schema)['CCAmount'].tolist() == [12500, 25000]
+
+
+def test_column_and_sum_cents_count_missing_as_zero():
+    values = pd.Series(['1.10', None, '2.20'])
+    assert column_cents(values).tolist() == [110, 0, 220]
+    assert sum_cents(values) == 330
+    assert sum_cents(to_cents(values)) == 330
@@ -0,0 +1,46 @@
+"""
+Tests for the payroll service's conditional request and content coding headers
+"""
+
+import pytest
+
+from payroll_service import _accepts_gzip, _etag_matches
+
+ETAG = '"0123456789abcdef"'
+
+
+@pytest.mark.parametrize('header, expected', [
+    (ETAG, True),
+    ('W/' + ETAG, True),
+    ('*', True),
+    (' * ', True),
+    ('"other", ' + ETAG, True),
+    ('"other",W/' + ETAG, True),
+    ('"other"', False),
+    ('"0123456789abcdef', False),
+    ('', False),
+    (None, False)
+])
+def test_etag_matches(header, expected):
+    assert _etag_matches(header, ETAG) is expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', True),
+    ('gzip, deflate, br', True),
+    ('GZIP', True),
+    ('br;q=1.0, gzip;q=0.8', True),
+    ('x-gzip', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.000', False),
+    ('*;q=0', False),
+    ('gzip;q=0, *', False),
+    ('*;q=0, gzip;q=0.5', True),
+    ('deflate, br', False),
+    ('identity', False),
+    ('', False),
+    (None, False)
+])
+def test_accepts_gzip(header, expected):
+    assert _accepts_gzip(header) is expected
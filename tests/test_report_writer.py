@@ -0,0 +1,102 @@
+"""
+Tests for the streaming XLSX writer and the table exports, read back with openpyxl and pandas
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from report_writer import write_excel_report, write_table
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'name': ['Aubrie <B> & co', 'tab\x01bed', None],
+        'hours': [40.25, np.nan, 0.0],
+        'count': [3, 0, -2],
+        'paid': [True, False, True],
+        'when': pd.to_datetime(['2025-10-05 09:30', None, '2025-10-17 00:00']),
+        'pay_date': [date(2025, 10, 25), date(2025, 10, 25), None],
+        'kind': pd.Series(['hourly', 'commission', 'hourly'], dtype='category'),
+        'cents': pd.Series([150, None, -7], dtype='Int64')
+    })
+
+
+def _sheet_rows(path, title):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [list(row) for row in workbook[title].iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def test_frame_round_trip(tmp_path, frame):
+    path = tmp_path / 'report.xlsx'
+    write_excel_report(str(path), [('Payroll Report', frame)])
+
+    rows = _sheet_rows(path, 'Payroll Report')
+    assert rows[0] == list(frame.columns)
+    assert rows[1] == ['Aubrie <B> & co', 40.25, 3, True, datetime(2025, 10, 5, 9, 30),
+                       datetime(2025, 10, 25), 'hourly', 150]
+    # Control characters are dropped; NaN, NaT, None and NA are empty cells
+    assert rows[2] == ['tabbed', None, 0, False, None, datetime(2025, 10, 25), 'commission', None]
+    assert rows[3] == [None, 0.0, -2, True, datetime(2025, 10, 17), None, 'hourly', -7]
+
+
+def test_sheet_titles_are_sanitized_and_unique(tmp_path, frame):
+    path = tmp_path / 'report.xlsx'
+    long_name = 'A very long employee name that overflows'
+    write_excel_report(
+        str(path),
+        [('Summary', frame), ('summary', frame)],
+        [('Jo/Ann [FD]', [('transactions', frame)]), (long_name, []), (long_name, [])]
+    )
+
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    titles = workbook.sheetnames
+    workbook.close()
+    assert titles[:3] == ['Summary', 'summary (2)', 'Jo_Ann _FD_']
+    assert titles[3] == long_name[:31]
+    assert titles[4] == long_name[:27] + ' (2)'
+    assert all(len(title) <= 31 for title in titles)
+
+
+def test_sections_list_empty_tables_as_none(tmp_path, frame):
+    path = tmp_path / 'report.xlsx'
+    write_excel_report(
+        str(path), [],
+        [('Megan T.', [('transactions', frame[['name', 'count']]), ('addings', pd.DataFrame())])]
+    )
+
+    rows = _sheet_rows(path, 'Megan T.')
+    assert rows[0][0] == 'transactions'
+    assert rows[1][:2] == ['name', 'count']
+    assert len(rows) == 8
+    assert not any(rows[-3])
+    assert rows[-2][0] == 'addings'
+    assert rows[-1][0] == '(none)'
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.parquet', '.ndjson'])
+def test_write_table_formats(tmp_path, extension):
+    df = pd.DataFrame({'employee_name': ['A', 'B'], 'total_pay': [10.5, 0.07]})
+    path = tmp_path / f'payroll{extension}'
+    write_table(df, str(path))
+
+    if extension == '.csv':
+        read = pd.read_csv(path)
+    elif extension == '.parquet':
+        read = pd.read_parquet(path)
+    else:
+        read = pd.read_json(path, lines=True)
+    pd.testing.assert_frame_equal(read, df)
+    assert not (tmp_path / f'payroll{extension}.tmp').exists()
+
+
+def test_write_table_rejects_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        write_table(pd.DataFrame({'a': [1]}), str(tmp_path / 'payroll.txt'))
@@ -0,0 +1,73 @@
+"""
+Tests for the table mirror's ETag checks and its pairing of data and metadata files
+"""
+
+import shutil
+from types import SimpleNamespace
+
+import pandas as pd
+
+from money import is_cents
+from table_io import partitions_from_paths
+from table_mirror import TableMirror, source_namespace
+from table_schemas import TABLE_SCHEMAS
+
+
+def test_round_trip_and_etag_check(tmp_path):
+    mirror = TableMirror(str(tmp_path), source_namespace('https://acct.dfs.core.windows.net', 'reports'))
+    df = pd.DataFrame({'ServiceProviderID': ['101', '102'], 'Amount': [10.5, 3.25]})
+    mirror.store('Transaction details/Transaction details.csv', df, 'etag-1', schema_key='s')
+
+    pd.testing.assert_frame_equal(mirror.load('Transaction details/Transaction details.csv', 'etag-1', schema_key='s'), df)
+    assert mirror.load('Transaction details/Transaction details.csv', 'etag-2', schema_key='s') is None
+    assert mirror.load('Transaction details/Transaction details.csv', 'etag-1', schema_key='other') is None
+    assert (tmp_path / 'acct.dfs.core.windows.net' / 'reports' / 'Transaction details').is_dir()
+
+
+def test_round_trip_keeps_cents_marks(tmp_path):
+    mirror = TableMirror(str(tmp_path))
+    df = TABLE_SCHEMAS['transactions'].apply(pd.DataFrame({'ServiceProviderID': ['101'], 'Tip': [2.5]}))
+    mirror.store('T/T.csv', df, 'etag-1')
+
+    loaded = mirror.load('T/T.csv', 'etag-1')
+    assert is_cents(loaded['Tip'])
+    assert TABLE_SCHEMAS['transactions'].apply(loaded)['Tip'].tolist() == [250]
+
+
+def test_data_paired_with_another_versions_metadata_is_a_miss(tmp_path):
+    # As after a crash between replacing the data file and the metadata file
+    mirror = TableMirror(str(tmp_path))
+    mirror.store('T/T.csv', pd.DataFrame({'a': [1]}), 'etag-1')
+    old_meta = tmp_path / 'old.meta.json'
+    shutil.copy(mirror._meta_path('T/T.csv'), old_meta)
+
+    mirror.store('T/T.csv', pd.DataFrame({'a': [2]}), 'etag-2')
+    shutil.copy(old_meta, mirror._meta_path('T/T.csv'))
+
+    assert mirror.load('T/T.csv', 'etag-1') is None
+
+
+def test_store_leaves_no_temporary_files(tmp_path):
+    mirror = TableMirror(str(tmp_path))
+    for etag in ('etag-1', 'etag-2'):
+        mirror.store('T/T.csv', pd.DataFrame({'a': [1]}), etag)
+    assert sorted(path.name for path in (tmp_path / 'T').iterdir()) == ['T.csv.meta.json', 'T.csv.parquet']
+
+
+def test_tables_differing_by_extension_are_kept_apart(tmp_path):
+    mirror = TableMirror(str(tmp_path))
+    csv_df, parquet_df = pd.DataFrame({'a': [1]}), pd.DataFrame({'a': [2]})
+    mirror.store('X/2025-10.csv', csv_df, 'etag-csv')
+    mirror.store('X/2025-10.parquet', parquet_df, 'etag-parquet')
+
+    pd.testing.assert_frame_equal(mirror.load('X/2025-10.csv', 'etag-csv'), csv_df)
+    pd.testing.assert_frame_equal(mirror.load('X/2025-10.parquet', 'etag-parquet'), parquet_df)
+
+
+def test_mirrored_shards_are_partitions():
+    paths = [
+        SimpleNamespace(name=f'X/{name}', is_directory=False)
+        for name in ('2025-10.csv.parquet', '2025-10.csv.meta.json', '2025-11-02.parquet', 'X.csv.parquet')
+    ]
+    partitions = partitions_from_paths(paths)
+    assert [p['path'] for p in partitions] == ['X/2025-10.csv.parquet', 'X/2025-11-02.parquet']